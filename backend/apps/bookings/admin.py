@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Availability, Booking, Staff
+from .models import Availability, Booking, EmailOutboxMessage, PaymentProofJob, Staff
 
 
 @admin.register(Staff)
@@ -31,3 +31,19 @@ class BookingAdmin(admin.ModelAdmin):
     list_filter = ("status", "payment_method", "created_at")
     search_fields = ("customer_name", "customer_email", "payment_reference")
     readonly_fields = ("public_id", "guest_token", "payment_verified_at", "payment_verified_by")
+
+
+@admin.register(EmailOutboxMessage)
+class EmailOutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ("id", "booking", "event", "recipient", "status", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status", "event")
+    search_fields = ("recipient", "booking__public_id")
+    raw_id_fields = ("booking",)
+
+
+@admin.register(PaymentProofJob)
+class PaymentProofJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "booking", "status", "attempts", "next_attempt_at", "finished_at")
+    list_filter = ("status",)
+    search_fields = ("booking__public_id",)
+    raw_id_fields = ("booking",)
@@ -0,0 +1,88 @@
+import hashlib
+import time
+from collections.abc import Iterable
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+CATALOG_SCOPE = "catalog"
+ALL_SLOTS_SCOPE = "slots"
+
+
+def _version_key(scope: str) -> str:
+    return f"availability:version:{scope}"
+
+
+def _service_scope(service_id) -> str:
+    return f"slots:service:{service_id}"
+
+
+def _versions(scopes: list[str]) -> list[int]:
+    keys = [_version_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # Seed from the clock so an evicted counter never reuses an old version.
+            cache.add(key, time.time_ns(), timeout=None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def _bump(scopes: Iterable[str]) -> None:
+    for scope in scopes:
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def invalidate_availability(*, service_ids: Iterable = ()) -> None:
+    scopes = [ALL_SLOTS_SCOPE, *(_service_scope(service_id) for service_id in set(service_ids))]
+    transaction.on_commit(lambda: _bump(scopes))
+
+
+def invalidate_availability_catalog() -> None:
+    transaction.on_commit(lambda: _bump([CATALOG_SCOPE]))
+
+
+def response_key(request) -> str:
+    service_filter = request.query_params.get("service")
+    slot_scope = _service_scope(service_filter) if service_filter else ALL_SLOTS_SCOPE
+    catalog_version, slot_version = _versions([CATALOG_SCOPE, slot_scope])
+    url_hash = hashlib.sha256(request.build_absolute_uri().encode()).hexdigest()
+    return f"availability:list:{catalog_version}:{slot_version}:{url_hash}"
+
+
+def get_response(key: str) -> dict | None:
+    return cache.get(key)
+
+
+def _max_seconds() -> int:
+    max_seconds = getattr(settings, "AVAILABILITY_CACHE_MAX_SECONDS", 3600)
+    if isinstance(caches["default"], LocMemCache):
+        # Per-process memory never sees version bumps from other processes (expiry --loop, cron,
+        # reconcile_payments, other workers), so keep entries only long enough to absorb bursts.
+        return min(max_seconds, getattr(settings, "AVAILABILITY_CACHE_LOCAL_MAX_SECONDS", 5))
+    return max_seconds
+
+
+def store_response(key: str, data) -> None:
+    max_seconds = _max_seconds()
+    timeout = max_seconds
+    results = data.get("results") or []
+    if results:
+        # The public feed hides slots once they start, so the page changes
+        # exactly when its earliest slot starts.
+        first_start = parse_datetime(results[0]["start_time"])
+        seconds_to_start = int((first_start - timezone.now()).total_seconds())
+        if seconds_to_start <= 0:
+            return
+        timeout = min(max_seconds, seconds_to_start)
+    payload = dict(data)
+    payload["results"] = [dict(item) for item in results]
+    cache.set(key, payload, timeout=timeout)
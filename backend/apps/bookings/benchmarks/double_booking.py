@@ -0,0 +1,71 @@
+from django.db import OperationalError, connection
+from django.db.models import Count, Exists, OuterRef, Q
+
+from apps.bookings.models import Availability, Booking
+
+LOCK_ERROR_MARKERS = (
+    "database is locked",
+    "database table is locked",
+    "lock timeout",
+    "could not obtain lock",
+    "deadlock detected",
+)
+
+
+def uses_in_memory_database() -> bool:
+    if connection.vendor != "sqlite":
+        return False
+    return connection.is_in_memory_db()
+
+
+def set_sqlite_journal_mode(mode: str) -> str | None:
+    # Returns the previous mode so callers can put it back; WAL otherwise sticks to the database file.
+    if connection.vendor != "sqlite":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode")
+        previous = cursor.fetchone()[0]
+        cursor.execute(f"PRAGMA journal_mode={mode}")
+        return previous
+
+
+def configure_lock_timeout(lock_timeout_ms: int) -> None:
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute(f"PRAGMA busy_timeout = {int(lock_timeout_ms)}")
+        elif connection.vendor == "postgresql":
+            cursor.execute(f"SET lock_timeout = {int(lock_timeout_ms)}")
+
+
+def is_lock_timeout(exc: Exception) -> bool:
+    if not isinstance(exc, OperationalError):
+        return False
+    message = str(exc).lower()
+    return any(marker in message for marker in LOCK_ERROR_MARKERS)
+
+
+def find_invariant_violations(availability_ids) -> list[str]:
+    violations = []
+    active_bookings = Booking.objects.filter(availability_id__in=availability_ids).exclude(
+        status=Booking.Status.CANCELLED
+    )
+    for row in (
+        active_bookings.values("availability_id").annotate(total=Count("id")).filter(total__gt=1)
+    ):
+        violations.append(f"slot {row['availability_id']} has {row['total']} active bookings")
+
+    has_active_booking = Exists(
+        Booking.objects.filter(availability_id=OuterRef("pk")).exclude(status=Booking.Status.CANCELLED)
+    )
+    mismatched = (
+        Availability.objects.filter(pk__in=availability_ids)
+        .annotate(has_active_booking=has_active_booking)
+        .filter(Q(is_booked=True, has_active_booking=False) | Q(is_booked=False, has_active_booking=True))
+        .values_list("pk", "is_booked")
+    )
+    for slot_id, is_booked in mismatched:
+        if is_booked:
+            violations.append(f"slot {slot_id} is flagged booked but has no active booking")
+        else:
+            violations.append(f"slot {slot_id} has an active booking but is flagged free")
+    return violations
@@ -0,0 +1,226 @@
+import statistics
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.bookings.models import Availability, Booking
+from apps.services.models import Service
+from apps.users.roles import ROLE_OPERATOR, ensure_default_roles
+
+
+def percentile(samples: list[float], percentile: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(percentile / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class BenchmarkContext:
+    def __init__(self):
+        self.anonymous = APIClient()
+        self.operator = APIClient()
+        user = get_user_model().objects.create_user(
+            username=f"benchmark-operator-{uuid.uuid4().hex[:8]}",
+            password=uuid.uuid4().hex,
+            is_staff=True,
+        )
+        ensure_default_roles()
+        user.groups.add(Group.objects.get(name=ROLE_OPERATOR))
+        self.operator.force_login(user)
+        self.user = user
+
+    def close(self) -> None:
+        self.operator.logout()
+        self.user.delete()
+
+
+def _request(client, method: str, path: str, *, data=None, format=None, expected: int = 200) -> dict:
+    return {"client": client, "method": method, "path": path, "data": data, "format": format, "expected": expected}
+
+
+def _availability_list(context: BenchmarkContext, count: int) -> list[dict]:
+    paths = ["/api/bookings/availability/"]
+    paths += [
+        f"/api/bookings/availability/?service={service_id}"
+        for service_id in Service.objects.filter(is_active=True).values_list("id", flat=True)[:20]
+    ]
+    return [_request(context.anonymous, "get", paths[index % len(paths)]) for index in range(count)]
+
+
+def _booking_create(context: BenchmarkContext, count: int) -> list[dict]:
+    # Cancelled bookings keep their one-to-one slot link, so only never-booked slots are bookable.
+    slots = Availability.objects.filter(
+        is_booked=False,
+        booking__isnull=True,
+        start_time__gt=timezone.now(),
+        staff__is_active=True,
+        service__is_active=True,
+    ).values_list("id", "service_id", "staff_id")[:count]
+    return [
+        _request(
+            context.anonymous,
+            "post",
+            "/api/bookings/",
+            data={
+                "customer_name": "Benchmark Guest",
+                "customer_email": f"benchmark.guest{index}@example.com",
+                "customer_phone": "09170000000",
+                "service": service_id,
+                "staff": staff_id,
+                "availability": slot_id,
+            },
+            format="json",
+            expected=201,
+        )
+        for index, (slot_id, service_id, staff_id) in enumerate(slots)
+    ]
+
+
+def _track_status(context: BenchmarkContext, count: int) -> list[dict]:
+    bookings = Booking.objects.order_by("-id").values_list("public_id", "customer_email", "guest_token")[:count]
+    return [
+        _request(
+            context.anonymous,
+            "post",
+            f"/api/bookings/{public_id}/track-status/",
+            data={"customer_email": email, "guest_token": str(guest_token)},
+            format="json",
+        )
+        for public_id, email, guest_token in bookings
+    ]
+
+
+def _submit_payment_proof(context: BenchmarkContext, count: int) -> list[dict]:
+    bookings = Booking.objects.filter(
+        status=Booking.Status.AWAITING_PAYMENT,
+        payment_expires_at__gt=timezone.now(),
+    ).values_list("public_id", "customer_email", "guest_token")[:count]
+    return [
+        _request(
+            context.anonymous,
+            "post",
+            f"/api/bookings/{public_id}/submit-payment-proof/",
+            data={
+                "customer_email": email,
+                "guest_token": str(guest_token),
+                "payment_method": Booking.PaymentMethod.GCASH,
+                "payment_reference": f"BENCH-{uuid.uuid4().hex[:16]}",
+                "payment_proof_file": SimpleUploadedFile("proof.png", b"\x89PNG benchmark", content_type="image/png"),
+            },
+            format="multipart",
+        )
+        for public_id, email, guest_token in bookings
+    ]
+
+
+def _verify_payment(context: BenchmarkContext, count: int) -> list[dict]:
+    public_ids = Booking.objects.filter(status=Booking.Status.PAYMENT_SUBMITTED).values_list("public_id", flat=True)
+    return [
+        _request(
+            context.operator,
+            "post",
+            f"/api/bookings/{public_id}/verify-payment/",
+            data={"approved": True, "admin_note": "Benchmark approval"},
+            format="json",
+        )
+        for public_id in public_ids[:count]
+    ]
+
+
+def _admin_booking_list(context: BenchmarkContext, count: int) -> list[dict]:
+    return [
+        _request(context.operator, "get", f"/api/bookings/?status={Booking.Status.PAYMENT_SUBMITTED}")
+        for _index in range(count)
+    ]
+
+
+SCENARIOS = {
+    "availability_list": _availability_list,
+    "booking_create": _booking_create,
+    "track_status": _track_status,
+    "submit_payment_proof": _submit_payment_proof,
+    "verify_payment": _verify_payment,
+    "admin_booking_list": _admin_booking_list,
+}
+
+
+def _send(spec: dict):
+    method = getattr(spec["client"], spec["method"])
+    if spec["data"] is None:
+        return method(spec["path"])
+    return method(spec["path"], data=spec["data"], format=spec["format"])
+
+
+def _send_and_roll_back(spec: dict):
+    # Each request gets its own transaction that is rolled back, so every request sees the seeded data.
+    # Its on-commit work (availability cache invalidation) still runs, and the rollback stands in for the commit.
+    started = time.perf_counter()
+    with transaction.atomic():
+        with CaptureQueriesContext(connection) as captured, TestCase.captureOnCommitCallbacks(execute=True):
+            response = _send(spec)
+        transaction.set_rollback(True)
+    return response, time.perf_counter() - started, len(captured)
+
+
+def run_scenario(name: str, context: BenchmarkContext, *, iterations: int, warmup: int) -> dict | None:
+    requests = SCENARIOS[name](context, iterations + warmup)
+    if len(requests) <= warmup:
+        return None
+    for spec in requests[:warmup]:
+        _send_and_roll_back(spec)
+
+    latencies: list[float] = []
+    query_counts: list[int] = []
+    errors = 0
+    started = time.perf_counter()
+    for spec in requests[warmup:]:
+        # Start cold, or repeated availability URLs would measure cache hits instead of the queries.
+        cache.clear()
+        response, latency, query_count = _send_and_roll_back(spec)
+        latencies.append(latency)
+        query_counts.append(query_count)
+        if response.status_code != spec["expected"]:
+            errors += 1
+    duration = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / duration, 2) if duration > 0 else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "queries_mean": round(statistics.fmean(query_counts), 2),
+        "queries_max": max(query_counts),
+    }
+
+
+def find_regressions(results: dict, baseline: dict, *, tolerance: float) -> list[str]:
+    # Latency and throughput get `tolerance` slack; query counts and errors must not grow at all.
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {current['p95_ms']}ms > baseline {previous['p95_ms']}ms")
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {current['throughput_rps']}/s < baseline {previous['throughput_rps']}/s"
+            )
+        if current["queries_max"] > previous["queries_max"]:
+            regressions.append(f"{name}: {current['queries_max']} queries > baseline {previous['queries_max']}")
+        if current["errors"] > previous.get("errors", 0):
+            regressions.append(
+                f"{name}: {current['errors']} unexpected responses > baseline {previous.get('errors', 0)}"
+            )
+    return regressions
@@ -0,0 +1,107 @@
+import heapq
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import Booking
+from .services import expire_unpaid_bookings
+
+
+PENDING_PAYMENT_STATUSES = (Booking.Status.AWAITING_PAYMENT, Booking.Status.PAYMENT_SUBMITTED)
+
+
+class PaymentExpiryScheduler:
+    def __init__(
+        self,
+        *,
+        batch_size: int | None = None,
+        poll_seconds: float | None = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.batch_size = batch_size or getattr(settings, "BOOKING_EXPIRY_BATCH_SIZE", 500)
+        self.poll_seconds = poll_seconds or getattr(settings, "BOOKING_EXPIRY_POLL_SECONDS", 5)
+        self._sleep = sleep
+        self.overlap = timedelta(seconds=getattr(settings, "BOOKING_EXPIRY_REFRESH_OVERLAP_SECONDS", 60))
+        self.rescan_interval = timedelta(seconds=getattr(settings, "BOOKING_EXPIRY_RESCAN_SECONDS", 300))
+        self._deadlines: list[tuple[datetime, int]] = []
+        self._scheduled: set[tuple[datetime, int]] = set()
+        self._last_refresh = timezone.now()
+        self._last_rescan = self._last_refresh
+
+    def _pending(self):
+        return Booking.objects.filter(
+            status__in=PENDING_PAYMENT_STATUSES,
+            payment_expires_at__isnull=False,
+        ).values_list("payment_expires_at", "id")
+
+    def _rescan(self, now: datetime) -> None:
+        self._deadlines = list(self._pending())
+        self._scheduled = set(self._deadlines)
+        heapq.heapify(self._deadlines)
+        self._last_rescan = now
+
+    def prime(self) -> int:
+        expired = expire_unpaid_bookings(batch_size=self.batch_size)
+        now = timezone.now()
+        self._rescan(now)
+        self._last_refresh = now
+        return expired
+
+    def refresh(self) -> None:
+        now = timezone.now()
+        if now - self._last_rescan >= self.rescan_interval:
+            self._rescan(now)
+            self._last_refresh = now
+            return
+        # updated_at is stamped before commit, so a row can become visible after later-stamped
+        # rows were already read; re-reading an overlap window catches those late commits.
+        changed = self._pending().filter(updated_at__gte=self._last_refresh - self.overlap)
+        for entry in changed:
+            if entry not in self._scheduled:
+                self._scheduled.add(entry)
+                heapq.heappush(self._deadlines, entry)
+        self._last_refresh = now
+
+    def run_due(self) -> int:
+        # Heap entries are only wake-up hints; stale ones (paid, cancelled or
+        # rejected back to awaiting payment) are re-checked by the set-based expiry.
+        now = timezone.now()
+        due = False
+        while self._deadlines and self._deadlines[0][0] <= now:
+            self._scheduled.discard(heapq.heappop(self._deadlines))
+            due = True
+        if not due:
+            return 0
+        return expire_unpaid_bookings(batch_size=self.batch_size)
+
+    def seconds_until_next(self) -> float:
+        if not self._deadlines:
+            return self.poll_seconds
+        remaining = (self._deadlines[0][0] - timezone.now()).total_seconds()
+        return max(0.0, min(remaining, self.poll_seconds))
+
+    def run(
+        self,
+        *,
+        max_cycles: int | None = None,
+        on_expired: Callable[[int], None] | None = None,
+    ) -> int:
+        total = self.prime()
+        if total and on_expired:
+            on_expired(total)
+        cycles = 0
+        while max_cycles is None or cycles < max_cycles:
+            self._sleep(self.seconds_until_next())
+            close_old_connections()
+            self.refresh()
+            expired = self.run_due()
+            if expired:
+                total += expired
+                if on_expired:
+                    on_expired(expired)
+            cycles += 1
+        return total
@@ -0,0 +1,61 @@
+import csv
+import json
+from collections.abc import Iterator
+from datetime import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+EXPORT_COLUMNS = [
+    ("public_id", "public_id"),
+    ("created_at", "created_at"),
+    ("status", "status"),
+    ("customer_name", "customer_name"),
+    ("customer_email", "customer_email"),
+    ("customer_phone", "customer_phone"),
+    ("service", "service__name"),
+    ("staff", "staff__full_name"),
+    ("slot_start", "availability__start_time"),
+    ("slot_end", "availability__end_time"),
+    ("payment_method", "payment_method"),
+    ("payment_reference", "payment_reference"),
+    ("payment_submitted_at", "payment_submitted_at"),
+    ("payment_verified_at", "payment_verified_at"),
+    ("payment_verified_by", "payment_verified_by__username"),
+]
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+class _EchoBuffer:
+    def write(self, value: str) -> str:
+        return value
+
+
+def _export_rows(queryset, chunk_size: int) -> Iterator[dict]:
+    lookups = [lookup for _name, lookup in EXPORT_COLUMNS]
+    for row in queryset.order_by("created_at", "id").values_list(*lookups).iterator(chunk_size=chunk_size):
+        yield {
+            name: timezone.localtime(value).isoformat() if isinstance(value, datetime) else value
+            for (name, _lookup), value in zip(EXPORT_COLUMNS, row)
+        }
+
+
+def _csv_cell(value):
+    if value is None:
+        return ""
+    # Guest-entered text opened in a spreadsheet must not be evaluated as a formula.
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+def stream_bookings_csv(queryset, *, chunk_size: int = 2000) -> Iterator[str]:
+    writer = csv.writer(_EchoBuffer())
+    yield writer.writerow([name for name, _lookup in EXPORT_COLUMNS])
+    for row in _export_rows(queryset, chunk_size):
+        yield writer.writerow([_csv_cell(value) for value in row.values()])
+
+
+def stream_bookings_ndjson(queryset, *, chunk_size: int = 2000) -> Iterator[str]:
+    for row in _export_rows(queryset, chunk_size):
+        yield json.dumps(row, cls=DjangoJSONEncoder) + "\n"
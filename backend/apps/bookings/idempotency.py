@@ -0,0 +1,138 @@
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyRecord
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+
+def _fingerprint(request) -> str:
+    digest = hashlib.sha256()
+    digest.update(f"{request.method} {request.path}".encode())
+    data = request.data
+    for name in sorted(data.keys()):
+        values = data.getlist(name) if hasattr(data, "getlist") else [data[name]]
+        for value in values:
+            digest.update(b"\0" + name.encode() + b"\0")
+            if hasattr(value, "chunks"):
+                for chunk in value.chunks():
+                    digest.update(chunk)
+                value.seek(0)
+            else:
+                digest.update(json.dumps(value, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def _replay(record: IdempotencyRecord) -> Response:
+    response = Response(record.response_body, status=record.response_status)
+    response[REPLAYED_HEADER] = "true"
+    return response
+
+
+def _in_progress() -> Response:
+    return Response(
+        {"detail": "A request with this Idempotency-Key is still being processed."},
+        status=status.HTTP_409_CONFLICT,
+    )
+
+
+def _lock_timeout() -> timedelta:
+    return timedelta(seconds=getattr(settings, "BOOKING_IDEMPOTENCY_LOCK_SECONDS", 60))
+
+
+def _held(record: IdempotencyRecord):
+    # Scoped to this request's lease, so a request that outlived it cannot clobber the one that took over.
+    return IdempotencyRecord.objects.filter(pk=record.pk, locked_at=record.locked_at)
+
+
+def _reserve(scope: str, key: str, fingerprint: str) -> IdempotencyRecord | Response:
+    now = timezone.now()
+    record = IdempotencyRecord.objects.filter(scope=scope, key=key).first()
+    if record is not None and record.expires_at <= now:
+        # Expired keys are treated as unused; purge_idempotency_keys clears the rest in bulk.
+        record.delete()
+        record = None
+
+    if record is None:
+        ttl = timedelta(seconds=getattr(settings, "BOOKING_IDEMPOTENCY_TTL_SECONDS", 86400))
+        try:
+            with transaction.atomic():
+                return IdempotencyRecord.objects.create(
+                    scope=scope,
+                    key=key,
+                    fingerprint=fingerprint,
+                    locked_at=now,
+                    expires_at=now + ttl,
+                )
+        except IntegrityError:
+            # A concurrent request with the same key reserved it first.
+            record = IdempotencyRecord.objects.filter(scope=scope, key=key).first()
+            if record is None:
+                return _in_progress()
+
+    if record.fingerprint != fingerprint:
+        return Response(
+            {"detail": "Idempotency-Key was already used with a different request."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    if record.response_status is None:
+        if record.locked_at > now - _lock_timeout():
+            return _in_progress()
+        # The request holding this key died before storing a response; let this one take it over.
+        taken = IdempotencyRecord.objects.filter(
+            pk=record.pk, response_status__isnull=True, locked_at=record.locked_at
+        ).update(locked_at=now)
+        if not taken:
+            return _in_progress()
+        record.locked_at = now
+        return record
+    return _replay(record)
+
+
+def idempotent(scope: str):
+    def decorator(view_method):
+        @functools.wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER, "").strip()
+            if not key:
+                return view_method(self, request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return Response(
+                    {"detail": f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            reserved = _reserve(scope, key, _fingerprint(request))
+            if isinstance(reserved, Response):
+                return reserved
+
+            # Validation, permission and not-found errors are deterministic, so they are
+            # stored and replayed too; server errors free the key so the client can retry.
+            try:
+                try:
+                    response = view_method(self, request, *args, **kwargs)
+                except Exception as exc:
+                    response = self.handle_exception(exc)
+            except Exception:
+                _held(reserved).delete()
+                raise
+            if response.status_code >= 500:
+                _held(reserved).delete()
+                return response
+
+            _held(reserved).update(response_status=response.status_code, response_body=response.data)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,108 @@
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+
+from apps.metrics.registry import registry
+
+logger = logging.getLogger(__name__)
+
+LOCK_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+workflow_lock_wait_seconds = registry.histogram(
+    "booking_workflow_lock_wait_seconds",
+    "Time spent acquiring row locks per booking workflow transaction.",
+    buckets=LOCK_WAIT_BUCKETS,
+)
+workflow_transaction_seconds = registry.histogram(
+    "booking_workflow_transaction_seconds",
+    "Time spent inside the booking workflow transaction, excluding commit.",
+)
+workflow_commit_seconds = registry.histogram(
+    "booking_workflow_commit_seconds",
+    "Time spent committing the booking workflow transaction.",
+)
+workflow_total = registry.counter(
+    "booking_workflow_total",
+    "Booking workflow transactions by outcome.",
+)
+
+_state = threading.local()
+
+
+class _WorkflowTimer:
+    def __init__(self):
+        self.lock_wait = 0.0
+
+
+@contextmanager
+def lock_wait():
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer = getattr(_state, "timer", None)
+        if timer is not None:
+            timer.lock_wait += time.perf_counter() - started
+
+
+def _record(workflow: str, *, lock_wait_seconds: float, transaction_seconds: float, commit_seconds, outcome: str):
+    workflow_total.inc(workflow=workflow, outcome=outcome)
+    workflow_lock_wait_seconds.observe(lock_wait_seconds, workflow=workflow)
+    workflow_transaction_seconds.observe(transaction_seconds, workflow=workflow)
+    if commit_seconds is not None:
+        workflow_commit_seconds.observe(commit_seconds, workflow=workflow)
+
+    slow_lock_ms = getattr(settings, "BOOKING_WORKFLOW_SLOW_LOCK_WAIT_MS", 200)
+    slow_transaction_ms = getattr(settings, "BOOKING_WORKFLOW_SLOW_TRANSACTION_MS", 1000)
+    total_seconds = transaction_seconds + (commit_seconds or 0.0)
+    if lock_wait_seconds * 1000 >= slow_lock_ms or total_seconds * 1000 >= slow_transaction_ms:
+        logger.warning(
+            "Slow booking workflow. workflow=%s outcome=%s lock_wait_ms=%.1f transaction_ms=%.1f commit_ms=%s",
+            workflow,
+            outcome,
+            lock_wait_seconds * 1000,
+            transaction_seconds * 1000,
+            "n/a" if commit_seconds is None else f"{commit_seconds * 1000:.1f}",
+        )
+
+
+def instrumented_atomic(workflow: str):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # Inside an outer atomic block nothing is committed here, so no commit time is recorded.
+            nested = transaction.get_connection().in_atomic_block
+            previous_timer = getattr(_state, "timer", None)
+            timer = _state.timer = _WorkflowTimer()
+            outcome = "error"
+            started = time.perf_counter()
+            body_finished = None
+            try:
+                with transaction.atomic():
+                    try:
+                        result = func(*args, **kwargs)
+                    finally:
+                        body_finished = time.perf_counter()
+                outcome = "ok"
+                return result
+            finally:
+                finished = time.perf_counter()
+                _state.timer = previous_timer
+                if body_finished is None:
+                    body_finished = finished
+                _record(
+                    workflow,
+                    lock_wait_seconds=timer.lock_wait,
+                    transaction_seconds=body_finished - started,
+                    commit_seconds=None if nested or outcome != "ok" else finished - body_finished,
+                    outcome=outcome,
+                )
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,101 @@
+import json
+import platform
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from apps.bookings.benchmarks.endpoints import SCENARIOS, BenchmarkContext, find_regressions, run_scenario
+
+
+class Command(BaseCommand):
+    help = "Benchmark hot booking endpoints in-process and compare against a stored baseline."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=200, help="Measured requests per scenario.")
+        parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests sent first per scenario.")
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=sorted(SCENARIOS),
+            help="Run only this scenario; repeat to pick several. Defaults to all.",
+        )
+        parser.add_argument("--output", default="benchmark-results.json", help="Where to write the JSON results.")
+        parser.add_argument(
+            "--baseline",
+            default="benchmark-baseline.json",
+            help="Baseline JSON to compare against; comparison is skipped if the file does not exist.",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.25,
+            help="Allowed relative slowdown in p95 latency and throughput before failing.",
+        )
+        parser.add_argument(
+            "--save-baseline",
+            action="store_true",
+            help="Write this run's results to --baseline instead of comparing against it.",
+        )
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        warmup = options["warmup"]
+        tolerance = options["tolerance"]
+        if iterations < 1 or warmup < 0:
+            raise CommandError("--iterations must be positive and --warmup cannot be negative.")
+        if tolerance < 0:
+            raise CommandError("--tolerance cannot be negative.")
+
+        scenarios = options["scenario"] or list(SCENARIOS)
+        results = {}
+        with tempfile.TemporaryDirectory() as media_root, override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            MEDIA_ROOT=media_root,
+            # A private cache, so clearing it between requests never touches the shared one.
+            CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "benchmark"}},
+        ):
+            context = BenchmarkContext()
+            try:
+                for name in scenarios:
+                    result = run_scenario(name, context, iterations=iterations, warmup=warmup)
+                    if result is None:
+                        self.stdout.write(self.style.WARNING(f"[{name}] skipped: not enough seeded rows."))
+                        continue
+                    results[name] = result
+                    self.stdout.write(
+                        f"[{name}] {result['throughput_rps']}/s p50={result['p50_ms']}ms "
+                        f"p95={result['p95_ms']}ms p99={result['p99_ms']}ms "
+                        f"queries={result['queries_mean']} (max {result['queries_max']}) errors={result['errors']}"
+                    )
+            finally:
+                context.close()
+
+        report = {
+            "created_at": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "iterations": iterations,
+            "results": results,
+        }
+        Path(options["output"]).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        self.stdout.write(f"Results written to {options['output']}")
+
+        baseline_path = Path(options["baseline"])
+        if options["save_baseline"]:
+            baseline_path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+            self.stdout.write(self.style.SUCCESS(f"Baseline saved to {baseline_path}"))
+            return
+        if not baseline_path.exists():
+            self.stdout.write("No baseline found; skipping regression check.")
+            return
+
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        regressions = find_regressions(results, baseline.get("results", {}), tolerance=tolerance)
+        if regressions:
+            raise CommandError("Benchmark regressions:\n" + "\n".join(regressions))
+        self.stdout.write(self.style.SUCCESS(f"No regressions against {baseline_path}"))
@@ -0,0 +1,149 @@
+import statistics
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection, transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from apps.bookings.benchmarks.endpoints import percentile
+from apps.bookings.models import Availability, Booking, Staff
+from apps.bookings.services import create_guest_booking
+from apps.services.models import Service
+
+
+@transaction.atomic
+def _row_lock_booking(*, validated_data: dict) -> Booking:
+    availability = (
+        Availability.objects.select_related("service", "staff")
+        .select_for_update()
+        .get(pk=validated_data["availability"].pk)
+    )
+    if availability.is_booked:
+        raise ValidationError({"availability": "This slot is already booked."})
+    if availability.start_time <= timezone.now():
+        raise ValidationError({"availability": "Cannot book a past slot."})
+    booking = Booking.objects.create(**validated_data, status=Booking.Status.AWAITING_PAYMENT)
+    availability.is_booked = True
+    availability.save(update_fields=["is_booked"])
+    return booking
+
+
+STRATEGIES = {
+    "cas": create_guest_booking,
+    "row-lock": _row_lock_booking,
+}
+
+
+class Command(BaseCommand):
+    help = "Race N threads for one availability slot and report claim throughput and latency."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16, help="Concurrent guests per slot.")
+        parser.add_argument("--rounds", type=int, default=20, help="Number of fresh slots to race for.")
+        parser.add_argument(
+            "--strategy",
+            choices=["cas", "row-lock", "both"],
+            default="both",
+            help="cas = current conditional UPDATE claim, row-lock = previous select_for_update flow.",
+        )
+
+    def handle(self, *args, **options):
+        threads = options["threads"]
+        rounds = options["rounds"]
+        if threads < 1 or rounds < 1:
+            raise CommandError("--threads and --rounds must be positive.")
+
+        strategies = ["row-lock", "cas"] if options["strategy"] == "both" else [options["strategy"]]
+        run_id = uuid.uuid4().hex[:8]
+        service = Service.objects.create(
+            name=f"Benchmark Service {run_id}",
+            duration_minutes=30,
+            price="0.00",
+            is_active=True,
+        )
+        staff = Staff.objects.create(
+            full_name=f"Benchmark Staff {run_id}",
+            email=f"benchmark-{run_id}@example.com",
+            is_active=True,
+        )
+        try:
+            with override_settings(BOOKING_STATUS_EMAIL_ENABLED=False):
+                for strategy in strategies:
+                    self._run_strategy(strategy, service=service, staff=staff, threads=threads, rounds=rounds)
+        finally:
+            Booking.objects.filter(staff=staff).delete()
+            Availability.objects.filter(staff=staff).delete()
+            staff.delete()
+            service.delete()
+
+    def _run_strategy(self, strategy: str, *, service, staff, threads: int, rounds: int) -> None:
+        book = STRATEGIES[strategy]
+        latencies: list[float] = []
+        outcomes = {"booked": 0, "rejected": 0, "errors": 0}
+        lock = threading.Lock()
+        base = timezone.now() + timedelta(days=365)
+
+        started = time.perf_counter()
+        for round_index in range(rounds):
+            slot_start = base + timedelta(minutes=30 * round_index)
+            availability = Availability.objects.create(
+                staff=staff,
+                service=service,
+                start_time=slot_start,
+                end_time=slot_start + timedelta(minutes=30),
+            )
+            barrier = threading.Barrier(threads)
+
+            def attempt(guest_index: int) -> None:
+                close_old_connections()
+                try:
+                    barrier.wait()
+                    attempt_started = time.perf_counter()
+                    try:
+                        book(
+                            validated_data={
+                                "customer_name": f"Guest {guest_index}",
+                                "customer_email": f"guest{guest_index}@example.com",
+                                "customer_phone": "09170000000",
+                                "service": service,
+                                "staff": staff,
+                                "availability": Availability.objects.get(pk=availability.pk),
+                            }
+                        )
+                        outcome = "booked"
+                    except ValidationError:
+                        outcome = "rejected"
+                    except Exception:
+                        outcome = "errors"
+                    elapsed = time.perf_counter() - attempt_started
+                    with lock:
+                        latencies.append(elapsed)
+                        outcomes[outcome] += 1
+                finally:
+                    connection.close()
+
+            workers = [threading.Thread(target=attempt, args=(index,)) for index in range(threads)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        duration = time.perf_counter() - started
+
+        double_booked = outcomes["booked"] - rounds if outcomes["booked"] > rounds else 0
+        self.stdout.write(
+            f"[{strategy}] attempts={len(latencies)} booked={outcomes['booked']} "
+            f"rejected={outcomes['rejected']} errors={outcomes['errors']} double_booked={double_booked}"
+        )
+        self.stdout.write(
+            f"[{strategy}] throughput={len(latencies) / duration:.1f} attempts/s "
+            f"p50={percentile(latencies, 50) * 1000:.2f}ms "
+            f"p99={percentile(latencies, 99) * 1000:.2f}ms "
+            f"mean={statistics.fmean(latencies) * 1000:.2f}ms"
+        )
+        Booking.objects.filter(staff=staff).delete()
+        Availability.objects.filter(staff=staff).delete()
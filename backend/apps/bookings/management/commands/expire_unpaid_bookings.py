@@ -1,12 +1,70 @@
-from django.core.management.base import BaseCommand
+import time
 
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.bookings.expiry import PaymentExpiryScheduler
 from apps.bookings.services import expire_unpaid_bookings
 
 
 class Command(BaseCommand):
     help = "Auto-cancel expired unpaid bookings and release their slots."
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=getattr(settings, "BOOKING_EXPIRY_BATCH_SIZE", 500),
+            help="Bookings claimed and cancelled per transaction.",
+        )
+        parser.add_argument(
+            "--max-batches",
+            type=int,
+            default=None,
+            help="Stop after this many batches; rerun to continue where it left off.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and expire bookings as their payment deadlines pass.",
+        )
+        parser.add_argument(
+            "--poll-seconds",
+            type=float,
+            default=getattr(settings, "BOOKING_EXPIRY_POLL_SECONDS", 5),
+            help="In --loop mode, longest sleep before checking for newly created bookings.",
+        )
+
     def handle(self, *args, **options):
-        expired_count = expire_unpaid_bookings()
-        self.stdout.write(self.style.SUCCESS(f"Expired bookings processed: {expired_count}"))
+        batch_size = options["batch_size"]
+        max_batches = options["max_batches"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive.")
+        if max_batches is not None and max_batches < 1:
+            raise CommandError("--max-batches must be positive.")
+
+        if options["loop"]:
+            if options["poll_seconds"] <= 0:
+                raise CommandError("--poll-seconds must be positive.")
+            self._run_loop(batch_size=batch_size, poll_seconds=options["poll_seconds"])
+            return
+
+        started = time.perf_counter()
+        expired_count = expire_unpaid_bookings(batch_size=batch_size, max_batches=max_batches)
+        elapsed = time.perf_counter() - started
+        rate = expired_count / elapsed if elapsed > 0 else 0.0
+        self.stdout.write(
+            self.style.SUCCESS(f"Expired bookings processed: {expired_count} ({rate:.1f} rows/sec)")
+        )
 
+    def _run_loop(self, *, batch_size: int, poll_seconds: float) -> None:
+        scheduler = PaymentExpiryScheduler(batch_size=batch_size, poll_seconds=poll_seconds)
+        self.stdout.write(f"Watching payment deadlines (poll every {poll_seconds:g}s). Press Ctrl+C to stop.")
+        try:
+            scheduler.run(
+                on_expired=lambda count: self.stdout.write(
+                    self.style.SUCCESS(f"Expired bookings processed: {count}")
+                )
+            )
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped.")
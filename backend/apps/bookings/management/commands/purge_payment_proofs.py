@@ -0,0 +1,60 @@
+import re
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.bookings.proofs import purge_payment_proofs
+
+AGE_PATTERN = re.compile(r"^(\d+)([dh]?)$")
+
+
+def parse_age(value: str) -> timedelta:
+    match = AGE_PATTERN.match(value.strip().lower())
+    if not match:
+        raise CommandError(f"Cannot parse age {value!r}; use e.g. 180d or 12h.")
+    amount, unit = match.groups()
+    return timedelta(hours=int(amount)) if unit == "h" else timedelta(days=int(amount))
+
+
+class Command(BaseCommand):
+    help = "Delete payment proof files of completed and cancelled bookings older than the retention period."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            default=f"{getattr(settings, 'BOOKING_PROOF_RETENTION_DAYS', 180)}d",
+            help="Age since the booking last changed, in days (180d) or hours (12h).",
+        )
+        parser.add_argument("--batch-size", type=int, default=500, help="Bookings cleared per update.")
+        parser.add_argument("--workers", type=int, default=8, help="Threads deleting files from storage.")
+        parser.add_argument("--dry-run", action="store_true", help="List the files that would be deleted.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1 or options["workers"] < 1:
+            raise CommandError("--batch-size and --workers must be positive.")
+        dry_run = options["dry_run"]
+
+        def report(name: str, size: int) -> None:
+            if dry_run:
+                self.stdout.write(f"would delete {name} ({size} bytes)")
+
+        started = time.perf_counter()
+        counts = purge_payment_proofs(
+            older_than=parse_age(options["older_than"]),
+            batch_size=options["batch_size"],
+            workers=options["workers"],
+            dry_run=dry_run,
+            on_file=report,
+        )
+        elapsed = time.perf_counter() - started
+
+        verb = "would reclaim" if dry_run else "reclaimed"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"bookings={counts['bookings']} files={counts['files']} shared_kept={counts['shared']} "
+                f"missing={counts['missing']} {verb}={counts['bytes']} bytes "
+                f"({counts['bytes'] / (1024 * 1024):.1f}MB) in {elapsed:.1f}s"
+            )
+        )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.bookings.proof_uploads import purge_expired_proof_uploads
+
+
+class Command(BaseCommand):
+    help = "Delete expired resumable payment proof uploads and their partial files."
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_proof_uploads()
+        self.stdout.write(self.style.SUCCESS(f"Expired proof uploads deleted: {deleted}"))
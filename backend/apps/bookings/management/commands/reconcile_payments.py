@@ -0,0 +1,85 @@
+import csv
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from apps.bookings.models import Booking
+from apps.bookings.reconciliation import REPORT_COLUMNS, reconcile_statement
+
+
+class Command(BaseCommand):
+    help = "Approve payment-submitted bookings whose reference appears in a GCash/BDO statement export."
+
+    def add_arguments(self, parser):
+        parser.add_argument("statement", help="Statement CSV with a reference number column.")
+        parser.add_argument(
+            "--payment-method",
+            choices=Booking.PaymentMethod.values,
+            default=None,
+            help="Payment method for every row; required when the statement has no method column.",
+        )
+        parser.add_argument("--operator", default=None, help="Username recorded as the payment verifier.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=getattr(settings, "BOOKING_RECONCILE_BATCH_SIZE", 500),
+            help="Matched bookings approved per transaction.",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Report matches without approving anything.")
+        parser.add_argument("--report", default=None, help="Write unmatched and ambiguous rows to this CSV file.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive.")
+        operator = None
+        if options["operator"]:
+            operator = get_user_model().objects.filter(username=options["operator"]).first()
+            if operator is None:
+                raise CommandError(f"No user named {options['operator']!r}.")
+
+        started = time.perf_counter()
+        try:
+            with open(options["statement"], newline="", encoding="utf-8-sig") as statement:
+                report = reconcile_statement(
+                    statement,
+                    operator=operator,
+                    payment_method=options["payment_method"],
+                    dry_run=options["dry_run"],
+                    batch_size=options["batch_size"],
+                )
+        except OSError as exc:
+            raise CommandError(f"Cannot read statement: {exc}")
+        except UnicodeDecodeError:
+            raise CommandError("Statement must be a UTF-8 encoded CSV file.")
+        except ValidationError as exc:
+            raise CommandError(" ".join(str(detail) for detail in exc.detail))
+        elapsed = time.perf_counter() - started
+
+        problems = [("unmatched", row) for row in report["unmatched"]] + [
+            ("ambiguous", row) for row in report["ambiguous"]
+        ]
+        if options["report"]:
+            with open(options["report"], "w", newline="", encoding="utf-8") as output:
+                writer = csv.DictWriter(output, fieldnames=REPORT_COLUMNS)
+                writer.writeheader()
+                for category, row in problems:
+                    writer.writerow({"category": category, **row})
+            self.stdout.write(f"Report written to {options['report']}")
+        else:
+            for category, row in problems:
+                self.stdout.write(
+                    f"{category} line {row['line']} {row['payment_method'] or '-'} {row['reference']}: {row['reason']}"
+                )
+
+        rate = report["rows"] / elapsed if elapsed > 0 else 0.0
+        verb = "would approve" if options["dry_run"] else "approved"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"rows={report['rows']} matched={report['matched']} {verb}="
+                f"{report['matched'] if options['dry_run'] else report['approved']} "
+                f"unmatched={len(report['unmatched'])} ambiguous={len(report['ambiguous'])} ({rate:.1f} rows/sec)"
+            )
+        )
@@ -0,0 +1,51 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from apps.bookings.notifications import deliver_outbox_batch
+
+
+class Command(BaseCommand):
+    help = "Send queued booking status emails from the outbox table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50, help="Outbox rows claimed per batch.")
+        parser.add_argument("--workers", type=int, default=4, help="Threads (SMTP connections) per batch.")
+        parser.add_argument(
+            "--poll-seconds",
+            type=float,
+            default=getattr(settings, "BOOKING_EMAIL_OUTBOX_POLL_SECONDS", 2),
+            help="Sleep between polls when the outbox is empty.",
+        )
+        parser.add_argument("--once", action="store_true", help="Drain the outbox once and exit.")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        workers = options["workers"]
+        if batch_size < 1 or workers < 1:
+            raise CommandError("--batch-size and --workers must be positive.")
+
+        totals = {"sent": 0, "retried": 0, "failed": 0}
+        try:
+            while True:
+                close_old_connections()
+                counts = deliver_outbox_batch(batch_size=batch_size, workers=workers)
+                for key, value in counts.items():
+                    totals[key] += value
+                if any(counts.values()):
+                    self.stdout.write(
+                        f"Outbox batch: sent={counts['sent']} retried={counts['retried']} failed={counts['failed']}"
+                    )
+                    continue
+                if options["once"]:
+                    break
+                time.sleep(options["poll_seconds"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Outbox emails sent: {totals['sent']} (retried {totals['retried']}, failed {totals['failed']})"
+            )
+        )
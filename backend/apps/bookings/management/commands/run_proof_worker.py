@@ -0,0 +1,53 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from apps.bookings.proofs import process_payment_proof_batch
+
+
+class Command(BaseCommand):
+    help = "Strip metadata from, recompress and thumbnail newly submitted payment proofs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=20, help="Proof jobs claimed per batch.")
+        parser.add_argument("--workers", type=int, default=4, help="Threads decoding and encoding images.")
+        parser.add_argument(
+            "--poll-seconds",
+            type=float,
+            default=getattr(settings, "BOOKING_PROOF_POLL_SECONDS", 2),
+            help="Sleep between polls when no proofs are waiting.",
+        )
+        parser.add_argument("--once", action="store_true", help="Process waiting proofs once and exit.")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        workers = options["workers"]
+        if batch_size < 1 or workers < 1:
+            raise CommandError("--batch-size and --workers must be positive.")
+
+        totals = {"processed": 0, "retried": 0, "failed": 0}
+        try:
+            while True:
+                close_old_connections()
+                counts = process_payment_proof_batch(batch_size=batch_size, workers=workers)
+                for key, value in counts.items():
+                    totals[key] += value
+                if any(counts.values()):
+                    self.stdout.write(
+                        f"Proof batch: processed={counts['processed']} retried={counts['retried']} "
+                        f"failed={counts['failed']}"
+                    )
+                    continue
+                if options["once"]:
+                    break
+                time.sleep(options["poll_seconds"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Payment proofs processed: {totals['processed']} "
+                f"(retried {totals['retried']}, failed {totals['failed']})"
+            )
+        )
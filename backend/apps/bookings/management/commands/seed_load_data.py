@@ -0,0 +1,263 @@
+import math
+import random
+import time as time_module
+import uuid
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.bookings.availability_cache import invalidate_availability, invalidate_availability_catalog
+from apps.bookings.models import Availability, Booking, Staff
+from apps.services.models import Service
+
+LOAD_SERVICE_PREFIX = "Load Test Service"
+LOAD_STAFF_DOMAIN = "@loadtest.doceamor.local"
+DAY_START = time(9, 0)
+DAY_END = time(18, 0)
+DURATIONS = (30, 45, 60, 90)
+
+PAST_STATUS_WEIGHTS = (
+    (Booking.Status.COMPLETED, 70),
+    (Booking.Status.CANCELLED, 20),
+    (Booking.Status.CONFIRMED, 10),
+)
+FUTURE_STATUS_WEIGHTS = (
+    (Booking.Status.AWAITING_PAYMENT, 25),
+    (Booking.Status.PAYMENT_SUBMITTED, 20),
+    (Booking.Status.CONFIRMED, 40),
+    (Booking.Status.CANCELLED, 15),
+)
+FIRST_NAMES = ("Ana", "Bea", "Carla", "Dana", "Elle", "Faye", "Gina", "Hana", "Ivy", "Jo", "Kim", "Lia")
+LAST_NAMES = ("Santos", "Reyes", "Cruz", "Bautista", "Garcia", "Mendoza", "Torres", "Flores", "Ramos")
+
+
+class Command(BaseCommand):
+    help = "Generate deterministic synthetic staff, services, slots and bookings for scale testing."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--staff", type=int, default=50, help="Staff members to create.")
+        parser.add_argument("--services", type=int, default=200, help="Services to create.")
+        parser.add_argument("--slots", type=int, default=2_000_000, help="Availability rows to create.")
+        parser.add_argument("--bookings", type=int, default=1_000_000, help="Bookings to create (at most --slots).")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed; the same seed yields the same data.")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows per bulk_create batch.")
+        parser.add_argument(
+            "--past-fraction",
+            type=float,
+            default=0.5,
+            help="Share of each staff member's schedule that lies before today.",
+        )
+        parser.add_argument(
+            "--flush",
+            action="store_true",
+            help="Delete previously seeded load-test rows before generating new ones.",
+        )
+
+    def handle(self, *args, **options):
+        staff_count = options["staff"]
+        service_count = options["services"]
+        slot_count = options["slots"]
+        booking_count = options["bookings"]
+        batch_size = options["batch_size"]
+        past_fraction = options["past_fraction"]
+        if staff_count < 1 or service_count < 1:
+            raise CommandError("--staff and --services must be positive.")
+        if slot_count < 0 or booking_count < 0:
+            raise CommandError("--slots and --bookings cannot be negative.")
+        if booking_count > slot_count:
+            raise CommandError("--bookings cannot exceed --slots; every booking needs its own slot.")
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive.")
+        if not 0 <= past_fraction <= 1:
+            raise CommandError("--past-fraction must be between 0 and 1.")
+
+        if options["flush"]:
+            self._flush(batch_size)
+        elif (
+            Staff.objects.filter(email__endswith=LOAD_STAFF_DOMAIN).exists()
+            or Service.objects.filter(name__startswith=LOAD_SERVICE_PREFIX).exists()
+        ):
+            raise CommandError("Load-test data already exists. Rerun with --flush to replace it.")
+
+        rng = random.Random(options["seed"])
+        started = time_module.perf_counter()
+        services = self._create_services(rng, service_count)
+        staff_members = self._create_staff(staff_count)
+        slots_created, bookings_created = self._create_slots_and_bookings(
+            rng,
+            services=services,
+            staff_members=staff_members,
+            slot_count=slot_count,
+            booking_count=booking_count,
+            batch_size=batch_size,
+            past_fraction=past_fraction,
+        )
+        invalidate_availability_catalog()
+        invalidate_availability(service_ids=[service.pk for service in services])
+        elapsed = time_module.perf_counter() - started
+        total_rows = len(services) + len(staff_members) + slots_created + bookings_created
+        rate = total_rows / elapsed if elapsed > 0 else 0.0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {len(staff_members)} staff, {len(services)} services, {slots_created} slots and "
+                f"{bookings_created} bookings in {elapsed:.1f}s ({rate:.0f} rows/sec)."
+            )
+        )
+
+    def _flush(self, batch_size: int) -> None:
+        load_staff = Staff.objects.filter(email__endswith=LOAD_STAFF_DOMAIN)
+        # Delete in chunks so the cascade collector never holds the whole table in memory.
+        for model in (Booking, Availability):
+            while True:
+                ids = list(model.objects.filter(staff__in=load_staff).values_list("pk", flat=True)[:batch_size])
+                if not ids:
+                    break
+                model.objects.filter(pk__in=ids).delete()
+        load_staff.delete()
+        Service.objects.filter(name__startswith=LOAD_SERVICE_PREFIX).delete()
+
+    def _create_services(self, rng: random.Random, count: int) -> list[Service]:
+        return Service.objects.bulk_create(
+            [
+                Service(
+                    name=f"{LOAD_SERVICE_PREFIX} {index:04d}",
+                    description="Synthetic service for load testing.",
+                    duration_minutes=rng.choice(DURATIONS),
+                    price=Decimal(rng.randrange(200, 3000, 50)),
+                )
+                for index in range(1, count + 1)
+            ]
+        )
+
+    def _create_staff(self, count: int) -> list[Staff]:
+        return Staff.objects.bulk_create(
+            [
+                Staff(
+                    full_name=f"Load Staff {index:04d}",
+                    email=f"staff{index:04d}{LOAD_STAFF_DOMAIN}",
+                    phone=f"0917{index:07d}",
+                )
+                for index in range(1, count + 1)
+            ]
+        )
+
+    def _create_slots_and_bookings(
+        self,
+        rng: random.Random,
+        *,
+        services: list[Service],
+        staff_members: list[Staff],
+        slot_count: int,
+        booking_count: int,
+        batch_size: int,
+        past_fraction: float,
+    ) -> tuple[int, int]:
+        local_tz = timezone.get_current_timezone()
+        now = timezone.now()
+        average_duration = sum(service.duration_minutes for service in services) / len(services)
+        slots_per_day = max(1, int((DAY_END.hour - DAY_START.hour) * 60 / average_duration))
+        days_per_staff = math.ceil(math.ceil(slot_count / len(staff_members)) / slots_per_day)
+        first_day = timezone.localdate() - timedelta(days=int(days_per_staff * past_fraction))
+
+        def day_bounds(day):
+            return (
+                timezone.make_aware(datetime.combine(day, DAY_START), local_tz),
+                timezone.make_aware(datetime.combine(day, DAY_END), local_tz),
+            )
+
+        cursors = []
+        for _staff in staff_members:
+            start, end = day_bounds(first_day)
+            cursors.append([first_day, start, end])
+
+        timeout_minutes = getattr(settings, "BOOKING_PAYMENT_TIMEOUT_MINUTES", 30)
+        slots_left = slot_count
+        bookings_left = booking_count
+        slots_created = 0
+        bookings_created = 0
+        booking_index = 0
+        while slots_left:
+            size = min(batch_size, slots_left)
+            slots = []
+            for offset in range(size):
+                staff_position = (slots_created + offset) % len(staff_members)
+                cursor = cursors[staff_position]
+                service = rng.choice(services)
+                length = timedelta(minutes=service.duration_minutes)
+                if cursor[1] + length > cursor[2]:
+                    cursor[0] += timedelta(days=1)
+                    cursor[1], cursor[2] = day_bounds(cursor[0])
+                slots.append(
+                    Availability(
+                        staff=staff_members[staff_position],
+                        service=service,
+                        start_time=cursor[1],
+                        end_time=cursor[1] + length,
+                    )
+                )
+                cursor[1] += length
+
+            bookings = []
+            for slot in slots:
+                # Selection sampling: books exactly --bookings slots, spread evenly over the run.
+                if bookings_left and rng.random() * slots_left < bookings_left:
+                    booking_index += 1
+                    bookings.append(self._build_booking(rng, slot, booking_index, now, timeout_minutes))
+                    bookings_left -= 1
+                slots_left -= 1
+
+            with transaction.atomic():
+                Availability.objects.bulk_create(slots)
+                for booking in bookings:
+                    booking.availability_id = booking.availability.pk
+                Booking.objects.bulk_create(bookings)
+            slots_created += len(slots)
+            bookings_created += len(bookings)
+            self.stdout.write(f"  {slots_created}/{slot_count} slots, {bookings_created}/{booking_count} bookings")
+        return slots_created, bookings_created
+
+    def _build_booking(self, rng: random.Random, slot: Availability, index: int, now, timeout_minutes: int):
+        weights = PAST_STATUS_WEIGHTS if slot.start_time <= now else FUTURE_STATUS_WEIGHTS
+        status = rng.choices([status for status, _ in weights], weights=[weight for _, weight in weights])[0]
+        first_name = rng.choice(FIRST_NAMES)
+        last_name = rng.choice(LAST_NAMES)
+        booking = Booking(
+            public_id=uuid.UUID(int=rng.getrandbits(128), version=4),
+            guest_token=uuid.UUID(int=rng.getrandbits(128), version=4),
+            customer_name=f"{first_name} {last_name}",
+            customer_email=f"{first_name}.{last_name}.{index}@example.com".lower(),
+            customer_phone=f"09{rng.randrange(10**9):09d}",
+            service=slot.service,
+            staff=slot.staff,
+            availability=slot,
+            status=status,
+        )
+        slot.is_booked = status != Booking.Status.CANCELLED
+
+        if status == Booking.Status.AWAITING_PAYMENT:
+            # Some deadlines are already past so the expiry job has work to do.
+            booking.payment_expires_at = now + timedelta(minutes=rng.randint(-timeout_minutes, timeout_minutes))
+            return booking
+
+        submitted_at = min(now, slot.start_time) - timedelta(minutes=rng.randint(10, 60 * 24 * 7))
+        booking.payment_expires_at = submitted_at + timedelta(minutes=rng.randint(1, timeout_minutes))
+        if status == Booking.Status.CANCELLED and rng.random() < 0.5:
+            booking.cancel_reason = "Payment window expired."
+            return booking
+
+        booking.payment_method = rng.choice(Booking.PaymentMethod.values)
+        # Index-based references stay unique under uniq_active_payment_reference_per_method.
+        if booking.payment_method == Booking.PaymentMethod.GCASH:
+            booking.payment_reference = f"{9000000000000 + index}"
+        else:
+            booking.payment_reference = f"BDO{index:010d}"
+        booking.payment_submitted_at = submitted_at
+        if status in (Booking.Status.CONFIRMED, Booking.Status.COMPLETED):
+            booking.payment_verified_at = submitted_at + timedelta(minutes=rng.randint(5, 240))
+        elif status == Booking.Status.CANCELLED:
+            booking.cancel_reason = "Customer cancelled."
+        return booking
@@ -0,0 +1,183 @@
+import random
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from apps.bookings.benchmarks.double_booking import (
+    configure_lock_timeout,
+    find_invariant_violations,
+    is_lock_timeout,
+    set_sqlite_journal_mode,
+    uses_in_memory_database,
+)
+from apps.bookings.models import Availability, Booking, Staff
+from apps.bookings.services import create_guest_booking
+from apps.services.models import Service
+
+BARRIER_TIMEOUT_SECONDS = 30
+
+
+class Command(BaseCommand):
+    help = "Race many guests for a few hot slots and verify no slot is ever double-booked."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=32, help="Concurrent guests.")
+        parser.add_argument("--hot-slots", type=int, default=5, help="Slots all guests compete for in each round.")
+        parser.add_argument("--rounds", type=int, default=10, help="Number of rounds with fresh hot slots.")
+        parser.add_argument(
+            "--lock-timeout-ms",
+            type=int,
+            default=2000,
+            help="SQLite busy_timeout or PostgreSQL lock_timeout applied to every guest connection.",
+        )
+        parser.add_argument("--seed", type=int, default=None, help="Seed for the order guests try slots in.")
+
+    def handle(self, *args, **options):
+        threads = options["threads"]
+        hot_slots = options["hot_slots"]
+        rounds = options["rounds"]
+        if threads < 1 or hot_slots < 1 or rounds < 1:
+            raise CommandError("--threads, --hot-slots and --rounds must be positive.")
+        if options["lock_timeout_ms"] < 0:
+            raise CommandError("--lock-timeout-ms cannot be negative.")
+        if uses_in_memory_database():
+            raise CommandError("Guests need a shared database; use file-backed SQLite or PostgreSQL.")
+
+        previous_journal_mode = set_sqlite_journal_mode("WAL")
+        try:
+            self._stress(options)
+        finally:
+            if previous_journal_mode and previous_journal_mode.lower() != "wal":
+                set_sqlite_journal_mode(previous_journal_mode)
+                self.stdout.write(f"SQLite journal_mode restored to {previous_journal_mode}")
+
+    def _stress(self, options) -> None:
+        run_id = uuid.uuid4().hex[:8]
+        service = Service.objects.create(
+            name=f"Stress Service {run_id}",
+            duration_minutes=30,
+            price="0.00",
+            is_active=True,
+        )
+        staff = Staff.objects.create(
+            full_name=f"Stress Staff {run_id}",
+            email=f"stress-{run_id}@example.com",
+            is_active=True,
+        )
+        try:
+            with override_settings(BOOKING_STATUS_EMAIL_ENABLED=False):
+                self._run(service=service, staff=staff, options=options)
+        finally:
+            Booking.objects.filter(staff=staff).delete()
+            Availability.objects.filter(staff=staff).delete()
+            staff.delete()
+            service.delete()
+
+    def _run(self, *, service, staff, options) -> None:
+        threads = options["threads"]
+        rng = random.Random(options["seed"])
+        outcomes = {"attempts": 0, "booked": 0, "rejected": 0, "lock_timeouts": 0, "errors": 0}
+        lock = threading.Lock()
+        failed_rounds: list[str] = []
+        slot_ids: list[int] = []
+        base = timezone.now() + timedelta(days=365)
+        elapsed = 0.0
+
+        for round_index in range(options["rounds"]):
+            round_slots = [
+                Availability.objects.create(
+                    staff=staff,
+                    service=service,
+                    start_time=base + timedelta(minutes=30 * (round_index * options["hot_slots"] + offset)),
+                    end_time=base + timedelta(minutes=30 * (round_index * options["hot_slots"] + offset + 1)),
+                )
+                for offset in range(options["hot_slots"])
+            ]
+            slot_ids.extend(slot.pk for slot in round_slots)
+            slot_orders = [rng.sample(range(len(round_slots)), len(round_slots)) for _ in range(threads)]
+            # A guest that fails before the start line must not leave the others waiting forever.
+            barrier = threading.Barrier(threads, timeout=BARRIER_TIMEOUT_SECONDS)
+            round_errors: list[str] = []
+
+            def guest(guest_index: int, round_errors=round_errors, barrier=barrier) -> None:
+                close_old_connections()
+                try:
+                    try:
+                        configure_lock_timeout(options["lock_timeout_ms"])
+                        slots = Availability.objects.in_bulk([slot.pk for slot in round_slots])
+                        counts = {key: 0 for key in outcomes}
+                    except Exception as exc:
+                        with lock:
+                            round_errors.append(f"guest {guest_index} setup failed: {exc!r}")
+                        barrier.abort()
+                        return
+                    try:
+                        barrier.wait()
+                    except threading.BrokenBarrierError:
+                        with lock:
+                            if not round_errors:
+                                round_errors.append("guests did not reach the start barrier in time")
+                        return
+                    # Each guest wants one slot and falls back to the next hot slot when rejected.
+                    for position in slot_orders[guest_index]:
+                        availability = slots[round_slots[position].pk]
+                        counts["attempts"] += 1
+                        try:
+                            create_guest_booking(
+                                validated_data={
+                                    "customer_name": f"Guest {guest_index}",
+                                    "customer_email": f"guest{guest_index}@example.com",
+                                    "customer_phone": "09170000000",
+                                    "service": service,
+                                    "staff": staff,
+                                    "availability": availability,
+                                }
+                            )
+                            counts["booked"] += 1
+                            break
+                        except ValidationError:
+                            counts["rejected"] += 1
+                        except Exception as exc:
+                            counts["lock_timeouts" if is_lock_timeout(exc) else "errors"] += 1
+                    with lock:
+                        for key, value in counts.items():
+                            outcomes[key] += value
+                finally:
+                    connection.close()
+
+            workers = [threading.Thread(target=guest, args=(index,)) for index in range(threads)]
+            started = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed += time.perf_counter() - started
+            if round_errors:
+                failed_rounds.append(f"round {round_index + 1}: {round_errors[0]}")
+                self.stdout.write(self.style.ERROR(f"Round {round_index + 1} failed: {round_errors[0]}"))
+
+        attempts = outcomes["attempts"] or 1
+        self.stdout.write(
+            f"attempts={outcomes['attempts']} booked={outcomes['booked']} rejected={outcomes['rejected']} "
+            f"lock_timeouts={outcomes['lock_timeouts']} errors={outcomes['errors']}"
+        )
+        self.stdout.write(
+            f"throughput={outcomes['booked'] / elapsed:.1f} bookings/s "
+            f"lock_timeout_rate={outcomes['lock_timeouts'] / attempts:.2%} "
+            f"error_rate={outcomes['errors'] / attempts:.2%}"
+        )
+
+        violations = find_invariant_violations(slot_ids)
+        if violations:
+            raise CommandError("Double-booking invariants violated:\n" + "\n".join(violations))
+        if failed_rounds:
+            summary = f"{len(failed_rounds)} of {options['rounds']} rounds failed:"
+            raise CommandError("\n".join([summary, *failed_rounds]))
+        self.stdout.write(self.style.SUCCESS(f"Invariants hold for {len(slot_ids)} hot slots."))
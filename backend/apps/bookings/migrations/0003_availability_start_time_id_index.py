@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_booking_cancel_reason_booking_customer_phone_and_more'),
+        ('services', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='availability',
+            index=models.Index(fields=['start_time', 'id'], name='bookings_av_start_t_c06afa_idx'),
+        ),
+    ]
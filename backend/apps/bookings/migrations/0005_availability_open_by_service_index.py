@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_email_outbox_message'),
+        ('services', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='availability',
+            index=models.Index(condition=models.Q(('is_booked', False)), fields=['service', 'start_time', 'id'], name='availability_open_by_service'),
+        ),
+    ]
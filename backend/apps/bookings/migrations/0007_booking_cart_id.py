@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0006_idempotency_record'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='cart_id',
+            field=models.UUIDField(blank=True, db_index=True, editable=False, null=True),
+        ),
+    ]
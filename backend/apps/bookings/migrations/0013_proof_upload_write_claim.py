@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 13:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0012_idempotency_lock'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paymentproofupload',
+            name='write_claimed_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
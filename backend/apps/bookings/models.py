@@ -4,6 +4,7 @@ from datetime import timedelta
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import FileExtensionValidator
 from django.db import models
 from django.utils import timezone
@@ -19,9 +20,13 @@ def payment_proof_upload_path(_instance, filename: str) -> str:
 
 
 def validate_payment_proof_file_size(value):
-    max_size = 5 * 1024 * 1024
+    max_size = getattr(settings, "BOOKING_PAYMENT_PROOF_MAX_BYTES", 5 * 1024 * 1024)
     if value.size > max_size:
-        raise ValidationError("Payment proof file must be 5MB or smaller.")
+        if max_size % (1024 * 1024) == 0:
+            limit = f"{max_size // (1024 * 1024)}MB"
+        else:
+            limit = f"{max_size // 1024}KB"
+        raise ValidationError(f"Payment proof file must be {limit} or smaller.")
 
 
 class Staff(models.Model):
@@ -49,6 +54,14 @@ class Availability(models.Model):
 
     class Meta:
         ordering = ["start_time"]
+        indexes = [
+            models.Index(fields=["start_time", "id"]),
+            models.Index(
+                fields=["service", "start_time", "id"],
+                condition=models.Q(is_booked=False),
+                name="availability_open_by_service",
+            ),
+        ]
         constraints = [
             models.CheckConstraint(
                 condition=models.Q(end_time__gt=models.F("start_time")),
@@ -103,13 +116,21 @@ class Booking(models.Model):
             FileExtensionValidator(allowed_extensions=["jpg", "jpeg", "png", "pdf"]),
         ],
     )
+    payment_proof_sha256 = models.CharField(max_length=64, blank=True, default="", db_index=True)
+    payment_proof_thumbnail = models.FileField(null=True, blank=True, editable=False)
+    payment_proof_processed_at = models.DateTimeField(null=True, blank=True)
     payment_notes = models.TextField(blank=True)
     payment_verified_at = models.DateTimeField(null=True, blank=True)
     payment_verified_by = models.ForeignKey(
         User, on_delete=models.SET_NULL, null=True, blank=True, related_name="verified_bookings"
     )
     payment_rejection_reason = models.TextField(blank=True)
+    review_claimed_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="claimed_payment_reviews"
+    )
+    review_claim_expires_at = models.DateTimeField(null=True, blank=True)
     cancel_reason = models.TextField(blank=True)
+    cart_id = models.UUIDField(null=True, blank=True, editable=False, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -118,6 +139,11 @@ class Booking(models.Model):
         indexes = [
             models.Index(fields=["status"]),
             models.Index(fields=["created_at"]),
+            models.Index(
+                fields=["payment_submitted_at", "id"],
+                condition=models.Q(status="payment_submitted"),
+                name="booking_payment_review_queue",
+            ),
         ]
         constraints = [
             models.UniqueConstraint(
@@ -129,7 +155,37 @@ class Booking(models.Model):
             )
         ]
 
+    SLOT_ATTNAMES = ("availability_id", "service_id", "staff_id")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_slot_ids()
+        return instance
+
+    def _remember_slot_ids(self) -> None:
+        self._loaded_slot_ids = {
+            attname: self.__dict__[attname] for attname in self.SLOT_ATTNAMES if attname in self.__dict__
+        }
+
+    def _slot_fields_changed(self, update_fields) -> bool:
+        if update_fields is not None:
+            return any(
+                attname in update_fields or attname.removesuffix("_id") in update_fields
+                for attname in self.SLOT_ATTNAMES
+            )
+        loaded = getattr(self, "_loaded_slot_ids", None)
+        if loaded is None:
+            return True
+        missing = object()
+        return any(
+            attname in self.__dict__ and self.__dict__[attname] != loaded.get(attname, missing)
+            for attname in self.SLOT_ATTNAMES
+        )
+
     def clean(self):
+        if not getattr(self, "_validate_slot", True):
+            return
         if self.availability_id and self.service_id and self.service_id != self.availability.service_id:
             raise ValidationError("Availability service does not match booking service.")
         if self.availability_id and self.staff_id and self.staff_id != self.availability.staff_id:
@@ -150,8 +206,114 @@ class Booking(models.Model):
             self.payment_expires_at = timezone.now() + timedelta(minutes=timeout_minutes)
         if self.customer_email:
             self.customer_email = self.customer_email.lower()
-        self.full_clean()
+
+        # Status transitions only touch a few columns; skip FK, slot and unique
+        # checks (each one a SELECT) for fields that are not being written.
+        update_fields = kwargs.get("update_fields")
+        self._validate_slot = self._slot_fields_changed(update_fields)
+        if update_fields is not None:
+            exclude = {
+                field.name
+                for field in self._meta.concrete_fields
+                if field.name not in update_fields and field.attname not in update_fields
+            }
+        elif not self._validate_slot:
+            exclude = {attname.removesuffix("_id") for attname in self.SLOT_ATTNAMES}
+        else:
+            exclude = None
+        try:
+            self.full_clean(exclude=exclude)
+        finally:
+            del self._validate_slot
         super().save(*args, **kwargs)
+        self._remember_slot_ids()
 
     def __str__(self) -> str:
         return f"{self.customer_name} - {self.service} ({self.status})"
+
+
+class EmailOutboxMessage(models.Model):
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        SENDING = "sending", "Sending"
+        SENT = "sent", "Sent"
+        FAILED = "failed", "Failed"
+
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name="email_outbox")
+    event = models.CharField(max_length=40)
+    booking_status = models.CharField(max_length=24, choices=Booking.Status.choices)
+    recipient = models.EmailField()
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["next_attempt_at", "id"]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.event} -> {self.recipient} ({self.status})"
+
+
+class PaymentProofJob(models.Model):
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        PROCESSING = "processing", "Processing"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name="proof_jobs")
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["next_attempt_at", "id"]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"proof job {self.pk} for booking {self.booking_id} ({self.status})"
+
+
+class PaymentProofUpload(models.Model):
+    upload_id = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name="proof_uploads")
+    file_name = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.PositiveIntegerField()
+    received_bytes = models.PositiveIntegerField(default=0)
+    write_claimed_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self) -> str:
+        return f"{self.upload_id} ({self.received_bytes}/{self.size} bytes)"
+
+
+class IdempotencyRecord(models.Model):
+    scope = models.CharField(max_length=64)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    locked_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["scope", "key"], name="uniq_idempotency_scope_key"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.scope}:{self.key}"
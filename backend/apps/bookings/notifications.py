@@ -1,89 +1,234 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 
 from django.conf import settings
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, get_connection
 from django.db import transaction
+from django.db.models import F
 from django.utils import timezone
 
-from .models import Booking
+from .models import Booking, EmailOutboxMessage
 
 logger = logging.getLogger(__name__)
 
 
-def queue_booking_status_email(*, booking: Booking, event: str) -> None:
-    if not getattr(settings, "BOOKING_STATUS_EMAIL_ENABLED", True):
-        return
-    if not booking.customer_email:
-        return
-
-    booking_id = booking.id
+def _email_enabled() -> bool:
+    return getattr(settings, "BOOKING_STATUS_EMAIL_ENABLED", True)
 
-    def _send_on_commit() -> None:
-        send_booking_status_email(booking_id=booking_id, event=event)
 
-    transaction.on_commit(_send_on_commit)
+def _outbox_message(booking: Booking, event: str) -> EmailOutboxMessage:
+    return EmailOutboxMessage(
+        booking_id=booking.id,
+        event=event,
+        booking_status=booking.status,
+        recipient=booking.customer_email,
+    )
 
 
-def send_booking_status_email(*, booking_id: int, event: str) -> None:
-    try:
-        booking = Booking.objects.select_related("service", "staff", "availability").get(pk=booking_id)
-    except Booking.DoesNotExist:
+def queue_booking_status_email(*, booking: Booking, event: str) -> None:
+    if not _email_enabled():
         return
+    if not booking.customer_email:
+        return
+    _outbox_message(booking, event).save()
 
-    try:
-        status_label = _status_label(booking)
-        slot_start = timezone.localtime(booking.availability.start_time).strftime("%B %d, %Y %I:%M %p")
-        slot_end = timezone.localtime(booking.availability.end_time).strftime("%I:%M %p")
-        lines = [
-            f"Hi {booking.customer_name},",
-            "",
-            f"Your reservation status has been updated: {status_label}",
-            "",
-            f"Booking Ref: {booking.public_id}",
-            f"Service: {booking.service.name}",
-            f"Staff: {booking.staff.full_name}",
-            f"Schedule: {slot_start} - {slot_end}",
-        ]
-
-        if booking.payment_expires_at:
-            expires_text = timezone.localtime(booking.payment_expires_at).strftime("%B %d, %Y %I:%M %p")
-            lines.append(f"Payment Expires At: {expires_text}")
-
-        if event == "payment_rejected" and booking.payment_rejection_reason:
-            lines.extend(
-                [
-                    "",
-                    "Payment Rejection Reason:",
-                    booking.payment_rejection_reason,
-                ]
-            )
 
-        if booking.cancel_reason:
-            lines.extend(
-                [
-                    "",
-                    "Cancellation Reason:",
-                    booking.cancel_reason,
-                ]
-            )
+def queue_booking_status_emails(*, bookings: list[Booking], event: str) -> None:
+    if not _email_enabled():
+        return
+    EmailOutboxMessage.objects.bulk_create(
+        [_outbox_message(booking, event) for booking in bookings if booking.customer_email]
+    )
+
+
+def _booking_lines(booking: Booking) -> list[str]:
+    slot_start = timezone.localtime(booking.availability.start_time).strftime("%B %d, %Y %I:%M %p")
+    slot_end = timezone.localtime(booking.availability.end_time).strftime("%I:%M %p")
+    return [
+        f"Booking Ref: {booking.public_id}",
+        f"Service: {booking.service.name}",
+        f"Staff: {booking.staff.full_name}",
+        f"Schedule: {slot_start} - {slot_end}",
+    ]
+
+
+def build_booking_status_email(*, booking: Booking, event: str) -> EmailMessage:
+    status_label = _status_label(booking)
+    lines = [
+        f"Hi {booking.customer_name},",
+        "",
+        f"Your reservation status has been updated: {status_label}",
+        "",
+    ]
+    subject = f"[Doce Amor] Booking {booking.public_id} - {status_label}"
+    if event == "cart_created" and booking.cart_id:
+        # One message covers every booking made together in the same cart.
+        cart = list(
+            Booking.objects.filter(cart_id=booking.cart_id)
+            .select_related("service", "staff", "availability")
+            .order_by("availability__start_time", "id")
+        )
+        for index, item in enumerate(cart):
+            if index:
+                lines.append("")
+            lines.extend(_booking_lines(item))
+        subject = f"[Doce Amor] {len(cart)} bookings - {status_label}"
+    else:
+        lines.extend(_booking_lines(booking))
+
+    if booking.payment_expires_at:
+        expires_text = timezone.localtime(booking.payment_expires_at).strftime("%B %d, %Y %I:%M %p")
+        lines.append(f"Payment Expires At: {expires_text}")
+
+    if event == "payment_rejected" and booking.payment_rejection_reason:
+        lines.extend(
+            [
+                "",
+                "Payment Rejection Reason:",
+                booking.payment_rejection_reason,
+            ]
+        )
 
+    if booking.cancel_reason:
         lines.extend(
             [
                 "",
-                "If you need help, please contact Doce Amor support.",
+                "Cancellation Reason:",
+                booking.cancel_reason,
             ]
         )
 
-        subject = f"[Doce Amor] Booking {booking.public_id} - {status_label}"
-        send_mail(
-            subject=subject,
-            message="\n".join(lines),
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[booking.customer_email],
-            fail_silently=False,
+    lines.extend(
+        [
+            "",
+            "If you need help, please contact Doce Amor support.",
+        ]
+    )
+
+    return EmailMessage(
+        subject=subject,
+        body="\n".join(lines),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[booking.customer_email],
+    )
+
+
+@transaction.atomic
+def _claim_outbox_batch(*, batch_size: int) -> list[EmailOutboxMessage]:
+    now = timezone.now()
+    lease = timedelta(seconds=getattr(settings, "BOOKING_EMAIL_OUTBOX_LEASE_SECONDS", 300))
+    claimed = list(
+        EmailOutboxMessage.objects.select_for_update(skip_locked=True)
+        .filter(
+            status__in=[EmailOutboxMessage.Status.PENDING, EmailOutboxMessage.Status.SENDING],
+            next_attempt_at__lte=now,
+        )
+        .order_by("next_attempt_at", "id")[:batch_size]
+    )
+    if claimed:
+        EmailOutboxMessage.objects.filter(pk__in=[message.pk for message in claimed]).update(
+            status=EmailOutboxMessage.Status.SENDING,
+            next_attempt_at=now + lease,
+        )
+    return claimed
+
+
+def _send_chunk(chunk: list[tuple[int, EmailMessage]]) -> list[tuple[int, str]]:
+    results = []
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        return [(outbox_id, repr(exc)) for outbox_id, _message in chunk]
+    try:
+        for outbox_id, message in chunk:
+            message.connection = connection
+            try:
+                message.send()
+                results.append((outbox_id, ""))
+            except Exception as exc:
+                results.append((outbox_id, repr(exc)))
+    finally:
+        connection.close()
+    return results
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    base = getattr(settings, "BOOKING_EMAIL_OUTBOX_RETRY_SECONDS", 60)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), 3600))
+
+
+def deliver_outbox_batch(*, batch_size: int = 50, workers: int = 4) -> dict[str, int]:
+    claimed = _claim_outbox_batch(batch_size=batch_size)
+    counts = {"sent": 0, "retried": 0, "failed": 0}
+    if not claimed:
+        return counts
+
+    bookings = Booking.objects.select_related("service", "staff", "availability").in_bulk(
+        [message.booking_id for message in claimed]
+    )
+    errors: dict[int, str] = {}
+    outgoing: list[tuple[int, EmailMessage]] = []
+    for message in claimed:
+        booking = bookings.get(message.booking_id)
+        if booking is None:
+            errors[message.pk] = "Booking not found."
+            continue
+        booking.status = message.booking_status
+        try:
+            outgoing.append((message.pk, build_booking_status_email(booking=booking, event=message.event)))
+        except Exception as exc:
+            errors[message.pk] = repr(exc)
+
+    if outgoing:
+        workers = max(1, min(workers, len(outgoing)))
+        chunks = [outgoing[index::workers] for index in range(workers)]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for results in executor.map(_send_chunk, chunks):
+                for outbox_id, error in results:
+                    if error:
+                        errors[outbox_id] = error
+
+    now = timezone.now()
+    max_attempts = getattr(settings, "BOOKING_EMAIL_OUTBOX_MAX_ATTEMPTS", 5)
+    sent_ids = [message.pk for message in claimed if message.pk not in errors]
+    if sent_ids:
+        EmailOutboxMessage.objects.filter(pk__in=sent_ids).update(
+            status=EmailOutboxMessage.Status.SENT,
+            attempts=F("attempts") + 1,
+            sent_at=now,
+            last_error="",
         )
-    except Exception:
-        logger.exception("Failed sending booking status email. booking_id=%s event=%s", booking_id, event)
+        counts["sent"] = len(sent_ids)
+
+    for message in claimed:
+        error = errors.get(message.pk)
+        if error is None:
+            continue
+        message.attempts += 1
+        message.last_error = error
+        if message.attempts >= max_attempts:
+            message.status = EmailOutboxMessage.Status.FAILED
+            counts["failed"] += 1
+            logger.error(
+                "Giving up on booking status email. booking_id=%s event=%s error=%s",
+                message.booking_id,
+                message.event,
+                error,
+            )
+        else:
+            message.status = EmailOutboxMessage.Status.PENDING
+            message.next_attempt_at = now + _retry_delay(message.attempts)
+            counts["retried"] += 1
+            logger.warning(
+                "Failed sending booking status email, will retry. booking_id=%s event=%s error=%s",
+                message.booking_id,
+                message.event,
+                error,
+            )
+        message.save(update_fields=["status", "attempts", "last_error", "next_attempt_at"])
+    return counts
 
 
 def _status_label(booking: Booking) -> str:
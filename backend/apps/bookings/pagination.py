@@ -0,0 +1,11 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class AvailabilityCursorPagination(CursorPagination):
+    ordering = ("start_time", "id")
+    page_size_query_param = "page_size"
+
+    def __init__(self):
+        self.page_size = getattr(settings, "AVAILABILITY_PAGE_SIZE", 100)
+        self.max_page_size = getattr(settings, "AVAILABILITY_MAX_PAGE_SIZE", 500)
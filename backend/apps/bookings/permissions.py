@@ -5,7 +5,7 @@ from apps.users.roles import is_admin, is_admin_or_operator
 
 class BookingPermission(BasePermission):
     def has_permission(self, request, view):
-        if view.action in {"create", "submit_payment_proof", "cancel", "track_status"}:
+        if view.action in {"create", "cart", "submit_payment_proof", "cancel", "track_status"}:
             return True
         return is_admin_or_operator(request.user)
 
@@ -0,0 +1,128 @@
+import hashlib
+import mimetypes
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.http import parse_etags
+
+from .models import Booking
+
+PROOF_VARIANTS = {"original", "thumbnail"}
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+STREAM_BLOCK_BYTES = 64 * 1024
+
+
+class _RangeReader:
+    # Bounded view over an open storage file. It has no fileno() on purpose, so a
+    # wsgi.file_wrapper streams it through read() instead of sendfile()-ing the whole file.
+    def __init__(self, file, start: int, length: int):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size: int = -1) -> bytes:
+        if self.remaining <= 0:
+            return b""
+        size = self.remaining if size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def proof_field_name(variant: str) -> str:
+    return "payment_proof_thumbnail" if variant == "thumbnail" else "payment_proof_file"
+
+
+def proof_etag(name: str) -> str:
+    # Stored names are content-addressed (sha256/, normalized/ and thumbnails/ are never
+    # rewritten in place), so the name identifies the bytes without reading them.
+    return '"%s"' % hashlib.sha256(name.encode()).hexdigest()[:32]
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    # Only single ranges are honoured; multi-range requests get the whole file, as RFC 9110 allows.
+    match = RANGE_PATTERN.match(header.replace(" ", ""))
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start > end or start >= size:
+        raise ValueError("Unsatisfiable range.")
+    return start, end
+
+
+def _sendfile_response(name: str, storage) -> HttpResponse | None:
+    header = getattr(settings, "BOOKING_PROOF_SENDFILE_HEADER", "")
+    if not header:
+        return None
+    response = HttpResponse()
+    if header.lower() == "x-accel-redirect":
+        prefix = getattr(settings, "BOOKING_PROOF_SENDFILE_PREFIX", "/protected-media/")
+        response[header] = f"{prefix.rstrip('/')}/{name}"
+    else:
+        response[header] = storage.path(name)
+    # Let the web server set the type from its own file lookup.
+    del response["Content-Type"]
+    return response
+
+
+def serve_payment_proof(request, booking: Booking, *, variant: str = "original") -> HttpResponse:
+    field = getattr(booking, proof_field_name(variant))
+    name = field.name
+    etag = proof_etag(name)
+    suffix = "-thumbnail" if variant == "thumbnail" else ""
+    filename = f"payment-proof-{booking.public_id}{suffix}.{name.rsplit('.', 1)[-1]}"
+
+    if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+    if etag in if_none_match or "*" in if_none_match:
+        response = HttpResponse(status=304)
+    else:
+        response = _sendfile_response(name, field.storage)
+        if response is None:
+            response = _stream_proof(request, field, etag)
+            response["Content-Type"] = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        response["Content-Disposition"] = f'inline; filename="{filename}"'
+
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    response["Vary"] = "Authorization, Cookie"
+    response["X-Content-Type-Options"] = "nosniff"
+    return response
+
+
+def _stream_proof(request, field, etag: str) -> HttpResponse:
+    storage = field.storage
+    size = storage.size(field.name)
+    range_header = request.headers.get("Range", "")
+    if_range = request.headers.get("If-Range", "")
+    if range_header and (not if_range or if_range == etag):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+        if byte_range is not None:
+            start, end = byte_range
+            length = end - start + 1
+            response = FileResponse(_RangeReader(storage.open(field.name, "rb"), start, length), status=206)
+            response.block_size = STREAM_BLOCK_BYTES
+            response["Content-Length"] = str(length)
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+            response["Accept-Ranges"] = "bytes"
+            return response
+
+    response = FileResponse(storage.open(field.name, "rb"))
+    response.block_size = STREAM_BLOCK_BYTES
+    response["Content-Length"] = str(size)
+    response["Accept-Ranges"] = "bytes"
+    return response
@@ -0,0 +1,102 @@
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.db.models import Q
+from django.http import UnreadablePostError
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import Booking, PaymentProofUpload
+from .services import submit_payment_proof
+
+READ_CHUNK_BYTES = 64 * 1024
+CHUNK_WRITE_LEASE = timedelta(minutes=5)
+
+
+def _upload_dir() -> Path:
+    configured = getattr(settings, "BOOKING_PROOF_UPLOAD_DIR", "")
+    directory = Path(configured) if configured else Path(tempfile.gettempdir()) / "doceamor-proof-uploads"
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def upload_part_path(upload: PaymentProofUpload) -> Path:
+    return _upload_dir() / f"{upload.upload_id.hex}.part"
+
+
+def start_proof_upload(*, booking: Booking, file_name: str, content_type: str, size: int) -> PaymentProofUpload:
+    if booking.status != Booking.Status.AWAITING_PAYMENT:
+        raise ValidationError("Payment proof can only be submitted for awaiting payment bookings.")
+    if booking.payment_expires_at and timezone.now() > booking.payment_expires_at:
+        raise ValidationError("Payment window has expired.")
+    ttl = timedelta(seconds=getattr(settings, "BOOKING_PROOF_UPLOAD_TTL_SECONDS", 3600))
+    upload = PaymentProofUpload.objects.create(
+        booking=booking,
+        file_name=file_name,
+        content_type=content_type,
+        size=size,
+        expires_at=timezone.now() + ttl,
+    )
+    upload_part_path(upload).touch()
+    return upload
+
+
+def append_proof_chunk(*, upload: PaymentProofUpload, offset: int, stream, length: int) -> bool:
+    if length > upload.size - offset:
+        raise ValidationError("Chunk runs past the declared upload size.")
+    # Claim the offset before touching the part file, so concurrent PUTs for the same offset
+    # cannot interleave their writes; the loser gets False without writing anything.
+    now = timezone.now()
+    claimed_until = now + CHUNK_WRITE_LEASE
+    claimed = (
+        PaymentProofUpload.objects.filter(pk=upload.pk, received_bytes=offset)
+        .filter(Q(write_claimed_until__isnull=True) | Q(write_claimed_until__lte=now))
+        .update(write_claimed_until=claimed_until)
+    )
+    if not claimed:
+        return False
+    written = 0
+    try:
+        with open(upload_part_path(upload), "r+b") as part:
+            part.seek(offset)
+            try:
+                while written < length:
+                    chunk = stream.read(min(READ_CHUNK_BYTES, length - written))
+                    if not chunk:
+                        break
+                    part.write(chunk)
+                    written += len(chunk)
+            except UnreadablePostError:
+                # The connection dropped mid-chunk; keep what arrived so the client resumes from there.
+                pass
+    finally:
+        # Scoped to this claim, so a write that outlived its lease cannot move the offset.
+        advanced = PaymentProofUpload.objects.filter(
+            pk=upload.pk, received_bytes=offset, write_claimed_until=claimed_until
+        ).update(received_bytes=offset + written, write_claimed_until=None)
+    if advanced:
+        upload.received_bytes = offset + written
+    return bool(advanced)
+
+
+def finalize_proof_upload(*, upload: PaymentProofUpload, payload: dict) -> Booking:
+    if upload.received_bytes != upload.size:
+        raise ValidationError(f"Upload is incomplete: {upload.received_bytes} of {upload.size} bytes received.")
+    path = upload_part_path(upload)
+    with open(path, "rb") as part:
+        proof = UploadedFile(part, name=upload.file_name, content_type=upload.content_type or None, size=upload.size)
+        booking = submit_payment_proof(booking=upload.booking, payload={**payload, "payment_proof_file": proof})
+    upload.delete()
+    path.unlink(missing_ok=True)
+    return booking
+
+
+def purge_expired_proof_uploads() -> int:
+    expired = list(PaymentProofUpload.objects.filter(expires_at__lte=timezone.now()))
+    for upload in expired:
+        upload_part_path(upload).unlink(missing_ok=True)
+    PaymentProofUpload.objects.filter(pk__in=[upload.pk for upload in expired]).delete()
+    return len(expired)
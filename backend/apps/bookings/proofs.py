@@ -0,0 +1,309 @@
+import functools
+import io
+import logging
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .models import Booking, PaymentProofJob
+from .uploads import hash_upload, store_payment_proof
+
+logger = logging.getLogger(__name__)
+
+PROOF_IMAGE_EXTENSIONS = {"jpg", "jpeg", "png"}
+PROOF_JOB_LEASE = timedelta(minutes=5)
+
+
+def _proof_storage():
+    return Booking._meta.get_field("payment_proof_file").storage
+
+
+def _extension(name: str) -> str:
+    return name.split(".")[-1].lower()
+
+
+def normalized_proof_name(sha256: str, filename: str) -> str:
+    extension = "png" if _extension(filename) == "png" else "jpg"
+    return f"payment_proofs/normalized/{sha256[:2]}/{sha256}.{extension}"
+
+
+def proof_thumbnail_name(sha256: str) -> str:
+    return f"payment_proofs/thumbnails/{sha256[:2]}/{sha256}.jpg"
+
+
+def attach_payment_proof(booking: Booking, upload) -> None:
+    storage = _proof_storage()
+    sha256 = getattr(upload, "sha256", None) or hash_upload(upload)
+    upload.sha256 = sha256
+    booking.payment_proof_sha256 = sha256
+    booking.payment_proof_thumbnail = None
+    booking.payment_proof_processed_at = None
+
+    if _extension(upload.name) in PROOF_IMAGE_EXTENSIONS:
+        normalized = normalized_proof_name(sha256, upload.name)
+        thumbnail = proof_thumbnail_name(sha256)
+        if storage.exists(normalized) and storage.exists(thumbnail):
+            # Same screenshot was processed before: point at the outputs, no write, no job.
+            booking.payment_proof_file = normalized
+            booking.payment_proof_thumbnail = thumbnail
+            booking.payment_proof_processed_at = timezone.now()
+            return
+    booking.payment_proof_file, _sha256 = store_payment_proof(upload, storage)
+    if _extension(upload.name) not in PROOF_IMAGE_EXTENSIONS:
+        booking.payment_proof_processed_at = timezone.now()
+
+
+def queue_payment_proof_processing(*, booking: Booking) -> None:
+    if booking.payment_proof_processed_at is None:
+        PaymentProofJob.objects.create(booking=booking)
+
+
+def _render_proof(source, *, output_format: str) -> tuple[bytes, bytes]:
+    max_dimension = getattr(settings, "BOOKING_PROOF_MAX_DIMENSION", 2048)
+    thumbnail_size = getattr(settings, "BOOKING_PROOF_THUMBNAIL_SIZE", 320)
+    quality = getattr(settings, "BOOKING_PROOF_JPEG_QUALITY", 75)
+    with Image.open(source) as opened:
+        # Bake the EXIF orientation into the pixels before the metadata is dropped.
+        image = ImageOps.exif_transpose(opened)
+    image.info.clear()
+    image.thumbnail((max_dimension, max_dimension))
+
+    normalized = io.BytesIO()
+    if output_format == "PNG":
+        image.save(normalized, format="PNG", optimize=True)
+    else:
+        image.convert("RGB").save(normalized, format="JPEG", quality=quality, optimize=True, progressive=True)
+
+    preview = image.convert("RGB")
+    preview.thumbnail((thumbnail_size, thumbnail_size))
+    thumbnail = io.BytesIO()
+    preview.save(thumbnail, format="JPEG", quality=quality, optimize=True)
+    return normalized.getvalue(), thumbnail.getvalue()
+
+
+def _process_proof(original: str, sha256: str) -> tuple[str, str]:
+    storage = _proof_storage()
+    normalized = normalized_proof_name(sha256, original)
+    thumbnail = proof_thumbnail_name(sha256)
+    if storage.exists(normalized) and storage.exists(thumbnail):
+        return normalized, thumbnail
+    with storage.open(original, "rb") as source:
+        normalized_bytes, thumbnail_bytes = _render_proof(
+            source, output_format="PNG" if normalized.endswith(".png") else "JPEG"
+        )
+    for name, content in ((normalized, normalized_bytes), (thumbnail, thumbnail_bytes)):
+        if not storage.exists(name):
+            storage.save(name, ContentFile(content))
+    return normalized, thumbnail
+
+
+@transaction.atomic
+def _claim_proof_jobs(*, batch_size: int) -> list[PaymentProofJob]:
+    now = timezone.now()
+    claimed = list(
+        PaymentProofJob.objects.select_for_update(skip_locked=True)
+        .filter(
+            status__in=[PaymentProofJob.Status.PENDING, PaymentProofJob.Status.PROCESSING],
+            next_attempt_at__lte=now,
+        )
+        .order_by("next_attempt_at", "id")[:batch_size]
+    )
+    if claimed:
+        PaymentProofJob.objects.filter(pk__in=[job.pk for job in claimed]).update(
+            status=PaymentProofJob.Status.PROCESSING,
+            next_attempt_at=now + PROOF_JOB_LEASE,
+        )
+    return claimed
+
+
+def _run_proof_task(task: tuple[str, str]) -> tuple[tuple[str, str] | None, str]:
+    original, sha256 = task
+    try:
+        return _process_proof(original, sha256), ""
+    except Exception as exc:
+        return None, repr(exc)
+
+
+def process_payment_proof_batch(*, batch_size: int = 20, workers: int = 4) -> dict[str, int]:
+    claimed = _claim_proof_jobs(batch_size=batch_size)
+    counts = {"processed": 0, "retried": 0, "failed": 0}
+    if not claimed:
+        return counts
+
+    bookings = Booking.objects.only("id", "payment_proof_file", "payment_proof_sha256").in_bulk(
+        [job.booking_id for job in claimed]
+    )
+    done_ids: list[int] = []
+    errors: dict[int, str] = {}
+    # Jobs sharing a stored proof are rendered once.
+    pending: dict[tuple[str, str], list[int]] = {}
+    for job in claimed:
+        booking = bookings.get(job.booking_id)
+        original = booking.payment_proof_file.name if booking else ""
+        # Already processed through another booking with the same proof, or no proof left.
+        if not original or original.startswith("payment_proofs/normalized/"):
+            done_ids.append(job.pk)
+        elif _extension(original) not in PROOF_IMAGE_EXTENSIONS or not booking.payment_proof_sha256:
+            Booking.objects.filter(pk=booking.pk).update(payment_proof_processed_at=timezone.now())
+            done_ids.append(job.pk)
+        else:
+            pending.setdefault((original, booking.payment_proof_sha256), []).append(job.pk)
+
+    # Decoding and recompressing are CPU- and storage-bound; database writes stay on this thread.
+    outputs: dict[str, tuple[str, str]] = {}
+    if pending:
+        tasks = list(pending)
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(tasks)))) as executor:
+            for task, (result, error) in zip(tasks, executor.map(_run_proof_task, tasks)):
+                if error:
+                    errors.update({job_id: error for job_id in pending[task]})
+                else:
+                    outputs[task[0]] = result
+                    done_ids.extend(pending[task])
+
+    storage = _proof_storage()
+    now = timezone.now()
+    for original, (normalized, thumbnail) in outputs.items():
+        Booking.objects.filter(payment_proof_file=original).update(
+            payment_proof_file=normalized,
+            payment_proof_thumbnail=thumbnail,
+            payment_proof_processed_at=now,
+        )
+        if not Booking.objects.filter(payment_proof_file=original).exists():
+            storage.delete(original)
+
+    if done_ids:
+        PaymentProofJob.objects.filter(pk__in=done_ids).update(
+            status=PaymentProofJob.Status.DONE,
+            attempts=F("attempts") + 1,
+            finished_at=now,
+            last_error="",
+        )
+        counts["processed"] = len(done_ids)
+
+    max_attempts = getattr(settings, "BOOKING_PROOF_JOB_MAX_ATTEMPTS", 3)
+    for job in claimed:
+        error = errors.get(job.pk)
+        if error is None:
+            continue
+        job.attempts += 1
+        job.last_error = error
+        if job.attempts >= max_attempts:
+            job.status = PaymentProofJob.Status.FAILED
+            counts["failed"] += 1
+            logger.error("Giving up on payment proof processing. booking_id=%s error=%s", job.booking_id, error)
+        else:
+            job.status = PaymentProofJob.Status.PENDING
+            job.next_attempt_at = now + timedelta(minutes=2 ** (job.attempts - 1))
+            counts["retried"] += 1
+            logger.warning(
+                "Failed processing payment proof, will retry. booking_id=%s error=%s", job.booking_id, error
+            )
+        job.save(update_fields=["status", "attempts", "last_error", "next_attempt_at"])
+    return counts
+
+
+def _proof_references(name: str, *, eligible):
+    references = Booking.objects.filter(Q(payment_proof_file=name) | Q(payment_proof_thumbnail=name))
+    stem = name.rsplit("/", 1)[-1].split(".")[0]
+    if len(stem) == 64 and all(char in "0123456789abcdef" for char in stem):
+        # Content-addressed names embed the hash, which narrows the lookup to the indexed column.
+        references = references.filter(payment_proof_sha256=stem)
+    return references.exclude(pk__in=eligible.values("pk"))
+
+
+def _remove_proof_files(names: list[str], *, eligible, dry_run: bool) -> list[tuple[str, str, int]]:
+    storage = _proof_storage()
+    results = []
+    try:
+        for name in names:
+            # Checked right before the delete: a guest re-submitting the same screenshot reuses this file.
+            if _proof_references(name, eligible=eligible).exists():
+                results.append((name, "shared", 0))
+                continue
+            try:
+                size = storage.size(name)
+            except FileNotFoundError:
+                results.append((name, "missing", 0))
+                continue
+            if not dry_run:
+                storage.delete(name)
+            results.append((name, "removed", size))
+    finally:
+        connection.close()
+    return results
+
+
+def _purge_proof_batch(rows, *, eligible, executor, workers, dry_run, seen, counts, on_file) -> None:
+    booking_ids = [row[0] for row in rows]
+    names = sorted({name for row in rows for name in row[1:] if name} - seen)
+    seen.update(names)
+
+    if not dry_run:
+        # References go first, so an interrupted run leaves orphaned files rather than dangling rows.
+        # The hash goes too, or payment_proof_reused would keep matching a proof that no longer exists.
+        Booking.objects.filter(pk__in=booking_ids).update(
+            payment_proof_file=None, payment_proof_thumbnail=None, payment_proof_sha256=""
+        )
+
+    # One task per worker, so each thread opens and closes a single database connection per batch.
+    slices = [names[index::workers] for index in range(workers) if names[index::workers]]
+    remove = functools.partial(_remove_proof_files, eligible=eligible, dry_run=dry_run)
+    for results in executor.map(remove, slices):
+        for name, outcome, size in results:
+            if outcome == "removed":
+                counts["files"] += 1
+                counts["bytes"] += size
+                if on_file:
+                    on_file(name, size)
+            else:
+                counts[outcome] += 1
+    counts["bookings"] += len(booking_ids)
+
+
+def purge_payment_proofs(
+    *,
+    older_than: timedelta,
+    batch_size: int = 500,
+    workers: int = 8,
+    dry_run: bool = False,
+    on_file: Callable[[str, int], None] | None = None,
+) -> dict[str, int]:
+    cutoff = timezone.now() - older_than
+    # "> ''" skips both NULL and empty file fields.
+    eligible = Booking.objects.filter(
+        Q(payment_proof_file__gt="") | Q(payment_proof_thumbnail__gt=""),
+        status__in=[Booking.Status.COMPLETED, Booking.Status.CANCELLED],
+        updated_at__lt=cutoff,
+    )
+    counts = {"bookings": 0, "files": 0, "shared": 0, "missing": 0, "bytes": 0}
+    seen: set[str] = set()
+    batch: list[tuple[int, str, str]] = []
+    rows = eligible.order_by("pk").values_list("pk", "payment_proof_file", "payment_proof_thumbnail")
+    workers = max(1, workers)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        purge = functools.partial(
+            _purge_proof_batch,
+            eligible=eligible,
+            executor=executor,
+            workers=workers,
+            dry_run=dry_run,
+            seen=seen,
+            counts=counts,
+            on_file=on_file,
+        )
+        for row in rows.iterator(chunk_size=batch_size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                purge(batch)
+                batch.clear()
+        if batch:
+            purge(batch)
+    return counts
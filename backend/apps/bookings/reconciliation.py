@@ -0,0 +1,167 @@
+import csv
+from collections.abc import Iterable, Iterator
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+
+from .models import Booking
+from .services import approve_reconciled_payments
+
+REFERENCE_COLUMNS = {
+    "reference",
+    "reference no",
+    "reference number",
+    "ref no",
+    "ref number",
+    "payment reference",
+    "transaction id",
+}
+METHOD_COLUMNS = {"payment method", "method", "channel"}
+AMOUNT_COLUMNS = {"amount", "credit", "credit amount"}
+METHOD_ALIASES = {
+    "gcash": Booking.PaymentMethod.GCASH,
+    "g-cash": Booking.PaymentMethod.GCASH,
+    "bdo": Booking.PaymentMethod.BDO,
+    "bdo unibank": Booking.PaymentMethod.BDO,
+}
+REPORT_COLUMNS = ["category", "line", "payment_method", "reference", "amount", "reason"]
+
+
+def normalize_reference(value: str) -> str:
+    return "".join(value.split()).upper()
+
+
+def _column_key(name: str) -> str:
+    return " ".join(name.replace("_", " ").replace(".", " ").split()).lower()
+
+
+def _find_column(fieldnames: list[str], aliases: set[str]) -> str | None:
+    for name in fieldnames:
+        if _column_key(name) in aliases:
+            return name
+    return None
+
+
+def decode_statement(upload) -> Iterator[str]:
+    try:
+        for index, line in enumerate(upload):
+            yield line.decode("utf-8-sig" if index == 0 else "utf-8")
+    except UnicodeDecodeError:
+        raise ValidationError("Statement must be a UTF-8 encoded CSV file.")
+
+
+def read_statement(lines: Iterable[str], *, payment_method: str | None = None) -> Iterator[dict]:
+    reader = csv.DictReader(lines)
+    fieldnames = reader.fieldnames or []
+    reference_column = _find_column(fieldnames, REFERENCE_COLUMNS)
+    if reference_column is None:
+        raise ValidationError("Statement has no reference number column.")
+    method_column = _find_column(fieldnames, METHOD_COLUMNS)
+    if method_column is None and payment_method is None:
+        raise ValidationError("Statement has no payment method column; choose the payment method it covers.")
+    amount_column = _find_column(fieldnames, AMOUNT_COLUMNS)
+
+    for row in reader:
+        reference = normalize_reference(row.get(reference_column) or "")
+        if not reference:
+            # Opening/closing balance and fee lines carry no reference.
+            continue
+        entry = {"line": reader.line_num, "payment_method": payment_method, "reference": reference, "amount": None}
+        raw_method = (row.get(method_column) or "").strip() if method_column else ""
+        if raw_method:
+            entry["payment_method"] = METHOD_ALIASES.get(" ".join(raw_method.split()).lower())
+            if entry["payment_method"] is None:
+                entry["error"] = f"Unknown payment method {raw_method!r}."
+        elif entry["payment_method"] is None:
+            entry["error"] = "Missing payment method."
+        raw_amount = (row.get(amount_column) or "").strip() if amount_column else ""
+        if raw_amount:
+            try:
+                entry["amount"] = Decimal(raw_amount.replace(",", "").replace("PHP", "").replace("₱", "").strip())
+            except InvalidOperation:
+                entry["error"] = f"Unreadable amount {raw_amount!r}."
+        yield entry
+
+
+def build_reference_index(*, chunk_size: int = 2000) -> dict[tuple[str, str], list[tuple[int, Decimal]]]:
+    index: dict[tuple[str, str], list[tuple[int, Decimal]]] = {}
+    submitted = Booking.objects.filter(
+        status=Booking.Status.PAYMENT_SUBMITTED,
+        payment_reference__isnull=False,
+    ).values_list("id", "payment_method", "payment_reference", "service__price")
+    for booking_id, method, reference, price in submitted.iterator(chunk_size=chunk_size):
+        index.setdefault((method, normalize_reference(reference)), []).append((booking_id, price))
+    return index
+
+
+def _report_row(entry: dict, reason: str) -> dict:
+    return {
+        "line": entry["line"],
+        "payment_method": entry["payment_method"] or "",
+        "reference": entry["reference"],
+        "amount": "" if entry["amount"] is None else str(entry["amount"]),
+        "reason": reason,
+    }
+
+
+def reconcile_statement(
+    lines: Iterable[str],
+    *,
+    operator=None,
+    payment_method: str | None = None,
+    dry_run: bool = False,
+    batch_size: int | None = None,
+) -> dict:
+    if batch_size is None:
+        batch_size = getattr(settings, "BOOKING_RECONCILE_BATCH_SIZE", 500)
+    index = build_reference_index()
+    report = {"rows": 0, "matched": 0, "approved": 0, "dry_run": dry_run, "unmatched": [], "ambiguous": []}
+    matched_lines: dict[int, int] = {}
+    batch: list[tuple[int, dict]] = []
+
+    def flush() -> None:
+        if dry_run or not batch:
+            batch.clear()
+            return
+        approved = approve_reconciled_payments(
+            booking_ids=[booking_id for booking_id, _entry in batch],
+            operator=operator,
+        )
+        approved_ids = {booking.pk for booking in approved}
+        report["approved"] += len(approved_ids)
+        for booking_id, entry in batch:
+            if booking_id not in approved_ids:
+                report["unmatched"].append(_report_row(entry, "Booking was verified or cancelled during the import."))
+        batch.clear()
+
+    for entry in read_statement(lines, payment_method=payment_method):
+        report["rows"] += 1
+        if entry.get("error"):
+            report["unmatched"].append(_report_row(entry, entry["error"]))
+            continue
+        candidates = index.get((entry["payment_method"], entry["reference"]), [])
+        if not candidates:
+            report["unmatched"].append(_report_row(entry, "No payment-submitted booking has this reference."))
+            continue
+        if len(candidates) > 1:
+            report["ambiguous"].append(
+                _report_row(entry, f"Reference matches {len(candidates)} payment-submitted bookings.")
+            )
+            continue
+        booking_id, price = candidates[0]
+        if booking_id in matched_lines:
+            report["ambiguous"].append(
+                _report_row(entry, f"Reference was already matched on line {matched_lines[booking_id]}.")
+            )
+            continue
+        if entry["amount"] is not None and entry["amount"] != price:
+            report["unmatched"].append(_report_row(entry, f"Amount does not match the service price {price}."))
+            continue
+        matched_lines[booking_id] = entry["line"]
+        report["matched"] += 1
+        batch.append((booking_id, entry))
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    return report
@@ -1,5 +1,11 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django.urls import reverse
 from rest_framework import serializers
 
+from apps.services.models import Service
+
 from .models import Availability, Booking, Staff
 
 
@@ -55,6 +61,51 @@ class AvailabilitySerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "is_booked", "created_at"]
 
 
+class AvailabilityRecurrenceSerializer(serializers.Serializer):
+    staff = serializers.PrimaryKeyRelatedField(queryset=Staff.objects.all(), many=True, allow_empty=False)
+    service = serializers.PrimaryKeyRelatedField(queryset=Service.objects.all())
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    weekdays = serializers.ListField(
+        child=serializers.IntegerField(min_value=0, max_value=6),
+        allow_empty=False,
+        help_text="0 = Monday ... 6 = Sunday",
+    )
+    day_start = serializers.TimeField()
+    day_end = serializers.TimeField()
+
+    def validate(self, attrs):
+        if attrs["end_date"] < attrs["start_date"]:
+            raise serializers.ValidationError({"end_date": "End date must be on or after start date."})
+        max_days = getattr(settings, "AVAILABILITY_BULK_MAX_DAYS", 93)
+        if (attrs["end_date"] - attrs["start_date"]).days + 1 > max_days:
+            raise serializers.ValidationError({"end_date": f"Date range cannot exceed {max_days} days."})
+        if attrs["day_end"] <= attrs["day_start"]:
+            raise serializers.ValidationError({"day_end": "Day end must be after day start."})
+        if not attrs["service"].is_active:
+            raise serializers.ValidationError({"service": "Selected service is inactive."})
+        if attrs["service"].duration_minutes < 1:
+            raise serializers.ValidationError({"service": "Service duration must be at least one minute."})
+        inactive = [staff.pk for staff in attrs["staff"] if not staff.is_active]
+        if inactive:
+            raise serializers.ValidationError({"staff": f"Selected staff is inactive: {inactive}."})
+        attrs["weekdays"] = sorted(set(attrs["weekdays"]))
+        return attrs
+
+
+class NextAvailabilityQuerySerializer(serializers.Serializer):
+    service = serializers.PrimaryKeyRelatedField(queryset=Service.objects.filter(is_active=True))
+    after = serializers.DateTimeField(required=False)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=50, default=5)
+
+
+class AvailabilityConflictSerializer(serializers.Serializer):
+    staff = serializers.IntegerField()
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+    reason = serializers.CharField()
+
+
 class BookingCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Booking
@@ -69,7 +120,28 @@ class BookingCreateSerializer(serializers.ModelSerializer):
         ]
 
 
+class BookingCartSerializer(serializers.Serializer):
+    customer_name = serializers.CharField(max_length=120)
+    customer_email = serializers.EmailField()
+    customer_phone = serializers.CharField(max_length=30)
+    notes = serializers.CharField(required=False, allow_blank=True, default="")
+    availability_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), min_length=1)
+
+    def validate_availability_ids(self, value):
+        max_items = getattr(settings, "BOOKING_CART_MAX_ITEMS", 10)
+        if len(value) > max_items:
+            raise serializers.ValidationError(f"A cart can hold at most {max_items} slots.")
+        if len(set(value)) != len(value):
+            raise serializers.ValidationError("Each slot can only appear once in a cart.")
+        return value
+
+
 class BookingSerializer(serializers.ModelSerializer):
+    # Annotated by BookingViewSet for back-office lists; other responses omit the lookup.
+    payment_proof_reused = serializers.BooleanField(read_only=True, default=False)
+    # Points at the staff-only proof endpoint; /media/ is not served in production.
+    payment_proof_thumbnail = serializers.SerializerMethodField()
+
     class Meta:
         model = Booking
         fields = [
@@ -88,11 +160,17 @@ class BookingSerializer(serializers.ModelSerializer):
             "payment_method",
             "payment_reference",
             "payment_proof_file",
+            "payment_proof_thumbnail",
+            "payment_proof_sha256",
+            "payment_proof_reused",
             "payment_notes",
             "payment_verified_at",
             "payment_verified_by",
             "payment_rejection_reason",
+            "review_claimed_by",
+            "review_claim_expires_at",
             "cancel_reason",
+            "cart_id",
             "created_at",
             "updated_at",
         ]
@@ -101,12 +179,22 @@ class BookingSerializer(serializers.ModelSerializer):
             "public_id",
             "payment_expires_at",
             "payment_submitted_at",
+            "payment_proof_sha256",
             "payment_verified_at",
             "payment_verified_by",
+            "review_claimed_by",
+            "review_claim_expires_at",
             "created_at",
             "updated_at",
         ]
 
+    def get_payment_proof_thumbnail(self, obj) -> str | None:
+        if not obj.payment_proof_thumbnail:
+            return None
+        url = reverse("booking-payment-proof", kwargs={"public_id": obj.public_id}) + "?variant=thumbnail"
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
+
 
 class BookingCreateResponseSerializer(serializers.Serializer):
     public_id = serializers.UUIDField()
@@ -116,6 +204,44 @@ class BookingCreateResponseSerializer(serializers.Serializer):
     payment_methods = serializers.ListField(child=serializers.CharField(), read_only=True)
 
 
+class BookingCartItemSerializer(serializers.Serializer):
+    public_id = serializers.UUIDField()
+    availability = serializers.IntegerField(source="availability_id")
+    service = serializers.IntegerField(source="service_id")
+    staff = serializers.IntegerField(source="staff_id")
+
+
+class BookingCartResponseSerializer(serializers.Serializer):
+    cart_id = serializers.UUIDField()
+    guest_token = serializers.UUIDField()
+    status = serializers.ChoiceField(choices=Booking.Status.choices)
+    payment_expires_at = serializers.DateTimeField()
+    payment_methods = serializers.ListField(child=serializers.CharField(), read_only=True)
+    bookings = BookingCartItemSerializer(many=True)
+
+
+class BookingExportQuerySerializer(serializers.Serializer):
+    # Not "format": DRF reserves that query param for renderer negotiation.
+    output = serializers.ChoiceField(choices=["csv", "ndjson"], default="csv")
+    status = serializers.ChoiceField(choices=Booking.Status.choices, required=False)
+    payment_method = serializers.ChoiceField(choices=Booking.PaymentMethod.choices, required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if attrs.get("date_from") and attrs.get("date_to") and attrs["date_to"] < attrs["date_from"]:
+            raise serializers.ValidationError({"date_to": "End date must be on or after start date."})
+        return attrs
+
+
+def _validate_payment_proof(value) -> None:
+    for validator in Booking._meta.get_field("payment_proof_file").validators:
+        try:
+            validator(value)
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError(exc.messages)
+
+
 class SubmitPaymentProofSerializer(serializers.Serializer):
     customer_email = serializers.EmailField()
     guest_token = serializers.UUIDField()
@@ -124,12 +250,67 @@ class SubmitPaymentProofSerializer(serializers.Serializer):
     payment_proof_file = serializers.FileField()
     payment_notes = serializers.CharField(required=False, allow_blank=True)
 
+    def validate_payment_proof_file(self, value):
+        _validate_payment_proof(value)
+        return value
+
+
+class ProofUploadStartSerializer(serializers.Serializer):
+    customer_email = serializers.EmailField()
+    guest_token = serializers.UUIDField()
+    file_name = serializers.CharField(max_length=255)
+    content_type = serializers.CharField(max_length=100, required=False, allow_blank=True, default="")
+    size = serializers.IntegerField(min_value=1)
+
+    def validate(self, attrs):
+        try:
+            _validate_payment_proof(UploadedFile(None, name=attrs["file_name"], size=attrs["size"]))
+        except serializers.ValidationError as exc:
+            raise serializers.ValidationError({"file_name": exc.detail})
+        return attrs
+
+
+class ProofUploadFinalizeSerializer(serializers.Serializer):
+    customer_email = serializers.EmailField()
+    guest_token = serializers.UUIDField()
+    payment_method = serializers.ChoiceField(choices=Booking.PaymentMethod.choices)
+    payment_reference = serializers.CharField(max_length=120)
+    payment_notes = serializers.CharField(required=False, allow_blank=True)
+
 
 class VerifyPaymentSerializer(serializers.Serializer):
     approved = serializers.BooleanField()
     admin_note = serializers.CharField(required=False, allow_blank=True)
 
 
+class PaymentReconciliationSerializer(serializers.Serializer):
+    statement = serializers.FileField()
+    payment_method = serializers.ChoiceField(choices=Booking.PaymentMethod.choices, required=False)
+    dry_run = serializers.BooleanField(required=False, default=False)
+
+
+class PaymentReviewClaimSerializer(serializers.Serializer):
+    limit = serializers.IntegerField(required=False, min_value=1, default=10)
+
+    def validate_limit(self, value):
+        max_claim = getattr(settings, "BOOKING_REVIEW_CLAIM_MAX", 50)
+        if value > max_claim:
+            raise serializers.ValidationError(f"Ensure this value is less than or equal to {max_claim}.")
+        return value
+
+
+class BulkVerifyPaymentSerializer(serializers.Serializer):
+    public_ids = serializers.ListField(child=serializers.UUIDField(), min_length=1)
+    approved = serializers.BooleanField()
+    admin_note = serializers.CharField(required=False, allow_blank=True, default="")
+
+    def validate_public_ids(self, value):
+        max_claim = getattr(settings, "BOOKING_REVIEW_CLAIM_MAX", 50)
+        if len(value) > max_claim:
+            raise serializers.ValidationError(f"Verify at most {max_claim} bookings at once.")
+        return list(dict.fromkeys(value))
+
+
 class CancelBookingSerializer(serializers.Serializer):
     customer_email = serializers.EmailField(required=False)
     guest_token = serializers.UUIDField(required=False)
@@ -1,12 +1,16 @@
-from datetime import timedelta
+import uuid
+from datetime import date, datetime, time, timedelta
 
 from django.conf import settings
-from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 
-from .models import Availability, Booking
-from .notifications import queue_booking_status_email
+from .availability_cache import invalidate_availability
+from .instrumentation import instrumented_atomic, lock_wait
+from .models import Availability, Booking, Staff
+from .notifications import queue_booking_status_email, queue_booking_status_emails
+from .proofs import attach_payment_proof, queue_payment_proof_processing
 
 
 def _ensure_cancellable_before_start(booking: Booking) -> None:
@@ -18,28 +22,42 @@ def _release_slot(availability: Availability) -> None:
     if availability.is_booked:
         availability.is_booked = False
         availability.save(update_fields=["is_booked"])
+        invalidate_availability(service_ids=[availability.service_id])
 
 
-@transaction.atomic
+def _claim_slot(availability_id: int) -> bool:
+    claimed = Availability.objects.filter(
+        pk=availability_id,
+        is_booked=False,
+        start_time__gt=timezone.now(),
+    ).update(is_booked=True)
+    return claimed == 1
+
+
+@instrumented_atomic("create_guest_booking")
 def create_guest_booking(*, validated_data: dict) -> Booking:
-    availability = (
-        Availability.objects.select_related("service", "staff")
-        .select_for_update()
-        .get(pk=validated_data["availability"].pk)
-    )
-    if availability.is_booked:
-        raise ValidationError({"availability": "This slot is already booked."})
-    if availability.start_time <= timezone.now():
-        raise ValidationError({"availability": "Cannot book a past slot."})
-    if not availability.service.is_active:
-        raise ValidationError({"service": "Selected service is not active."})
-    if not availability.staff.is_active:
-        raise ValidationError({"staff": "Selected staff is not active."})
+    availability = validated_data["availability"]
+    service = validated_data["service"]
+    staff = validated_data["staff"]
 
-    if validated_data["service"].pk != availability.service_id:
+    if service.pk != availability.service_id:
         raise ValidationError({"service": "Service does not match selected availability slot."})
-    if validated_data["staff"].pk != availability.staff_id:
+    if staff.pk != availability.staff_id:
         raise ValidationError({"staff": "Staff does not match selected availability slot."})
+    if not service.is_active:
+        raise ValidationError({"service": "Selected service is not active."})
+    if not staff.is_active:
+        raise ValidationError({"staff": "Selected staff is not active."})
+
+    with lock_wait():
+        claimed = _claim_slot(availability.pk)
+    if not claimed:
+        current = Availability.objects.only("is_booked", "start_time").get(pk=availability.pk)
+        if current.is_booked:
+            raise ValidationError({"availability": "This slot is already booked."})
+        raise ValidationError({"availability": "Cannot book a past slot."})
+    availability.is_booked = True
+    invalidate_availability(service_ids=[availability.service_id])
 
     booking = Booking.objects.create(
         **validated_data,
@@ -47,15 +65,166 @@ def create_guest_booking(*, validated_data: dict) -> Booking:
         payment_expires_at=timezone.now()
         + timedelta(minutes=getattr(settings, "BOOKING_PAYMENT_TIMEOUT_MINUTES", 30)),
     )
-    availability.is_booked = True
-    availability.save(update_fields=["is_booked"])
     queue_booking_status_email(booking=booking, event="created")
     return booking
 
 
-@transaction.atomic
+@instrumented_atomic("create_guest_cart_booking")
+def create_guest_cart_booking(*, customer: dict, availability_ids: list[int]) -> list[Booking]:
+    slot_ids = sorted(availability_ids)
+    # Lock in primary-key order so carts sharing slots queue behind each other instead of deadlocking.
+    with lock_wait():
+        slots = list(
+            Availability.objects.select_for_update(of=("self",))
+            .select_related("service", "staff")
+            .filter(pk__in=slot_ids)
+            .order_by("pk")
+        )
+    missing = sorted(set(slot_ids) - {slot.pk for slot in slots})
+    if missing:
+        raise ValidationError({"availability_ids": f"Unknown availability slots: {missing}."})
+
+    now = timezone.now()
+    errors = {}
+    for slot in slots:
+        if slot.is_booked:
+            errors[str(slot.pk)] = "This slot is already booked."
+        elif slot.start_time <= now:
+            errors[str(slot.pk)] = "Cannot book a past slot."
+        elif not slot.service.is_active:
+            errors[str(slot.pk)] = "Selected service is not active."
+        elif not slot.staff.is_active:
+            errors[str(slot.pk)] = "Selected staff is not active."
+    if errors:
+        raise ValidationError({"availability_ids": errors})
+
+    Availability.objects.filter(pk__in=slot_ids).update(is_booked=True)
+    invalidate_availability(service_ids=[slot.service_id for slot in slots])
+
+    cart_id = uuid.uuid4()
+    guest_token = uuid.uuid4()
+    payment_expires_at = now + timedelta(minutes=getattr(settings, "BOOKING_PAYMENT_TIMEOUT_MINUTES", 30))
+    bookings = Booking.objects.bulk_create(
+        [
+            Booking(
+                customer_name=customer["customer_name"],
+                customer_email=customer["customer_email"].lower(),
+                customer_phone=customer["customer_phone"],
+                notes=customer.get("notes", ""),
+                service=slot.service,
+                staff=slot.staff,
+                availability=slot,
+                status=Booking.Status.AWAITING_PAYMENT,
+                payment_expires_at=payment_expires_at,
+                cart_id=cart_id,
+                guest_token=guest_token,
+            )
+            for slot in slots
+        ]
+    )
+    for slot in slots:
+        slot.is_booked = True
+    queue_booking_status_email(booking=bookings[0], event="cart_created")
+    return bookings
+
+
+def _recurring_slots(*, service, start_date: date, end_date: date, weekdays, day_start: time, day_end: time):
+    if service.duration_minutes < 1:
+        # A zero-length slot never advances the cursor below.
+        raise ValidationError({"service": "Service duration must be at least one minute."})
+    local_tz = timezone.get_current_timezone()
+    slot_length = timedelta(minutes=service.duration_minutes)
+    current = start_date
+    while current <= end_date:
+        if current.weekday() in weekdays:
+            slot_start = timezone.make_aware(datetime.combine(current, day_start), local_tz)
+            window_end = timezone.make_aware(datetime.combine(current, day_end), local_tz)
+            while slot_start + slot_length <= window_end:
+                yield slot_start, slot_start + slot_length
+                slot_start += slot_length
+        current += timedelta(days=1)
+
+
+@instrumented_atomic("generate_recurring_availability")
+def generate_recurring_availability(
+    *,
+    staff_members: list[Staff],
+    service,
+    start_date: date,
+    end_date: date,
+    weekdays: list[int],
+    day_start: time,
+    day_end: time,
+) -> tuple[list[Availability], list[dict]]:
+    candidates = list(
+        _recurring_slots(
+            service=service,
+            start_date=start_date,
+            end_date=end_date,
+            weekdays=set(weekdays),
+            day_start=day_start,
+            day_end=day_end,
+        )
+    )
+    if not candidates:
+        return [], []
+
+    staff_ids = [staff.pk for staff in staff_members]
+    # Serialize publishing per staff so two bulk runs cannot interleave overlapping slots.
+    with lock_wait():
+        list(Staff.objects.select_for_update().filter(pk__in=staff_ids).values_list("pk", flat=True))
+    existing_by_staff: dict[int, list[tuple[datetime, datetime]]] = {staff_id: [] for staff_id in staff_ids}
+    existing = (
+        Availability.objects.filter(
+            staff_id__in=staff_ids,
+            start_time__lt=candidates[-1][1],
+            end_time__gt=candidates[0][0],
+        )
+        .order_by("staff_id", "start_time")
+        .values_list("staff_id", "start_time", "end_time")
+    )
+    for staff_id, existing_start, existing_end in existing:
+        existing_by_staff[staff_id].append((existing_start, existing_end))
+
+    now = timezone.now()
+    to_create: list[Availability] = []
+    conflicts: list[dict] = []
+    for staff_id in staff_ids:
+        intervals = existing_by_staff[staff_id]
+        index = 0
+        blocked_until = None
+        for slot_start, slot_end in candidates:
+            # Both lists are sorted by start; advance past intervals that start
+            # before this slot ends, tracking the furthest end seen so far.
+            while index < len(intervals) and intervals[index][0] < slot_end:
+                interval_end = intervals[index][1]
+                if blocked_until is None or interval_end > blocked_until:
+                    blocked_until = interval_end
+                index += 1
+            reason = None
+            if slot_start <= now:
+                reason = "Slot start time is in the past."
+            elif blocked_until is not None and blocked_until > slot_start:
+                reason = "Staff has overlapping availability in this time range."
+            if reason:
+                conflicts.append(
+                    {"staff": staff_id, "start_time": slot_start, "end_time": slot_end, "reason": reason}
+                )
+                continue
+            to_create.append(
+                Availability(staff_id=staff_id, service=service, start_time=slot_start, end_time=slot_end)
+            )
+
+    created = Availability.objects.bulk_create(to_create)
+    if created:
+        invalidate_availability(service_ids=[service.pk])
+    return created, conflicts
+
+
+@instrumented_atomic("submit_payment_proof")
 def submit_payment_proof(*, booking: Booking, payload: dict) -> Booking:
-    locked_booking = Booking.objects.select_for_update().get(pk=booking.pk)
+    with lock_wait():
+        locked_booking = Booking.objects.select_for_update().get(pk=booking.pk)
     if locked_booking.status != Booking.Status.AWAITING_PAYMENT:
         raise ValidationError("Payment proof can only be submitted for awaiting payment bookings.")
     if locked_booking.payment_expires_at and timezone.now() > locked_booking.payment_expires_at:
@@ -68,21 +237,28 @@ def submit_payment_proof(*, booking: Booking, payload: dict) -> Booking:
     locked_booking.status = Booking.Status.PAYMENT_SUBMITTED
     locked_booking.payment_method = payload["payment_method"]
     locked_booking.payment_reference = payload["payment_reference"]
-    locked_booking.payment_proof_file = payload["payment_proof_file"]
+    # Proofs are stored under their SHA-256, so a re-uploaded screenshot reuses the existing file.
+    attach_payment_proof(locked_booking, payload["payment_proof_file"])
     locked_booking.payment_notes = payload.get("payment_notes", "")
     locked_booking.payment_submitted_at = timezone.now()
     locked_booking.payment_rejection_reason = ""
+    locked_booking.review_claimed_by = None
+    locked_booking.review_claim_expires_at = None
     locked_booking.save()
+    queue_payment_proof_processing(booking=locked_booking)
     queue_booking_status_email(booking=locked_booking, event="payment_submitted")
     return locked_booking
 
 
-@transaction.atomic
+@instrumented_atomic("verify_payment")
 def verify_payment(*, booking: Booking, approved: bool, admin_user, admin_note: str = "") -> Booking:
-    locked_booking = Booking.objects.select_for_update().get(pk=booking.pk)
+    with lock_wait():
+        locked_booking = Booking.objects.select_for_update().get(pk=booking.pk)
     if locked_booking.status != Booking.Status.PAYMENT_SUBMITTED:
         raise ValidationError("Only payment-submitted bookings can be verified.")
 
+    locked_booking.review_claimed_by = None
+    locked_booking.review_claim_expires_at = None
     if approved:
         locked_booking.status = Booking.Status.CONFIRMED
         locked_booking.payment_verified_by = admin_user
@@ -106,9 +282,120 @@ def verify_payment(*, booking: Booking, approved: bool, admin_user, admin_note:
     return locked_booking
 
 
-@transaction.atomic
+@instrumented_atomic("claim_payment_reviews")
+def claim_payment_reviews(*, operator, limit: int) -> list[Booking]:
+    now = timezone.now()
+    lease_expires_at = now + timedelta(seconds=getattr(settings, "BOOKING_REVIEW_LEASE_SECONDS", 600))
+    # SKIP LOCKED lets concurrent reviewers each take the next free rows instead of
+    # queueing on the same ones; the lease hides claimed rows once the lock is released.
+    with lock_wait():
+        claimed = list(
+            Booking.objects.select_for_update(skip_locked=True)
+            .filter(status=Booking.Status.PAYMENT_SUBMITTED)
+            .filter(
+                Q(review_claim_expires_at__isnull=True)
+                | Q(review_claim_expires_at__lte=now)
+                | Q(review_claimed_by=operator)
+            )
+            .order_by("payment_submitted_at", "id")[:limit]
+        )
+    if claimed:
+        Booking.objects.filter(pk__in=[booking.pk for booking in claimed]).update(
+            review_claimed_by=operator,
+            review_claim_expires_at=lease_expires_at,
+        )
+    for booking in claimed:
+        booking.review_claimed_by = operator
+        booking.review_claim_expires_at = lease_expires_at
+    return claimed
+
+
+def _approve_locked_payments(bookings: list[Booking], *, operator, admin_note: str, now) -> None:
+    changes = {
+        "status": Booking.Status.CONFIRMED,
+        "payment_verified_by": operator,
+        "payment_verified_at": now,
+        "review_claimed_by": None,
+        "review_claim_expires_at": None,
+        "updated_at": now,
+    }
+    if admin_note:
+        changes["payment_notes"] = admin_note
+    Booking.objects.filter(pk__in=[booking.pk for booking in bookings]).update(**changes)
+    for booking in bookings:
+        booking.status = Booking.Status.CONFIRMED
+    queue_booking_status_emails(bookings=bookings, event="payment_approved")
+
+
+@instrumented_atomic("verify_claimed_payments")
+def verify_claimed_payments(*, operator, public_ids: list, approved: bool, admin_note: str = "") -> list[Booking]:
+    now = timezone.now()
+    with lock_wait():
+        bookings = list(
+            Booking.objects.select_for_update()
+            .filter(
+                public_id__in=public_ids,
+                status=Booking.Status.PAYMENT_SUBMITTED,
+                review_claimed_by=operator,
+                review_claim_expires_at__gt=now,
+            )
+            .order_by("pk")
+        )
+    found = {str(booking.public_id) for booking in bookings}
+    unclaimed = sorted({str(public_id) for public_id in public_ids} - found)
+    if unclaimed:
+        raise ValidationError(
+            {"public_ids": f"Not payment-submitted bookings under your active claim: {', '.join(unclaimed)}."}
+        )
+
+    if approved:
+        _approve_locked_payments(bookings, operator=operator, admin_note=admin_note, now=now)
+        return bookings
+
+    claim_cleared = {"review_claimed_by": None, "review_claim_expires_at": None, "updated_at": now}
+    expired, rejected = [], []
+    for booking in bookings:
+        window_closed = booking.payment_expires_at and booking.payment_expires_at < now
+        (expired if window_closed else rejected).append(booking)
+    if expired:
+        Booking.objects.filter(pk__in=[booking.pk for booking in expired]).update(
+            status=Booking.Status.CANCELLED, payment_rejection_reason=admin_note, **claim_cleared
+        )
+        Availability.objects.filter(pk__in=[booking.availability_id for booking in expired], is_booked=True).update(
+            is_booked=False
+        )
+        invalidate_availability(service_ids=[booking.service_id for booking in expired])
+        for booking in expired:
+            booking.status = Booking.Status.CANCELLED
+        queue_booking_status_emails(bookings=expired, event="payment_rejected_expired")
+    if rejected:
+        Booking.objects.filter(pk__in=[booking.pk for booking in rejected]).update(
+            status=Booking.Status.AWAITING_PAYMENT, payment_rejection_reason=admin_note, **claim_cleared
+        )
+        for booking in rejected:
+            booking.status = Booking.Status.AWAITING_PAYMENT
+        queue_booking_status_emails(bookings=rejected, event="payment_rejected")
+    return bookings
+
+
+@instrumented_atomic("approve_reconciled_payments")
+def approve_reconciled_payments(*, booking_ids: list[int], operator=None, admin_note: str = "") -> list[Booking]:
+    # Bookings verified, rejected or cancelled since the statement index was built are skipped.
+    with lock_wait():
+        bookings = list(
+            Booking.objects.select_for_update()
+            .filter(pk__in=booking_ids, status=Booking.Status.PAYMENT_SUBMITTED)
+            .order_by("pk")
+        )
+    if bookings:
+        _approve_locked_payments(bookings, operator=operator, admin_note=admin_note, now=timezone.now())
+    return bookings
+
+
+@instrumented_atomic("cancel_booking")
 def cancel_booking(*, booking: Booking, reason: str = "") -> Booking:
-    locked_booking = Booking.objects.select_for_update().select_related("availability").get(pk=booking.pk)
+    with lock_wait():
+        locked_booking = Booking.objects.select_for_update().select_related("availability").get(pk=booking.pk)
     if locked_booking.status == Booking.Status.COMPLETED:
         raise ValidationError("Completed bookings cannot be cancelled.")
     if locked_booking.status == Booking.Status.CANCELLED:
@@ -123,9 +410,10 @@ def cancel_booking(*, booking: Booking, reason: str = "") -> Booking:
     return locked_booking
 
 
-@transaction.atomic
+@instrumented_atomic("complete_booking")
 def complete_booking(*, booking: Booking) -> Booking:
-    locked_booking = Booking.objects.select_for_update().get(pk=booking.pk)
+    with lock_wait():
+        locked_booking = Booking.objects.select_for_update().get(pk=booking.pk)
     if locked_booking.status != Booking.Status.CONFIRMED:
         raise ValidationError("Only confirmed bookings can be marked completed.")
     locked_booking.status = Booking.Status.COMPLETED
@@ -134,19 +422,46 @@ def complete_booking(*, booking: Booking) -> Booking:
     return locked_booking
 
 
-@transaction.atomic
-def expire_unpaid_bookings() -> int:
-    now = timezone.now()
-    expired = (
-        Booking.objects.select_for_update()
-        .select_related("availability")
-        .filter(status=Booking.Status.AWAITING_PAYMENT, payment_expires_at__lte=now)
+@instrumented_atomic("expire_unpaid_bookings")
+def _expire_unpaid_batch(*, now, batch_size: int) -> int:
+    with lock_wait():
+        expired = list(
+            Booking.objects.select_for_update(skip_locked=True)
+            .filter(status=Booking.Status.AWAITING_PAYMENT, payment_expires_at__lte=now)
+            .order_by("payment_expires_at", "id")
+            .only("id", "availability_id", "service_id", "customer_email")[:batch_size]
+        )
+    if not expired:
+        return 0
+
+    booking_ids = [booking.id for booking in expired]
+    Booking.objects.filter(pk__in=booking_ids, status=Booking.Status.AWAITING_PAYMENT).update(
+        status=Booking.Status.CANCELLED,
+        updated_at=timezone.now(),
     )
-    count = 0
+    Availability.objects.filter(
+        pk__in=[booking.availability_id for booking in expired],
+        is_booked=True,
+    ).update(is_booked=False)
+    invalidate_availability(service_ids=[booking.service_id for booking in expired])
     for booking in expired:
         booking.status = Booking.Status.CANCELLED
-        booking.save(update_fields=["status", "updated_at"])
-        _release_slot(booking.availability)
-        queue_booking_status_email(booking=booking, event="expired_job")
-        count += 1
+    queue_booking_status_emails(bookings=expired, event="expired_job")
+    return len(expired)
+
+
+def expire_unpaid_bookings(*, batch_size: int | None = None, max_batches: int | None = None) -> int:
+    if batch_size is None:
+        batch_size = getattr(settings, "BOOKING_EXPIRY_BATCH_SIZE", 500)
+    now = timezone.now()
+    count = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        processed = _expire_unpaid_batch(now=now, batch_size=batch_size)
+        if not processed:
+            break
+        count += processed
+        batches += 1
+        if processed < batch_size:
+            break
     return count
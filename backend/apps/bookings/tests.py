@@ -1,13 +1,62 @@
-from datetime import datetime, timedelta
+import csv
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from datetime import date, datetime, time, timedelta
+from io import StringIO
+from unittest import mock
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.base import ContentFile
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import OperationalError
+from django.test import override_settings
 from django.utils import timezone
+from PIL import Image
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APITestCase, APITransactionTestCase
 
-from apps.bookings.models import Availability, Booking, Staff
+from apps.bookings.benchmarks.double_booking import find_invariant_violations, is_lock_timeout
+from apps.bookings.benchmarks.endpoints import SCENARIOS
+from apps.bookings.expiry import PaymentExpiryScheduler
+from apps.bookings.instrumentation import (
+    workflow_commit_seconds,
+    workflow_lock_wait_seconds,
+    workflow_total,
+    workflow_transaction_seconds,
+)
+from apps.bookings.notifications import deliver_outbox_batch
+from apps.bookings.models import (
+    Availability,
+    Booking,
+    EmailOutboxMessage,
+    IdempotencyRecord,
+    PaymentProofJob,
+    PaymentProofUpload,
+    Staff,
+)
+from apps.bookings.proofs import _proof_references, process_payment_proof_batch, purge_payment_proofs
+from apps.bookings.services import (
+    cancel_booking,
+    complete_booking,
+    expire_unpaid_bookings,
+    generate_recurring_availability,
+    submit_payment_proof,
+    verify_payment,
+)
+from apps.bookings.uploads import store_payment_proof
+from apps.metrics.registry import registry
 from apps.services.models import Service
 from apps.users.roles import ROLE_ADMIN, ROLE_OPERATOR
 
@@ -65,6 +114,697 @@ class BookingFlowTests(APITestCase):
         self.availability.refresh_from_db()
         self.assertTrue(self.availability.is_booked)
 
+    def _booking_payload(self, **overrides):
+        payload = {
+            "customer_name": "Guest",
+            "customer_email": "guest@example.com",
+            "customer_phone": "09171234567",
+            "notes": "N/A",
+            "service": self.service.id,
+            "staff": self.staff.id,
+            "availability": self.availability.id,
+        }
+        payload.update(overrides)
+        return payload
+
+    def test_second_guest_cannot_claim_booked_slot(self):
+        first = self.client.post("/api/bookings/", data=self._booking_payload(), format="json")
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+
+        second = self.client.post(
+            "/api/bookings/",
+            data=self._booking_payload(customer_email="other@example.com"),
+            format="json",
+        )
+        self.assertEqual(second.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("availability", second.data)
+        self.assertEqual(Booking.objects.filter(availability=self.availability).count(), 1)
+
+    def test_past_slot_cannot_be_claimed(self):
+        past = Availability.objects.create(
+            staff=self.staff,
+            service=self.service,
+            start_time=timezone.now() - timedelta(hours=2),
+            end_time=timezone.now() - timedelta(hours=1),
+        )
+
+        response = self.client.post("/api/bookings/", data=self._booking_payload(availability=past.id), format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        past.refresh_from_db()
+        self.assertFalse(past.is_booked)
+
+    def test_mismatched_service_does_not_claim_slot(self):
+        other_service = Service.objects.create(name="Other", duration_minutes=30, price="100.00")
+
+        response = self.client.post(
+            "/api/bookings/",
+            data=self._booking_payload(service=other_service.id),
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.availability.refresh_from_db()
+        self.assertFalse(self.availability.is_booked)
+
+    def test_booking_create_replays_response_for_repeated_idempotency_key(self):
+        first = self.client.post(
+            "/api/bookings/", data=self._booking_payload(), format="json", HTTP_IDEMPOTENCY_KEY="retry-1"
+        )
+        with self.assertNumQueries(1):
+            retry = self.client.post(
+                "/api/bookings/", data=self._booking_payload(), format="json", HTTP_IDEMPOTENCY_KEY="retry-1"
+            )
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.json()["public_id"], str(first.data["public_id"]))
+        self.assertEqual(retry.json()["guest_token"], str(first.data["guest_token"]))
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertEqual(EmailOutboxMessage.objects.count(), 1)
+
+    def test_idempotency_key_reused_with_different_payload_is_rejected(self):
+        self.client.post("/api/bookings/", data=self._booking_payload(), format="json", HTTP_IDEMPOTENCY_KEY="k-1")
+
+        response = self.client.post(
+            "/api/bookings/",
+            data=self._booking_payload(customer_name="Someone Else"),
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="k-1",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_abandoned_in_progress_idempotency_key_can_be_retried(self):
+        # A killed worker never reaches the code that stores or releases the key.
+        with (
+            mock.patch("apps.bookings.views.create_guest_booking", side_effect=SystemExit),
+            self.assertRaises(SystemExit),
+        ):
+            self.client.post(
+                "/api/bookings/", data=self._booking_payload(), format="json", HTTP_IDEMPOTENCY_KEY="crashed-1"
+            )
+        record = IdempotencyRecord.objects.get(key="crashed-1")
+        self.assertIsNone(record.response_status)
+
+        in_progress = self.client.post(
+            "/api/bookings/", data=self._booking_payload(), format="json", HTTP_IDEMPOTENCY_KEY="crashed-1"
+        )
+        self.assertEqual(in_progress.status_code, status.HTTP_409_CONFLICT)
+
+        IdempotencyRecord.objects.filter(pk=record.pk).update(locked_at=timezone.now() - timedelta(minutes=5))
+        # Taking over an abandoned key still requires the same request.
+        mismatch = self.client.post(
+            "/api/bookings/",
+            data=self._booking_payload(customer_name="Someone Else"),
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="crashed-1",
+        )
+        self.assertEqual(mismatch.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        response = self.client.post(
+            "/api/bookings/", data=self._booking_payload(), format="json", HTTP_IDEMPOTENCY_KEY="crashed-1"
+        )
+        retry = self.client.post(
+            "/api/bookings/", data=self._booking_payload(), format="json", HTTP_IDEMPOTENCY_KEY="crashed-1"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Booking.objects.count(), 1)
+        record.refresh_from_db()
+        self.assertEqual(record.response_status, status.HTTP_201_CREATED)
+
+    def test_expired_idempotency_key_is_processed_again_and_purged(self):
+        self.client.post(
+            "/api/bookings/",
+            data=self._booking_payload(customer_email="invalid"),
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="k-2",
+        )
+        IdempotencyRecord.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        response = self.client.post(
+            "/api/bookings/", data=self._booking_payload(), format="json", HTTP_IDEMPOTENCY_KEY="k-2"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        IdempotencyRecord.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        call_command("purge_idempotency_keys", stdout=StringIO())
+        self.assertFalse(IdempotencyRecord.objects.exists())
+
+    def test_submit_payment_proof_replays_response_for_repeated_idempotency_key(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        booking = Booking.objects.create(
+            customer_name="Guest",
+            customer_email="guest@example.com",
+            customer_phone="09171234567",
+            service=self.service,
+            staff=self.staff,
+            availability=self.availability,
+            status=Booking.Status.AWAITING_PAYMENT,
+            payment_expires_at=timezone.now() + timedelta(minutes=30),
+        )
+
+        def submit():
+            return self.client.post(
+                f"/api/bookings/{booking.public_id}/submit-payment-proof/",
+                data={
+                    "customer_email": "guest@example.com",
+                    "guest_token": booking.guest_token,
+                    "payment_method": Booking.PaymentMethod.GCASH,
+                    "payment_reference": "REF-IDEM",
+                    "payment_proof_file": SimpleUploadedFile("proof.png", b"png-bytes", content_type="image/png"),
+                },
+                format="multipart",
+                HTTP_IDEMPOTENCY_KEY="proof-1",
+            )
+
+        with self.settings(MEDIA_ROOT=media_root):
+            first = submit()
+            retry = submit()
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(retry.status_code, status.HTTP_200_OK)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(
+            EmailOutboxMessage.objects.filter(booking=booking, event="payment_submitted").count(), 1
+        )
+
+    def _awaiting_payment_booking(self, availability, email: str):
+        return Booking.objects.create(
+            customer_name="Guest",
+            customer_email=email,
+            customer_phone="09171234567",
+            service=self.service,
+            staff=self.staff,
+            availability=availability,
+            status=Booking.Status.AWAITING_PAYMENT,
+            payment_expires_at=timezone.now() + timedelta(minutes=30),
+        )
+
+    def _submit_proof(self, booking, content: bytes, reference: str, filename: str = "proof.png"):
+        return self.client.post(
+            f"/api/bookings/{booking.public_id}/submit-payment-proof/",
+            data={
+                "customer_email": booking.customer_email,
+                "guest_token": booking.guest_token,
+                "payment_method": Booking.PaymentMethod.GCASH,
+                "payment_reference": reference,
+                "payment_proof_file": SimpleUploadedFile(filename, content, content_type="image/png"),
+            },
+            format="multipart",
+        )
+
+    def test_identical_payment_proofs_share_one_stored_file(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        second_slot = Availability.objects.create(
+            staff=self.staff,
+            service=self.service,
+            start_time=self.availability.end_time,
+            end_time=self.availability.end_time + timedelta(hours=1),
+        )
+        first = self._awaiting_payment_booking(self.availability, "first@example.com")
+        second = self._awaiting_payment_booking(second_slot, "second@example.com")
+
+        with self.settings(MEDIA_ROOT=media_root):
+            self.assertEqual(self._submit_proof(first, b"same-screenshot", "REF-A").status_code, status.HTTP_200_OK)
+            self.assertEqual(self._submit_proof(second, b"same-screenshot", "REF-B").status_code, status.HTTP_200_OK)
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        expected_hash = hashlib.sha256(b"same-screenshot").hexdigest()
+        self.assertEqual(first.payment_proof_sha256, expected_hash)
+        self.assertEqual(first.payment_proof_file.name, f"payment_proofs/sha256/{expected_hash[:2]}/{expected_hash}.png")
+        self.assertEqual(second.payment_proof_file.name, first.payment_proof_file.name)
+        stored = [path for _root, _dirs, files in os.walk(media_root) for path in files]
+        self.assertEqual(len(stored), 1)
+
+        self.client.force_authenticate(self._create_role_user("operator", ROLE_OPERATOR))
+        response = self.client.get("/api/bookings/")
+        self.assertEqual({row["payment_proof_reused"] for row in response.data}, {True})
+
+    @override_settings(BOOKING_PROOF_MAX_DIMENSION=400, BOOKING_PROOF_THUMBNAIL_SIZE=64)
+    def test_proof_worker_strips_exif_recompresses_and_thumbnails(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        exif = Image.Exif()
+        exif[0x010F] = "Phone Maker"
+        exif[0x0112] = 6
+        screenshot = io.BytesIO()
+        Image.new("RGB", (1200, 600), "white").save(screenshot, format="JPEG", quality=100, exif=exif)
+        first = self._awaiting_payment_booking(self.availability, "first@example.com")
+
+        with self.settings(MEDIA_ROOT=media_root):
+            response = self._submit_proof(first, screenshot.getvalue(), "REF-EXIF", filename="proof.jpg")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            first.refresh_from_db()
+            original = first.payment_proof_file.name
+            self.assertIsNone(first.payment_proof_processed_at)
+
+            counts = process_payment_proof_batch(workers=2)
+
+            self.assertEqual(counts, {"processed": 1, "retried": 0, "failed": 0})
+            first.refresh_from_db()
+            self.assertTrue(first.payment_proof_file.name.startswith("payment_proofs/normalized/"))
+            self.assertFalse(first.payment_proof_file.storage.exists(original))
+            with Image.open(first.payment_proof_file.path) as normalized:
+                self.assertEqual(normalized.size, (200, 400))
+                self.assertEqual(dict(normalized.getexif()), {})
+            with Image.open(first.payment_proof_thumbnail.path) as thumbnail:
+                self.assertLessEqual(max(thumbnail.size), 64)
+            self.assertLess(first.payment_proof_file.size, len(screenshot.getvalue()))
+
+            second_slot = Availability.objects.create(
+                staff=self.staff,
+                service=self.service,
+                start_time=self.availability.end_time,
+                end_time=self.availability.end_time + timedelta(hours=1),
+            )
+            second = self._awaiting_payment_booking(second_slot, "second@example.com")
+            self._submit_proof(second, screenshot.getvalue(), "REF-EXIF-2", filename="proof.jpg")
+
+            self.client.force_authenticate(self._create_role_user("operator", ROLE_OPERATOR))
+            response = self.client.get(f"/api/bookings/{second.public_id}/")
+
+        second.refresh_from_db()
+        self.assertEqual(second.payment_proof_file.name, first.payment_proof_file.name)
+        self.assertFalse(PaymentProofJob.objects.filter(booking=second).exists())
+        self.assertTrue(second.payment_proof_thumbnail)
+        self.assertEqual(
+            response.data["payment_proof_thumbnail"],
+            f"http://testserver/api/bookings/{second.public_id}/payment-proof/?variant=thumbnail",
+        )
+
+    @override_settings(BOOKING_PAYMENT_PROOF_MAX_BYTES=1024)
+    def test_oversized_payment_proof_is_rejected_while_streaming(self):
+        booking = self._awaiting_payment_booking(self.availability, "guest@example.com")
+
+        response = self._submit_proof(booking, b"x" * 4096, "REF-BIG")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("must be 1KB or smaller", str(response.data["payment_proof_file"]))
+
+    def test_resumable_proof_upload_resumes_from_server_offset(self):
+        media_root = tempfile.mkdtemp()
+        upload_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, upload_dir, ignore_errors=True)
+        booking = self._awaiting_payment_booking(self.availability, "guest@example.com")
+        content = b"resumable-screenshot-bytes"
+
+        with self.settings(MEDIA_ROOT=media_root, BOOKING_PROOF_UPLOAD_DIR=upload_dir):
+            start = self.client.post(
+                f"/api/bookings/{booking.public_id}/proof-uploads/",
+                {
+                    "customer_email": booking.customer_email,
+                    "guest_token": booking.guest_token,
+                    "file_name": "proof.png",
+                    "content_type": "image/png",
+                    "size": len(content),
+                },
+                format="json",
+            )
+            self.assertEqual(start.status_code, status.HTTP_201_CREATED)
+            upload_url = f"/api/bookings/proof-uploads/{start.data['upload_id']}/"
+
+            guest_headers = {"HTTP_GUEST_EMAIL": booking.customer_email, "HTTP_GUEST_TOKEN": str(booking.guest_token)}
+
+            def put_chunk(offset, chunk, **headers):
+                return self.client.generic(
+                    "PUT",
+                    upload_url,
+                    chunk,
+                    content_type="application/offset+octet-stream",
+                    HTTP_UPLOAD_OFFSET=str(offset),
+                    **(headers or guest_headers),
+                )
+
+            # Knowing the upload ID alone is not enough to write to or inspect the upload.
+            self.assertEqual(put_chunk(0, content[:10], HTTP_GUEST_EMAIL="").status_code, status.HTTP_403_FORBIDDEN)
+            self.assertEqual(self.client.get(upload_url).status_code, status.HTTP_403_FORBIDDEN)
+
+            # A PUT racing one that is still writing the same offset must not touch the part file.
+            PaymentProofUpload.objects.update(write_claimed_until=timezone.now() + timedelta(minutes=1))
+            self.assertEqual(put_chunk(0, b"x" * 10).status_code, status.HTTP_409_CONFLICT)
+            self.assertEqual(os.path.getsize(os.path.join(upload_dir, os.listdir(upload_dir)[0])), 0)
+            PaymentProofUpload.objects.update(write_claimed_until=None)
+
+            self.assertEqual(put_chunk(0, content[:10]).data["offset"], 10)
+            stale = put_chunk(0, content[:10])
+            self.assertEqual(stale.status_code, status.HTTP_409_CONFLICT)
+            self.assertEqual(stale["Upload-Offset"], "10")
+
+            finalize_url = f"{upload_url}finalize/"
+            payload = {"payment_method": Booking.PaymentMethod.GCASH, "payment_reference": "REF-RESUME"}
+            forged = {**payload, "customer_email": booking.customer_email, "guest_token": str(uuid.uuid4())}
+            forbidden = self.client.post(finalize_url, forged, format="json")
+            self.assertEqual(forbidden.status_code, status.HTTP_403_FORBIDDEN)
+            payload.update(customer_email=booking.customer_email, guest_token=str(booking.guest_token))
+            incomplete = self.client.post(finalize_url, payload, format="json")
+            self.assertEqual(incomplete.status_code, status.HTTP_400_BAD_REQUEST)
+
+            offset = self.client.get(upload_url, **guest_headers).data["offset"]
+            self.assertEqual(put_chunk(offset, content[offset:]).data["offset"], len(content))
+            response = self.client.post(finalize_url, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, Booking.Status.PAYMENT_SUBMITTED)
+        self.assertEqual(booking.payment_proof_sha256, hashlib.sha256(content).hexdigest())
+        self.assertFalse(PaymentProofUpload.objects.exists())
+        self.assertEqual(os.listdir(upload_dir), [])
+
+    def test_payment_proof_download_supports_range_etag_and_sendfile(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        booking = self._awaiting_payment_booking(self.availability, "guest@example.com")
+        content = b"%PDF-1.4 bank transfer receipt"
+        url = f"/api/bookings/{booking.public_id}/payment-proof/"
+
+        with self.settings(MEDIA_ROOT=media_root):
+            self._submit_proof(booking, content, "REF-PDF", filename="receipt.pdf")
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+            self.client.force_authenticate(self._create_role_user("operator", ROLE_OPERATOR))
+
+            full = self.client.get(url)
+            self.assertEqual(full.status_code, status.HTTP_200_OK)
+            self.assertEqual(b"".join(full.streaming_content), content)
+            self.assertEqual(full["Content-Type"], "application/pdf")
+            self.assertEqual(full["Accept-Ranges"], "bytes")
+
+            partial = self.client.get(url, HTTP_RANGE="bytes=4-7")
+            self.assertEqual(partial.status_code, status.HTTP_206_PARTIAL_CONTENT)
+            self.assertEqual(b"".join(partial.streaming_content), content[4:8])
+            self.assertEqual(partial["Content-Range"], f"bytes 4-7/{len(content)}")
+
+            tail = self.client.get(url, HTTP_RANGE="bytes=-7")
+            self.assertEqual(b"".join(tail.streaming_content), content[-7:])
+            self.assertEqual(self.client.get(url, HTTP_RANGE="bytes=999-").status_code, 416)
+
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=full["ETag"])
+            self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(self.client.get(url, {"variant": "thumbnail"}).status_code, status.HTTP_404_NOT_FOUND)
+
+            with self.settings(BOOKING_PROOF_SENDFILE_HEADER="X-Accel-Redirect"):
+                handed_off = self.client.get(url)
+            for response in (full, partial, tail):
+                response.close()
+
+        booking.refresh_from_db()
+        self.assertEqual(handed_off["X-Accel-Redirect"], f"/protected-media/{booking.payment_proof_file.name}")
+        self.assertEqual(handed_off.content, b"")
+
+    @override_settings(BOOKING_PAYMENT_PROOF_MAX_BYTES=1024)
+    def test_resumable_proof_upload_rejects_oversized_declared_size(self):
+        booking = self._awaiting_payment_booking(self.availability, "guest@example.com")
+
+        response = self.client.post(
+            f"/api/bookings/{booking.public_id}/proof-uploads/",
+            {
+                "customer_email": booking.customer_email,
+                "guest_token": booking.guest_token,
+                "file_name": "proof.png",
+                "content_type": "image/png",
+                "size": 4096,
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(PaymentProofUpload.objects.exists())
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, Booking.Status.AWAITING_PAYMENT)
+
+    def _cart_slots(self):
+        nails = Service.objects.create(name="Gel Nails", duration_minutes=60, price="450.00")
+        nail_tech = Staff.objects.create(full_name="Nail Tech", email="nails@example.com")
+        start_time = self.availability.end_time
+        second = Availability.objects.create(
+            staff=nail_tech,
+            service=nails,
+            start_time=start_time,
+            end_time=start_time + timedelta(hours=1),
+        )
+        third = Availability.objects.create(
+            staff=self.staff,
+            service=self.service,
+            start_time=start_time + timedelta(hours=1),
+            end_time=start_time + timedelta(hours=2),
+        )
+        return [third, self.availability, second]
+
+    def _cart_payload(self, slots):
+        return {
+            "customer_name": "Guest",
+            "customer_email": "Guest@Example.com",
+            "customer_phone": "09171234567",
+            "availability_ids": [slot.id for slot in slots],
+        }
+
+    def test_cart_books_every_slot_with_one_combined_email(self):
+        slots = self._cart_slots()
+
+        response = self.client.post("/api/bookings/cart/", data=self._cart_payload(slots), format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data["bookings"]), 3)
+        bookings = Booking.objects.filter(cart_id=response.data["cart_id"])
+        self.assertEqual(bookings.count(), 3)
+        self.assertEqual(
+            {str(token) for token in bookings.values_list("guest_token", flat=True)},
+            {str(response.data["guest_token"])},
+        )
+        self.assertEqual(set(bookings.values_list("customer_email", flat=True)), {"guest@example.com"})
+        self.assertEqual(Availability.objects.filter(pk__in=[slot.pk for slot in slots], is_booked=True).count(), 3)
+
+        self.assertEqual(EmailOutboxMessage.objects.get().event, "cart_created")
+        deliver_outbox_batch()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, "[Doce Amor] 3 bookings - Awaiting Payment")
+        for booking in bookings:
+            self.assertIn(str(booking.public_id), mail.outbox[0].body)
+
+    def test_cart_claims_nothing_when_any_slot_is_unavailable(self):
+        slots = self._cart_slots()
+        self.client.post("/api/bookings/", data=self._booking_payload(), format="json")
+
+        response = self.client.post("/api/bookings/cart/", data=self._cart_payload(slots), format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data["availability_ids"], {str(self.availability.id): "This slot is already booked."}
+        )
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertFalse(Availability.objects.filter(pk__in=[slots[0].pk, slots[2].pk], is_booked=True).exists())
+
+    @override_settings(BOOKING_CART_MAX_ITEMS=2)
+    def test_cart_rejects_duplicate_slots_and_oversized_carts(self):
+        slots = self._cart_slots()
+
+        duplicate = self.client.post(
+            "/api/bookings/cart/", data=self._cart_payload([slots[0], slots[0]]), format="json"
+        )
+        oversized = self.client.post("/api/bookings/cart/", data=self._cart_payload(slots), format="json")
+
+        self.assertEqual(duplicate.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(oversized.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Booking.objects.exists())
+
+    def _submitted_bookings(self, count: int, *, expires_in=timedelta(minutes=30)):
+        bookings = []
+        for index in range(count):
+            availability = Availability.objects.create(
+                staff=self.staff,
+                service=self.service,
+                start_time=timezone.now() + timedelta(days=1, hours=index),
+                end_time=timezone.now() + timedelta(days=1, hours=index + 1),
+                is_booked=True,
+            )
+            bookings.append(
+                Booking.objects.create(
+                    customer_name=f"Guest {index}",
+                    customer_email=f"guest{index}@example.com",
+                    customer_phone="09171234567",
+                    service=self.service,
+                    staff=self.staff,
+                    availability=availability,
+                    status=Booking.Status.PAYMENT_SUBMITTED,
+                    payment_expires_at=timezone.now() + expires_in,
+                    payment_submitted_at=timezone.now() - timedelta(minutes=count - index),
+                    payment_method=Booking.PaymentMethod.GCASH,
+                    payment_reference=f"REF-Q{index}",
+                )
+            )
+        return bookings
+
+    def test_review_queue_gives_operators_disjoint_claims(self):
+        bookings = self._submitted_bookings(5)
+        first = self._create_role_user("reviewer1", ROLE_OPERATOR)
+        second = self._create_role_user("reviewer2", ROLE_OPERATOR)
+
+        self.client.force_authenticate(first)
+        first_claim = self.client.post("/api/bookings/review-queue/claim/", data={"limit": 3}, format="json")
+        self.client.force_authenticate(second)
+        second_claim = self.client.post("/api/bookings/review-queue/claim/", data={"limit": 3}, format="json")
+
+        self.assertEqual(first_claim.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [row["public_id"] for row in first_claim.data["results"]],
+            [str(booking.public_id) for booking in bookings[:3]],
+        )
+        self.assertEqual(
+            [row["public_id"] for row in second_claim.data["results"]],
+            [str(booking.public_id) for booking in bookings[3:]],
+        )
+        self.assertEqual(Booking.objects.filter(review_claimed_by=first).count(), 3)
+
+    def test_review_queue_reclaims_expired_leases(self):
+        booking = self._submitted_bookings(1)[0]
+        first = self._create_role_user("reviewer1", ROLE_OPERATOR)
+        second = self._create_role_user("reviewer2", ROLE_OPERATOR)
+        Booking.objects.filter(pk=booking.pk).update(
+            review_claimed_by=first,
+            review_claim_expires_at=timezone.now() - timedelta(seconds=1),
+        )
+
+        self.client.force_authenticate(second)
+        response = self.client.post("/api/bookings/review-queue/claim/", data={}, format="json")
+
+        self.assertEqual(len(response.data["results"]), 1)
+        booking.refresh_from_db()
+        self.assertEqual(booking.review_claimed_by, second)
+
+        self.client.force_authenticate(first)
+        stale = self.client.post(
+            "/api/bookings/review-queue/verify/",
+            data={"public_ids": [str(booking.public_id)], "approved": True},
+            format="json",
+        )
+        self.assertEqual(stale.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_review_queue_bulk_approves_claimed_bookings(self):
+        bookings = self._submitted_bookings(3)
+        operator = self._create_role_user("reviewer", ROLE_OPERATOR)
+        self.client.force_authenticate(operator)
+        self.client.post("/api/bookings/review-queue/claim/", data={"limit": 2}, format="json")
+
+        unclaimed = self.client.post(
+            "/api/bookings/review-queue/verify/",
+            data={"public_ids": [str(booking.public_id) for booking in bookings], "approved": True},
+            format="json",
+        )
+        self.assertEqual(unclaimed.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(str(bookings[2].public_id), str(unclaimed.data["public_ids"]))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/bookings/review-queue/verify/",
+                data={
+                    "public_ids": [str(booking.public_id) for booking in bookings[:2]],
+                    "approved": True,
+                    "admin_note": "Batch verified",
+                },
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["verified"], 2)
+        for booking in bookings[:2]:
+            booking.refresh_from_db()
+            self.assertEqual(booking.status, Booking.Status.CONFIRMED)
+            self.assertEqual(booking.payment_verified_by, operator)
+            self.assertIsNone(booking.review_claimed_by)
+        bookings[2].refresh_from_db()
+        self.assertEqual(bookings[2].status, Booking.Status.PAYMENT_SUBMITTED)
+
+    def test_review_queue_rejection_cancels_expired_bookings(self):
+        expired = self._submitted_bookings(1, expires_in=-timedelta(minutes=1))[0]
+        operator = self._create_role_user("reviewer", ROLE_OPERATOR)
+        self.client.force_authenticate(operator)
+        self.client.post("/api/bookings/review-queue/claim/", data={}, format="json")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/bookings/review-queue/verify/",
+                data={"public_ids": [str(expired.public_id)], "approved": False, "admin_note": "Blurry"},
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        expired.refresh_from_db()
+        self.assertEqual(expired.status, Booking.Status.CANCELLED)
+        self.assertFalse(expired.availability.is_booked)
+
+    def test_reconcile_endpoint_approves_exact_reference_matches(self):
+        bookings = self._submitted_bookings(3)
+        operator = self._create_role_user("reconciler", ROLE_OPERATOR)
+        self.client.force_authenticate(operator)
+        statement = (
+            "Date,Description,Reference No.,Credit\n"
+            "2026-01-01,Opening balance,,\n"
+            "2026-01-01,Transfer, ref-q0 ,500.00\n"
+            "2026-01-01,Transfer,REF-Q1,450.00\n"
+            "2026-01-01,Transfer,REF-UNKNOWN,500.00\n"
+            "2026-01-02,Transfer,REF-Q0,500.00\n"
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/bookings/reconcile/",
+                data={
+                    "statement": SimpleUploadedFile("gcash.csv", statement.encode(), content_type="text/csv"),
+                    "payment_method": Booking.PaymentMethod.GCASH,
+                },
+                format="multipart",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data["rows"], response.data["approved"]), (4, 1))
+        self.assertEqual(
+            [(row["line"], row["reference"]) for row in response.data["unmatched"]],
+            [(4, "REF-Q1"), (5, "REF-UNKNOWN")],
+        )
+        self.assertEqual([row["line"] for row in response.data["ambiguous"]], [6])
+        bookings[0].refresh_from_db()
+        self.assertEqual(bookings[0].status, Booking.Status.CONFIRMED)
+        self.assertEqual(bookings[0].payment_verified_by, operator)
+        self.assertEqual(
+            Booking.objects.filter(pk__in=[bookings[1].pk, bookings[2].pk], status=Booking.Status.CONFIRMED).count(),
+            0,
+        )
+
+    def test_reconcile_command_dry_run_and_report(self):
+        bookings = self._submitted_bookings(3)
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir, ignore_errors=True)
+        statement_path = f"{tmp_dir}/bdo.csv"
+        report_path = f"{tmp_dir}/report.csv"
+        with open(statement_path, "w", encoding="utf-8") as statement:
+            statement.write("Reference Number,Payment Method\nREF-Q0,GCash\nREF-Q1,GCash\nREF-Q2,BDO\n")
+
+        call_command("reconcile_payments", statement_path, "--dry-run", stdout=StringIO())
+        self.assertFalse(Booking.objects.filter(status=Booking.Status.CONFIRMED).exists())
+
+        out = StringIO()
+        call_command("reconcile_payments", statement_path, "--batch-size", "1", "--report", report_path, stdout=out)
+
+        self.assertIn("approved=2", out.getvalue())
+        for booking in bookings[:2]:
+            booking.refresh_from_db()
+            self.assertEqual(booking.status, Booking.Status.CONFIRMED)
+        with open(report_path, encoding="utf-8") as report:
+            rows = list(csv.DictReader(report))
+        self.assertEqual([(row["category"], row["reference"]) for row in rows], [("unmatched", "REF-Q2")])
+
+        with open(statement_path, "w", encoding="utf-8") as statement:
+            statement.write("Date,Amount\n2026-01-01,500.00\n")
+        with self.assertRaisesMessage(CommandError, "no reference number column"):
+            call_command("reconcile_payments", statement_path, stdout=StringIO())
+
     def test_guest_submit_payment_proof_requires_identity(self):
         booking = Booking.objects.create(
             customer_name="Guest",
@@ -182,9 +922,700 @@ class BookingFlowTests(APITestCase):
         self.assertIn("public_id", success.data)
         self.assertNotIn("customer_email", success.data)
 
+    def test_guest_cancel_returns_only_public_booking_fields(self):
+        booking = self._awaiting_payment_booking(self.availability, "guest@example.com")
+
+        response = self.client.post(
+            f"/api/bookings/{booking.public_id}/cancel/",
+            data={"customer_email": "guest@example.com", "guest_token": booking.guest_token, "reason": "Plans changed"},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], Booking.Status.CANCELLED)
+        for field in ("customer_email", "payment_proof_sha256", "review_claimed_by", "review_claim_expires_at"):
+            self.assertNotIn(field, response.data)
+
+    def test_operator_can_stream_bookings_as_csv_and_ndjson(self):
+        Booking.objects.create(
+            customer_name="Guest, Jr.",
+            customer_email="guest@example.com",
+            customer_phone="09171234567",
+            service=self.service,
+            staff=self.staff,
+            availability=self.availability,
+            status=Booking.Status.PAYMENT_SUBMITTED,
+            payment_method=Booking.PaymentMethod.GCASH,
+            payment_reference="REF-EXPORT",
+        )
+        self.client.force_authenticate(self._create_role_user("exporter", ROLE_OPERATOR))
+
+        csv_response = self.client.get("/api/bookings/export/?status=payment_submitted")
+        self.assertEqual(csv_response.status_code, status.HTTP_200_OK)
+        self.assertTrue(csv_response.streaming)
+        rows = list(csv.DictReader(StringIO(b"".join(csv_response.streaming_content).decode())))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["customer_name"], "Guest, Jr.")
+        self.assertEqual(rows[0]["payment_reference"], "REF-EXPORT")
+        self.assertEqual(rows[0]["service"], "Hair Styling")
+
+        ndjson_response = self.client.get("/api/bookings/export/?output=ndjson&payment_method=bdo")
+        self.assertEqual(ndjson_response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(b"".join(ndjson_response.streaming_content), b"")
+
+        ndjson_response = self.client.get("/api/bookings/export/?output=ndjson")
+        lines = b"".join(ndjson_response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)["payment_method"] for line in lines], ["gcash"])
+
+    def test_guest_cannot_export_bookings(self):
+        response = self.client.get("/api/bookings/export/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_csv_export_neutralizes_spreadsheet_formulas(self):
+        Booking.objects.create(
+            customer_name="=HYPERLINK(\"http://evil.example\")",
+            customer_email="guest@example.com",
+            customer_phone="+639171234567",
+            service=self.service,
+            staff=self.staff,
+            availability=self.availability,
+            status=Booking.Status.PAYMENT_SUBMITTED,
+            payment_method=Booking.PaymentMethod.GCASH,
+            payment_reference="@SUM(A1)",
+        )
+        self.client.force_authenticate(self._create_role_user("exporter", ROLE_OPERATOR))
+
+        csv_response = self.client.get("/api/bookings/export/")
+        row = next(csv.DictReader(StringIO(b"".join(csv_response.streaming_content).decode())))
+        self.assertEqual(row["customer_name"], "'=HYPERLINK(\"http://evil.example\")")
+        self.assertEqual(row["customer_phone"], "'+639171234567")
+        self.assertEqual(row["payment_reference"], "'@SUM(A1)")
+
+        ndjson_response = self.client.get("/api/bookings/export/?output=ndjson")
+        record = json.loads(b"".join(ndjson_response.streaming_content))
+        self.assertEqual(record["payment_reference"], "@SUM(A1)")
+
+
+class ExpireUnpaidBookingsTests(APITestCase):
+    def setUp(self):
+        self.service = Service.objects.create(
+            name="Lash Lift",
+            duration_minutes=60,
+            price="700.00",
+            is_active=True,
+        )
+        self.staff = Staff.objects.create(
+            full_name="Expiry Staff",
+            email="expiry.staff@example.com",
+            is_active=True,
+        )
+
+    def _create_booking(self, index: int, *, expires_in: timedelta, status=Booking.Status.AWAITING_PAYMENT):
+        start_time = timezone.now() + timedelta(days=1, hours=index)
+        availability = Availability.objects.create(
+            staff=self.staff,
+            service=self.service,
+            start_time=start_time,
+            end_time=start_time + timedelta(minutes=30),
+            is_booked=True,
+        )
+        return Booking.objects.create(
+            customer_name=f"Guest {index}",
+            customer_email=f"guest{index}@example.com",
+            customer_phone="09171234567",
+            service=self.service,
+            staff=self.staff,
+            availability=availability,
+            status=status,
+            payment_expires_at=timezone.now() + expires_in,
+        )
+
+    def test_expire_cancels_only_expired_awaiting_payment_and_releases_slots(self):
+        expired = [self._create_booking(index, expires_in=timedelta(minutes=-1)) for index in range(3)]
+        pending = self._create_booking(3, expires_in=timedelta(minutes=10))
+        submitted = self._create_booking(
+            4, expires_in=timedelta(minutes=-1), status=Booking.Status.PAYMENT_SUBMITTED
+        )
+
+        count = expire_unpaid_bookings(batch_size=2)
+
+        self.assertEqual(count, 3)
+        for booking in expired:
+            booking.refresh_from_db()
+            booking.availability.refresh_from_db()
+            self.assertEqual(booking.status, Booking.Status.CANCELLED)
+            self.assertFalse(booking.availability.is_booked)
+        pending.refresh_from_db()
+        submitted.refresh_from_db()
+        self.assertEqual(pending.status, Booking.Status.AWAITING_PAYMENT)
+        self.assertEqual(submitted.status, Booking.Status.PAYMENT_SUBMITTED)
+        self.assertEqual(
+            set(EmailOutboxMessage.objects.values_list("event", "booking_status")),
+            {("expired_job", Booking.Status.CANCELLED)},
+        )
+        self.assertEqual(EmailOutboxMessage.objects.count(), 3)
+
+    def test_expire_command_respects_max_batches_and_resumes(self):
+        for index in range(5):
+            self._create_booking(index, expires_in=timedelta(minutes=-1))
+
+        out = StringIO()
+        call_command("expire_unpaid_bookings", "--batch-size=2", "--max-batches=1", stdout=out)
+        self.assertIn("Expired bookings processed: 2", out.getvalue())
+        self.assertEqual(Booking.objects.filter(status=Booking.Status.CANCELLED).count(), 2)
+
+        out = StringIO()
+        call_command("expire_unpaid_bookings", "--batch-size=2", stdout=out)
+        self.assertIn("Expired bookings processed: 3", out.getvalue())
+        self.assertIn("rows/sec", out.getvalue())
+        self.assertFalse(Availability.objects.filter(is_booked=True).exists())
+
+    def test_scheduler_sleeps_until_next_deadline_and_picks_up_new_bookings(self):
+        already_expired = self._create_booking(0, expires_in=timedelta(minutes=-1))
+        upcoming = self._create_booking(1, expires_in=timedelta(seconds=30))
+        scheduler = PaymentExpiryScheduler(poll_seconds=60)
+
+        self.assertEqual(scheduler.prime(), 1)
+        already_expired.refresh_from_db()
+        self.assertEqual(already_expired.status, Booking.Status.CANCELLED)
+        self.assertLessEqual(scheduler.seconds_until_next(), 30)
+        self.assertGreater(scheduler.seconds_until_next(), 20)
+
+        created_later = self._create_booking(2, expires_in=timedelta(seconds=-5))
+        scheduler.refresh()
+        self.assertEqual(scheduler.seconds_until_next(), 0)
+        self.assertEqual(scheduler.run_due(), 1)
+
+        created_later.refresh_from_db()
+        upcoming.refresh_from_db()
+        self.assertEqual(created_later.status, Booking.Status.CANCELLED)
+        self.assertEqual(upcoming.status, Booking.Status.AWAITING_PAYMENT)
+
+    def test_scheduler_idles_for_poll_interval_without_deadlines(self):
+        sleeps = []
+        scheduler = PaymentExpiryScheduler(poll_seconds=7, sleep=sleeps.append)
+
+        self.assertEqual(scheduler.run(max_cycles=2), 0)
+        self.assertEqual(sleeps, [7, 7])
+
+    def test_scheduler_picks_up_lower_id_committed_after_higher_id(self):
+        placeholder = self._create_booking(0, expires_in=timedelta(minutes=10))
+        late_id = placeholder.pk
+        placeholder.delete()
+        scheduler = PaymentExpiryScheduler(poll_seconds=60)
+        scheduler.prime()
+
+        self._create_booking(1, expires_in=timedelta(minutes=10))
+        scheduler.refresh()
+        # The lower id was stamped before the last refresh but its transaction only commits now.
+        late = self._create_booking(2, expires_in=timedelta(seconds=-5))
+        Booking.objects.filter(pk=late.pk).update(id=late_id, updated_at=timezone.now() - timedelta(seconds=10))
+        scheduler.refresh()
+
+        self.assertEqual(scheduler.seconds_until_next(), 0)
+        self.assertEqual(scheduler.run_due(), 1)
+        self.assertEqual(Booking.objects.get(pk=late_id).status, Booking.Status.CANCELLED)
+
+    @override_settings(BOOKING_EXPIRY_REFRESH_OVERLAP_SECONDS=0, BOOKING_EXPIRY_RESCAN_SECONDS=0)
+    def test_scheduler_rescan_recovers_deadlines_outside_overlap_window(self):
+        scheduler = PaymentExpiryScheduler(poll_seconds=60)
+        scheduler.prime()
+        missed = self._create_booking(0, expires_in=timedelta(seconds=-5))
+        Booking.objects.filter(pk=missed.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+
+        scheduler.refresh()
+
+        self.assertEqual(scheduler.run_due(), 1)
+
+
+class EmailOutboxTests(APITestCase):
+    def setUp(self):
+        self.service = Service.objects.create(name="Foot Spa", duration_minutes=60, price="400.00")
+        self.staff = Staff.objects.create(full_name="Outbox Staff", email="outbox.staff@example.com")
+        self.availability = Availability.objects.create(
+            staff=self.staff,
+            service=self.service,
+            start_time=timezone.now() + timedelta(days=1),
+            end_time=timezone.now() + timedelta(days=1, hours=1),
+        )
+
+    def _create_booking_via_api(self):
+        response = self.client.post(
+            "/api/bookings/",
+            data={
+                "customer_name": "Guest",
+                "customer_email": "Guest@Example.com",
+                "customer_phone": "09171234567",
+                "service": self.service.id,
+                "staff": self.staff.id,
+                "availability": self.availability.id,
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response
+
+    def test_booking_create_writes_outbox_row_without_sending(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._create_booking_via_api()
+
+        self.assertEqual(len(mail.outbox), 0)
+        message = EmailOutboxMessage.objects.get()
+        self.assertEqual(message.event, "created")
+        self.assertEqual(message.recipient, "guest@example.com")
+        self.assertEqual(message.status, EmailOutboxMessage.Status.PENDING)
+
+    def test_worker_sends_pending_messages_and_marks_them_sent(self):
+        self._create_booking_via_api()
+
+        out = StringIO()
+        call_command("run_outbox_worker", "--once", "--workers=2", stdout=out)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("Awaiting Payment", mail.outbox[0].subject)
+        self.assertEqual(mail.outbox[0].to, ["guest@example.com"])
+        message = EmailOutboxMessage.objects.get()
+        self.assertEqual(message.status, EmailOutboxMessage.Status.SENT)
+        self.assertEqual(message.attempts, 1)
+        self.assertIn("Outbox emails sent: 1", out.getvalue())
+
+    def test_worker_backs_off_and_gives_up_after_max_attempts(self):
+        self._create_booking_via_api()
+        failing_connection = mock.Mock()
+        failing_connection.open.side_effect = ConnectionRefusedError("smtp down")
+
+        with (
+            self.settings(BOOKING_EMAIL_OUTBOX_MAX_ATTEMPTS=2),
+            mock.patch("apps.bookings.notifications.get_connection", return_value=failing_connection),
+            self.assertLogs("apps.bookings.notifications", "WARNING") as logs,
+        ):
+            self.assertEqual(deliver_outbox_batch(), {"sent": 0, "retried": 1, "failed": 0})
+            message = EmailOutboxMessage.objects.get()
+            self.assertEqual(message.status, EmailOutboxMessage.Status.PENDING)
+            self.assertGreater(message.next_attempt_at, timezone.now())
+            self.assertEqual(deliver_outbox_batch(), {"sent": 0, "retried": 0, "failed": 0})
+
+            EmailOutboxMessage.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(deliver_outbox_batch(), {"sent": 0, "retried": 0, "failed": 1})
+
+        self.assertEqual([record.levelname for record in logs.records], ["WARNING", "ERROR"])
+        self.assertIn("Failed sending booking status email, will retry.", logs.records[0].getMessage())
+        self.assertIn("smtp down", logs.records[0].getMessage())
+        self.assertIn("Giving up on booking status email.", logs.records[1].getMessage())
+        message.refresh_from_db()
+        self.assertEqual(message.status, EmailOutboxMessage.Status.FAILED)
+        self.assertIn("smtp down", message.last_error)
+
+
+class WorkflowQueryCountTests(APITestCase):
+    def setUp(self):
+        self.service = Service.objects.create(name="Pedicure", duration_minutes=60, price="350.00")
+        self.staff = Staff.objects.create(full_name="Query Staff", email="query.staff@example.com")
+        self.availability = Availability.objects.create(
+            staff=self.staff,
+            service=self.service,
+            start_time=timezone.now() + timedelta(days=1),
+            end_time=timezone.now() + timedelta(days=1, hours=1),
+            is_booked=True,
+        )
+        self.admin_user = get_user_model().objects.create_user(username="reviewer", password="password123")
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_override = self.settings(MEDIA_ROOT=media_root)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+    def _booking(self, status, **extra):
+        booking = Booking.objects.create(
+            customer_name="Guest",
+            customer_email="guest@example.com",
+            customer_phone="09171234567",
+            service=self.service,
+            staff=self.staff,
+            availability=self.availability,
+            status=status,
+            payment_expires_at=timezone.now() + timedelta(minutes=30),
+            **extra,
+        )
+        return Booking.objects.get(pk=booking.pk)
+
+    def test_submit_payment_proof_query_count(self):
+        booking = self._booking(Booking.Status.AWAITING_PAYMENT)
+        payload = {
+            "payment_method": Booking.PaymentMethod.GCASH,
+            "payment_reference": "REF-Q1",
+            "payment_proof_file": SimpleUploadedFile("proof.png", b"png-bytes", content_type="image/png"),
+        }
+        with self.assertNumQueries(9):
+            submit_payment_proof(booking=booking, payload=payload)
+
+    def test_verify_payment_approve_query_count(self):
+        booking = self._booking(
+            Booking.Status.PAYMENT_SUBMITTED, payment_method=Booking.PaymentMethod.GCASH, payment_reference="REF-Q2"
+        )
+        with self.assertNumQueries(9):
+            verify_payment(booking=booking, approved=True, admin_user=self.admin_user)
+
+    def test_verify_payment_reject_query_count(self):
+        booking = self._booking(
+            Booking.Status.PAYMENT_SUBMITTED, payment_method=Booking.PaymentMethod.GCASH, payment_reference="REF-Q3"
+        )
+        with self.assertNumQueries(8):
+            verify_payment(booking=booking, approved=False, admin_user=self.admin_user, admin_note="Blurry")
+
+    def test_cancel_booking_query_count(self):
+        booking = self._booking(Booking.Status.AWAITING_PAYMENT)
+        with self.assertNumQueries(6):
+            cancel_booking(booking=booking, reason="Changed plans")
+
+    def test_complete_booking_query_count(self):
+        booking = self._booking(Booking.Status.CONFIRMED)
+        with self.assertNumQueries(5):
+            complete_booking(booking=booking)
+
+    def test_expire_unpaid_bookings_query_count(self):
+        booking = self._booking(Booking.Status.AWAITING_PAYMENT)
+        Booking.objects.filter(pk=booking.pk).update(payment_expires_at=timezone.now() - timedelta(minutes=1))
+        with self.assertNumQueries(6):
+            expire_unpaid_bookings()
+
+    def test_changing_slot_still_runs_slot_validation(self):
+        booking = self._booking(Booking.Status.AWAITING_PAYMENT)
+        other_service = Service.objects.create(name="Manicure", duration_minutes=30, price="250.00")
+        other_slot = Availability.objects.create(
+            staff=self.staff,
+            service=other_service,
+            start_time=timezone.now() + timedelta(days=2),
+            end_time=timezone.now() + timedelta(days=2, hours=1),
+        )
+
+        booking.availability = other_slot
+        with self.assertRaises(DjangoValidationError):
+            booking.save()
+        with self.assertRaises(DjangoValidationError):
+            booking.save(update_fields=["availability", "updated_at"])
+
+    def test_workflows_record_lock_wait_and_transaction_metrics(self):
+        registry.reset()
+        booking = self._booking(Booking.Status.CONFIRMED)
+
+        complete_booking(booking=booking)
+        with self.assertRaises(ValidationError):
+            complete_booking(booking=booking)
+
+        self.assertEqual(workflow_total.value(workflow="complete_booking", outcome="ok"), 1)
+        self.assertEqual(workflow_total.value(workflow="complete_booking", outcome="error"), 1)
+        self.assertEqual(workflow_lock_wait_seconds.count(workflow="complete_booking"), 2)
+        self.assertEqual(workflow_transaction_seconds.count(workflow="complete_booking"), 2)
+        # The test case wraps everything in a transaction, so nothing is committed here.
+        self.assertEqual(workflow_commit_seconds.count(workflow="complete_booking"), 0)
+        self.assertIn('booking_workflow_total{outcome="ok",workflow="complete_booking"} 1', registry.render())
+
+    @override_settings(BOOKING_WORKFLOW_SLOW_TRANSACTION_MS=0)
+    def test_slow_workflow_logs_structured_warning(self):
+        booking = self._booking(Booking.Status.CONFIRMED)
+
+        with self.assertLogs("apps.bookings.instrumentation", level="WARNING") as logs:
+            complete_booking(booking=booking)
+
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("workflow=complete_booking outcome=ok lock_wait_ms=", logs.output[0])
+        self.assertIn("commit_ms=n/a", logs.output[0])
+
+
+class SeedLoadDataTests(APITestCase):
+    def _seed(self, **options):
+        call_command(
+            "seed_load_data",
+            staff=3,
+            services=4,
+            slots=120,
+            bookings=70,
+            seed=7,
+            batch_size=25,
+            stdout=StringIO(),
+            **options,
+        )
+
+    def _signature(self):
+        return list(
+            Booking.objects.order_by("availability__staff__email", "availability__start_time").values_list(
+                "status", "customer_email", "payment_method", "payment_reference", "public_id"
+            )
+        )
+
+    def test_seeds_requested_volumes_with_consistent_slot_flags(self):
+        self._seed()
+
+        self.assertEqual(Staff.objects.count(), 3)
+        self.assertEqual(Service.objects.count(), 4)
+        self.assertEqual(Availability.objects.count(), 120)
+        self.assertEqual(Booking.objects.count(), 70)
+        self.assertEqual(
+            set(Availability.objects.filter(is_booked=True).values_list("id", flat=True)),
+            set(
+                Booking.objects.exclude(status=Booking.Status.CANCELLED).values_list("availability_id", flat=True)
+            ),
+        )
+        self.assertTrue(
+            Booking.objects.filter(status=Booking.Status.AWAITING_PAYMENT, payment_expires_at__isnull=False).exists()
+        )
+        future_completed = Booking.objects.filter(
+            status=Booking.Status.COMPLETED, availability__start_time__gt=timezone.now()
+        )
+        self.assertFalse(future_completed.exists())
+
+    def test_same_seed_reproduces_data_and_rerun_requires_flush(self):
+        self._seed()
+        first_run = self._signature()
+
+        with self.assertRaises(CommandError):
+            self._seed()
+        self._seed(flush=True)
+
+        self.assertEqual(self._signature(), first_run)
+        self.assertEqual(Booking.objects.count(), 70)
+
+
+class EndpointBenchmarkTests(APITestCase):
+    def setUp(self):
+        call_command(
+            "seed_load_data",
+            staff=2,
+            services=2,
+            slots=80,
+            bookings=40,
+            seed=3,
+            past_fraction=0,
+            stdout=StringIO(),
+        )
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir, ignore_errors=True)
+
+    def _run(self, **options):
+        call_command(
+            "benchmark_endpoints",
+            iterations=3,
+            warmup=1,
+            output=f"{self.output_dir}/results.json",
+            baseline=f"{self.output_dir}/baseline.json",
+            stdout=StringIO(),
+            **options,
+        )
+        with open(f"{self.output_dir}/results.json", encoding="utf-8") as handle:
+            return json.load(handle)
+
+    def test_reports_latency_and_queries_per_endpoint_and_rolls_back_writes(self):
+        booking_states = sorted(Booking.objects.values_list("id", "status"))
+        user_count = get_user_model().objects.count()
+        cache.set("benchmark-untouched", 1)
+
+        report = self._run()
+
+        self.assertEqual(set(report["results"]), set(SCENARIOS))
+        create = report["results"]["booking_create"]
+        self.assertEqual(create["requests"], 3)
+        self.assertEqual(create["errors"], 0)
+        self.assertGreater(create["queries_max"], 0)
+        self.assertLessEqual(create["p50_ms"], create["p99_ms"])
+        # Every measured availability request misses the cache, so none of them is query-free.
+        availability = report["results"]["availability_list"]
+        self.assertEqual(availability["queries_mean"], availability["queries_max"])
+        self.assertEqual(sorted(Booking.objects.values_list("id", "status")), booking_states)
+        self.assertEqual(get_user_model().objects.count(), user_count)
+        self.assertEqual(cache.get("benchmark-untouched"), 1)
+
+    def test_fails_when_results_regress_against_baseline(self):
+        self._run(scenario=["track_status"], save_baseline=True)
+        with open(f"{self.output_dir}/baseline.json", encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        baseline["results"]["track_status"]["queries_max"] = 0
+        with open(f"{self.output_dir}/baseline.json", "w", encoding="utf-8") as handle:
+            json.dump(baseline, handle)
+
+        with self.assertRaisesMessage(CommandError, "track_status: 1 queries > baseline 0"):
+            self._run(scenario=["track_status"], tolerance=100)
+
+
+class DoubleBookingInvariantTests(APITestCase):
+    def setUp(self):
+        self.service = Service.objects.create(name="Brow Tint", duration_minutes=30, price="300.00")
+        self.staff = Staff.objects.create(full_name="Stress Staff", email="stress.staff@example.com")
+
+    def _slot(self, offset: int, *, is_booked: bool):
+        start_time = timezone.now() + timedelta(days=1, hours=offset)
+        return Availability.objects.create(
+            staff=self.staff,
+            service=self.service,
+            start_time=start_time,
+            end_time=start_time + timedelta(minutes=30),
+            is_booked=is_booked,
+        )
+
+    def _book(self, slot, status):
+        Booking.objects.create(
+            customer_name="Guest",
+            customer_email="guest@example.com",
+            customer_phone="09171234567",
+            service=self.service,
+            staff=self.staff,
+            availability=slot,
+            status=status,
+        )
+
+    def test_reports_slot_flags_that_disagree_with_bookings(self):
+        consistent = self._slot(0, is_booked=True)
+        self._book(consistent, Booking.Status.AWAITING_PAYMENT)
+        released = self._slot(1, is_booked=False)
+        self._book(released, Booking.Status.CANCELLED)
+        leaked_claim = self._slot(2, is_booked=True)
+        unflagged = self._slot(3, is_booked=False)
+        self._book(unflagged, Booking.Status.CONFIRMED)
+
+        violations = find_invariant_violations([consistent.pk, released.pk, leaked_claim.pk, unflagged.pk])
+
+        self.assertEqual(
+            sorted(violations),
+            [
+                f"slot {leaked_claim.pk} is flagged booked but has no active booking",
+                f"slot {unflagged.pk} has an active booking but is flagged free",
+            ],
+        )
+
+    def test_only_lock_errors_count_as_lock_timeouts(self):
+        self.assertTrue(is_lock_timeout(OperationalError("database is locked")))
+        self.assertTrue(is_lock_timeout(OperationalError("canceling statement due to lock timeout")))
+        self.assertFalse(is_lock_timeout(OperationalError("no such table: bookings_booking")))
+        self.assertFalse(is_lock_timeout(ValueError("database is locked")))
+
+    def test_stress_round_fails_instead_of_hanging_when_a_guest_cannot_start(self):
+        command = "apps.bookings.management.commands.stress_double_booking"
+        calls = []
+        calls_lock = threading.Lock()
+
+        def configure(timeout_ms):
+            with calls_lock:
+                calls.append(timeout_ms)
+                first = len(calls) == 1
+            if first:
+                raise OperationalError("could not set lock timeout")
+
+        with (
+            mock.patch(f"{command}.uses_in_memory_database", return_value=False),
+            mock.patch(f"{command}.set_sqlite_journal_mode", return_value=None),
+            mock.patch(f"{command}.configure_lock_timeout", side_effect=configure),
+            mock.patch(f"{command}.Availability.objects.in_bulk", return_value={}),
+        ):
+            with self.assertRaisesMessage(CommandError, "1 of 1 rounds failed"):
+                call_command("stress_double_booking", "--threads=4", "--rounds=1", stdout=StringIO())
+
+        self.assertEqual(len(calls), 4)
+
+
+class PaymentProofRetentionTests(APITransactionTestCase):
+    # Transactional, because the purge re-checks references from its deleting threads.
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = self.settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.service = Service.objects.create(name="Body Scrub", duration_minutes=60, price="900.00")
+        self.staff = Staff.objects.create(full_name="Retention Staff", email="retention.staff@example.com")
+
+    def _booking_with_proof(self, index: int, content: bytes, *, status, age_days: int = 0):
+        start_time = timezone.now() + timedelta(days=1, hours=index)
+        booking = Booking.objects.create(
+            customer_name=f"Guest {index}",
+            customer_email=f"guest{index}@example.com",
+            customer_phone="09171234567",
+            service=self.service,
+            staff=self.staff,
+            availability=Availability.objects.create(
+                staff=self.staff,
+                service=self.service,
+                start_time=start_time,
+                end_time=start_time + timedelta(hours=1),
+                is_booked=True,
+            ),
+            status=status,
+        )
+        storage = Booking._meta.get_field("payment_proof_file").storage
+        name, sha256 = store_payment_proof(ContentFile(content, name="receipt.pdf"), storage)
+        Booking.objects.filter(pk=booking.pk).update(
+            payment_proof_file=name,
+            payment_proof_sha256=sha256,
+            updated_at=timezone.now() - timedelta(days=age_days),
+        )
+        booking.refresh_from_db()
+        return booking
+
+    def test_purge_keeps_files_shared_with_retained_bookings(self):
+        old_shared = self._booking_with_proof(0, b"%PDF shared", status=Booking.Status.COMPLETED, age_days=200)
+        old_unique = self._booking_with_proof(1, b"%PDF unique", status=Booking.Status.CANCELLED, age_days=200)
+        active = self._booking_with_proof(2, b"%PDF shared", status=Booking.Status.PAYMENT_SUBMITTED)
+        storage = old_unique.payment_proof_file.storage
+        unique_name = old_unique.payment_proof_file.name
+
+        out = StringIO()
+        call_command("purge_payment_proofs", "--older-than", "180d", "--dry-run", stdout=out)
+        self.assertIn(f"would delete {unique_name} (11 bytes)", out.getvalue())
+        self.assertTrue(storage.exists(unique_name))
+
+        out = StringIO()
+        call_command("purge_payment_proofs", "--older-than", "180d", "--batch-size", "1", stdout=out)
+        self.assertIn("bookings=2 files=1 shared_kept=1 missing=0 reclaimed=11 bytes", out.getvalue())
+        self.assertFalse(storage.exists(unique_name))
+        self.assertTrue(storage.exists(active.payment_proof_file.name))
+        self.assertEqual(
+            list(
+                Booking.objects.filter(pk__in=[old_shared.pk, old_unique.pk]).values_list(
+                    "payment_proof_file", "payment_proof_sha256"
+                )
+            ),
+            [(None, ""), (None, "")],
+        )
+
+        self.client.force_authenticate(get_user_model().objects.create_superuser("root", "root@example.com", "pw"))
+        response = self.client.get(f"/api/bookings/{active.public_id}/")
+        self.assertFalse(response.data["payment_proof_reused"])
+
+    def test_purge_keeps_a_file_resubmitted_while_the_batch_runs(self):
+        old = self._booking_with_proof(0, b"%PDF screenshot", status=Booking.Status.COMPLETED, age_days=200)
+        name, sha256 = old.payment_proof_file.name, old.payment_proof_sha256
+
+        def resubmitted_meanwhile(file_name, *, eligible):
+            # A guest re-uploads the same screenshot after the batch was cleared but before the delete.
+            start_time = timezone.now() + timedelta(days=2)
+            Booking.objects.create(
+                customer_name="Late Guest",
+                customer_email="late@example.com",
+                customer_phone="09171234567",
+                service=self.service,
+                staff=self.staff,
+                availability=Availability.objects.create(
+                    staff=self.staff,
+                    service=self.service,
+                    start_time=start_time,
+                    end_time=start_time + timedelta(hours=1),
+                ),
+                status=Booking.Status.PAYMENT_SUBMITTED,
+                payment_proof_file=file_name,
+                payment_proof_sha256=sha256,
+            )
+            return _proof_references(file_name, eligible=eligible)
+
+        with mock.patch("apps.bookings.proofs._proof_references", side_effect=resubmitted_meanwhile):
+            counts = purge_payment_proofs(older_than=timedelta(days=180), workers=1)
+
+        self.assertEqual(counts["files"], 0)
+        self.assertEqual(counts["shared"], 1)
+        self.assertTrue(old.payment_proof_file.storage.exists(name))
+
 
 class CatalogAndAvailabilityFilterTests(APITestCase):
     def setUp(self):
+        cache.clear()
         Group.objects.get_or_create(name=ROLE_ADMIN)
         Group.objects.get_or_create(name=ROLE_OPERATOR)
         self.service = Service.objects.create(
@@ -258,7 +1689,7 @@ class CatalogAndAvailabilityFilterTests(APITestCase):
 
         response = self.client.get("/api/bookings/availability/")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        ids = [item["id"] for item in response.data]
+        ids = [item["id"] for item in response.data["results"]]
         self.assertIn(unbooked.id, ids)
         self.assertNotIn(booked.id, ids)
 
@@ -280,7 +1711,7 @@ class CatalogAndAvailabilityFilterTests(APITestCase):
 
         response = self.client.get("/api/bookings/availability/?is_booked=true")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        ids = [item["id"] for item in response.data]
+        ids = [item["id"] for item in response.data["results"]]
         self.assertIn(booked.id, ids)
         self.assertNotIn(unbooked.id, ids)
 
@@ -298,5 +1729,283 @@ class CatalogAndAvailabilityFilterTests(APITestCase):
 
         response = self.client.get("/api/bookings/availability/?date=2026-02-22")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        ids = [item["id"] for item in response.data]
+        ids = [item["id"] for item in response.data["results"]]
         self.assertIn(slot.id, ids)
+
+    def test_public_availability_is_cursor_paginated_by_start_time(self):
+        base = timezone.now() + timedelta(days=1)
+        slots = [
+            Availability.objects.create(
+                staff=self.staff_active,
+                service=self.service,
+                start_time=base + timedelta(hours=index),
+                end_time=base + timedelta(hours=index, minutes=30),
+            )
+            for index in range(5)
+        ]
+
+        first_page = self.client.get("/api/bookings/availability/?page_size=2")
+        self.assertEqual(first_page.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["id"] for item in first_page.data["results"]], [slots[0].id, slots[1].id])
+        self.assertIsNotNone(first_page.data["next"])
+
+        seen = [item["id"] for item in first_page.data["results"]]
+        next_url = first_page.data["next"]
+        while next_url:
+            page = self.client.get(next_url)
+            self.assertEqual(page.status_code, status.HTTP_200_OK)
+            seen.extend(item["id"] for item in page.data["results"])
+            next_url = page.data["next"]
+        self.assertEqual(seen, [slot.id for slot in slots])
+
+    def test_admin_availability_is_cursor_paginated(self):
+        admin_user = self._create_role_user("pageadmin", ROLE_ADMIN)
+        self.client.force_authenticate(admin_user)
+        base = timezone.now() - timedelta(days=1)
+        for index in range(3):
+            Availability.objects.create(
+                staff=self.staff_inactive,
+                service=self.service,
+                start_time=base + timedelta(hours=index),
+                end_time=base + timedelta(hours=index, minutes=30),
+                is_booked=index % 2 == 0,
+            )
+
+        response = self.client.get("/api/bookings/availability/?page_size=2")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNotNone(response.data["next"])
+
+        last_page = self.client.get(response.data["next"])
+        self.assertEqual(len(last_page.data["results"]), 1)
+        self.assertIsNone(last_page.data["next"])
+
+    def test_public_availability_is_served_from_cache_until_slot_is_booked(self):
+        slot = Availability.objects.create(
+            staff=self.staff_active,
+            service=self.service,
+            start_time=timezone.now() + timedelta(hours=2),
+            end_time=timezone.now() + timedelta(hours=3),
+        )
+        url = f"/api/bookings/availability/?service={self.service.id}"
+
+        first = self.client.get(url)
+        self.assertEqual([item["id"] for item in first.data["results"]], [slot.id])
+        with self.assertNumQueries(0):
+            cached = self.client.get(url)
+        self.assertEqual(cached.data, first.data)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booked = self.client.post(
+                "/api/bookings/",
+                data={
+                    "customer_name": "Guest",
+                    "customer_email": "guest@example.com",
+                    "customer_phone": "09171234567",
+                    "service": self.service.id,
+                    "staff": self.staff_active.id,
+                    "availability": slot.id,
+                },
+                format="json",
+            )
+        self.assertEqual(booked.status_code, status.HTTP_201_CREATED)
+
+        refreshed = self.client.get(url)
+        self.assertEqual(refreshed.data["results"], [])
+
+    def test_admin_slot_writes_invalidate_cached_public_availability(self):
+        url = f"/api/bookings/availability/?service={self.service.id}"
+        self.assertEqual(self.client.get(url).data["results"], [])
+
+        admin_user = self._create_role_user("slotadmin", ROLE_ADMIN)
+        self.client.force_authenticate(admin_user)
+        with self.captureOnCommitCallbacks(execute=True):
+            created = self.client.post(
+                "/api/bookings/availability/",
+                data={
+                    "staff": self.staff_active.id,
+                    "service": self.service.id,
+                    "start_time": (timezone.now() + timedelta(hours=2)).isoformat(),
+                    "end_time": (timezone.now() + timedelta(hours=3)).isoformat(),
+                },
+                format="json",
+            )
+        self.assertEqual(created.status_code, status.HTTP_201_CREATED)
+
+        self.client.force_authenticate(None)
+        ids = [item["id"] for item in self.client.get(url).data["results"]]
+        self.assertEqual(ids, [created.data["id"]])
+
+    def test_staff_deactivation_invalidates_cached_public_availability(self):
+        slot = Availability.objects.create(
+            staff=self.staff_active,
+            service=self.service,
+            start_time=timezone.now() + timedelta(hours=2),
+            end_time=timezone.now() + timedelta(hours=3),
+        )
+        url = "/api/bookings/availability/"
+        self.assertEqual([item["id"] for item in self.client.get(url).data["results"]], [slot.id])
+
+        admin_user = self._create_role_user("staffadmin", ROLE_ADMIN)
+        self.client.force_authenticate(admin_user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f"/api/bookings/staff/{self.staff_active.id}/", data={"is_active": False}, format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(url).data["results"], [])
+
+    @override_settings(AVAILABILITY_CACHE_MAX_SECONDS=3600, AVAILABILITY_CACHE_LOCAL_MAX_SECONDS=5)
+    def test_per_process_cache_keeps_availability_only_briefly(self):
+        Availability.objects.create(
+            staff=self.staff_active,
+            service=self.service,
+            start_time=timezone.now() + timedelta(hours=2),
+            end_time=timezone.now() + timedelta(hours=3),
+        )
+        with mock.patch("apps.bookings.availability_cache.cache.set", wraps=cache.set) as cache_set:
+            self.client.get("/api/bookings/availability/")
+        self.assertEqual(cache_set.call_args.kwargs["timeout"], 5)
+
+    def test_admin_bulk_generate_creates_recurring_slots_and_reports_overlaps(self):
+        admin_user = self._create_role_user("bulkadmin", ROLE_ADMIN)
+        second_staff = Staff.objects.create(full_name="Second Staff", email="second.staff@example.com")
+        local_tz = timezone.get_current_timezone()
+        today = timezone.localdate()
+        monday = today + timedelta(days=7 - today.weekday())
+        blocking = Availability.objects.create(
+            staff=second_staff,
+            service=self.service,
+            start_time=timezone.make_aware(datetime.combine(monday, datetime.min.time()), local_tz)
+            + timedelta(hours=9, minutes=30),
+            end_time=timezone.make_aware(datetime.combine(monday, datetime.min.time()), local_tz)
+            + timedelta(hours=10, minutes=30),
+        )
+        self.client.force_authenticate(admin_user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/bookings/availability/bulk-generate/",
+                data={
+                    "staff": [self.staff_active.id, second_staff.id],
+                    "service": self.service.id,
+                    "start_date": monday.isoformat(),
+                    "end_date": (monday + timedelta(days=6)).isoformat(),
+                    "weekdays": [0, 2],
+                    "day_start": "09:00",
+                    "day_end": "12:00",
+                },
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # 2 days x 3 one-hour slots x 2 staff, minus the two slots blocked by 09:30-10:30.
+        self.assertEqual(response.data["created_count"], 10)
+        self.assertEqual(len(response.data["conflicts"]), 2)
+        self.assertTrue(all(conflict["staff"] == second_staff.id for conflict in response.data["conflicts"]))
+        self.assertEqual(Availability.objects.exclude(pk=blocking.pk).count(), 10)
+
+    def test_bulk_generate_requires_admin_and_valid_range(self):
+        payload = {
+            "staff": [self.staff_active.id],
+            "service": self.service.id,
+            "start_date": "2030-01-10",
+            "end_date": "2030-01-01",
+            "weekdays": [0],
+            "day_start": "09:00",
+            "day_end": "12:00",
+        }
+        anonymous = self.client.post("/api/bookings/availability/bulk-generate/", data=payload, format="json")
+        self.assertEqual(anonymous.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(self._create_role_user("bulkadmin2", ROLE_ADMIN))
+        invalid = self.client.post("/api/bookings/availability/bulk-generate/", data=payload, format="json")
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("end_date", invalid.data)
+
+    def test_bulk_generate_rejects_zero_length_service(self):
+        self.service.duration_minutes = 0
+        self.service.save(update_fields=["duration_minutes"])
+        self.client.force_authenticate(self._create_role_user("bulkadmin3", ROLE_ADMIN))
+
+        response = self.client.post(
+            "/api/bookings/availability/bulk-generate/",
+            data={
+                "staff": [self.staff_active.id],
+                "service": self.service.id,
+                "start_date": "2030-01-07",
+                "end_date": "2030-01-07",
+                "weekdays": [0],
+                "day_start": "09:00",
+                "day_end": "12:00",
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("service", response.data)
+        with self.assertRaises(ValidationError):
+            generate_recurring_availability(
+                staff_members=[self.staff_active],
+                service=self.service,
+                start_date=date(2030, 1, 7),
+                end_date=date(2030, 1, 7),
+                weekdays=[0],
+                day_start=time(9),
+                day_end=time(12),
+            )
+        self.assertFalse(Availability.objects.filter(service=self.service, start_time__year=2030).exists())
+
+    def test_next_available_returns_earliest_free_slots_across_active_staff(self):
+        other_staff = Staff.objects.create(full_name="Other Staff", email="other.staff@example.com")
+        base = timezone.now() + timedelta(days=1)
+        later = Availability.objects.create(
+            staff=self.staff_active,
+            service=self.service,
+            start_time=base + timedelta(hours=3),
+            end_time=base + timedelta(hours=4),
+        )
+        earliest = Availability.objects.create(
+            staff=other_staff,
+            service=self.service,
+            start_time=base + timedelta(hours=1),
+            end_time=base + timedelta(hours=2),
+        )
+        Availability.objects.create(
+            staff=self.staff_active,
+            service=self.service,
+            start_time=base,
+            end_time=base + timedelta(minutes=30),
+            is_booked=True,
+        )
+        Availability.objects.create(
+            staff=self.staff_inactive,
+            service=self.service,
+            start_time=base + timedelta(minutes=30),
+            end_time=base + timedelta(minutes=45),
+        )
+        Availability.objects.create(
+            staff=self.staff_active,
+            service=self.service,
+            start_time=timezone.now() - timedelta(hours=1),
+            end_time=timezone.now() - timedelta(minutes=30),
+        )
+
+        response = self.client.get(f"/api/bookings/availability/next/?service={self.service.id}&limit=2")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["id"] for item in response.data["results"]], [earliest.id, later.id])
+
+        after = (base + timedelta(hours=2)).isoformat()
+        response = self.client.get(
+            "/api/bookings/availability/next/", data={"service": self.service.id, "after": after}
+        )
+        self.assertEqual([item["id"] for item in response.data["results"]], [later.id])
+
+    def test_next_available_requires_active_service(self):
+        self.service.is_active = False
+        self.service.save()
+        response = self.client.get(f"/api/bookings/availability/next/?service={self.service.id}")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("service", response.data)
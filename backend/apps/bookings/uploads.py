@@ -0,0 +1,86 @@
+import hashlib
+import io
+import tempfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import InMemoryUploadedFile, UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers
+
+PAYMENT_PROOF_DIRECTORY = "payment_proofs/sha256"
+
+
+def payment_proof_max_bytes() -> int:
+    return getattr(settings, "BOOKING_PAYMENT_PROOF_MAX_BYTES", 5 * 1024 * 1024)
+
+
+class PaymentProofUploadHandler(FileUploadHandler):
+    # Hashes and size-checks each chunk as it is read from the request body, so an
+    # oversized proof is never buffered and the digest is ready without a second read.
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.max_bytes = payment_proof_max_bytes()
+        self.received = 0
+        self.digest = hashlib.sha256()
+        self.buffer = tempfile.SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE,
+            dir=settings.FILE_UPLOAD_TEMP_DIR,
+        )
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.max_bytes:
+            # The rest of the part is still drained from the socket, but dropped.
+            if not self.buffer.closed:
+                self.buffer.close()
+            return None
+        self.digest.update(raw_data)
+        self.buffer.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if self.received > self.max_bytes:
+            # Carries the real size so the serializer's size validator rejects it.
+            return UploadedFile(
+                io.BytesIO(),
+                name=self.file_name,
+                content_type=self.content_type,
+                size=self.received,
+                charset=self.charset,
+                content_type_extra=self.content_type_extra,
+            )
+        self.buffer.seek(0)
+        upload = InMemoryUploadedFile(
+            self.buffer,
+            self.field_name,
+            self.file_name,
+            self.content_type,
+            file_size,
+            self.charset,
+            self.content_type_extra,
+        )
+        upload.sha256 = self.digest.hexdigest()
+        return upload
+
+
+def hash_upload(upload) -> str:
+    digest = hashlib.sha256()
+    for chunk in upload.chunks():
+        digest.update(chunk)
+    upload.seek(0)
+    return digest.hexdigest()
+
+
+def payment_proof_storage_name(sha256: str, filename: str) -> str:
+    extension = filename.split(".")[-1].lower()
+    return f"{PAYMENT_PROOF_DIRECTORY}/{sha256[:2]}/{sha256}.{extension}"
+
+
+def store_payment_proof(upload, storage) -> tuple[str, str]:
+    sha256 = getattr(upload, "sha256", None) or hash_upload(upload)
+    name = payment_proof_storage_name(sha256, upload.name)
+    if storage.exists(name):
+        return name, sha256
+    # A concurrent upload of the same bytes may win the race; storage then picks a
+    # suffixed name and the copy is merely redundant.
+    return storage.save(name, upload), sha256
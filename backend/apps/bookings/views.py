@@ -1,26 +1,61 @@
+import uuid
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from django.utils.dateparse import parse_date
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
-from .models import Availability, Booking, Staff
+from . import availability_cache
+from .exports import stream_bookings_csv, stream_bookings_ndjson
+from .idempotency import idempotent
+from .models import Availability, Booking, PaymentProofUpload, Staff
+from .pagination import AvailabilityCursorPagination
 from .permissions import BookingPermission, IsAdminOrOperatorRole, IsAdminRole
+from .proof_downloads import PROOF_VARIANTS, proof_field_name, serve_payment_proof
+from .proof_uploads import append_proof_chunk, finalize_proof_upload, start_proof_upload
+from .reconciliation import decode_statement, reconcile_statement
 from .serializers import (
+    AvailabilityConflictSerializer,
+    AvailabilityRecurrenceSerializer,
     AvailabilitySerializer,
     BookingPublicStatusSerializer,
+    BookingCartResponseSerializer,
+    BookingCartSerializer,
     BookingCreateResponseSerializer,
     BookingCreateSerializer,
+    BookingExportQuerySerializer,
     BookingSerializer,
+    BulkVerifyPaymentSerializer,
     CancelBookingSerializer,
     CompleteBookingSerializer,
+    NextAvailabilityQuerySerializer,
+    PaymentReconciliationSerializer,
+    PaymentReviewClaimSerializer,
+    ProofUploadFinalizeSerializer,
+    ProofUploadStartSerializer,
     StaffSerializer,
     SubmitPaymentProofSerializer,
     TrackBookingStatusRequestSerializer,
     VerifyPaymentSerializer,
 )
-from .services import cancel_booking, complete_booking, create_guest_booking, submit_payment_proof, verify_payment
+from .services import (
+    cancel_booking,
+    claim_payment_reviews,
+    complete_booking,
+    create_guest_booking,
+    create_guest_cart_booking,
+    generate_recurring_availability,
+    submit_payment_proof,
+    verify_claimed_payments,
+    verify_payment,
+)
+from .uploads import PaymentProofUploadHandler
 from apps.users.roles import is_admin, is_admin_or_operator
 
 
@@ -41,9 +76,22 @@ class StaffViewSet(viewsets.ModelViewSet):
             return queryset
         return queryset.filter(is_active=True)
 
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        availability_cache.invalidate_availability_catalog()
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        availability_cache.invalidate_availability_catalog()
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        availability_cache.invalidate_availability_catalog()
+
 
 class AvailabilityViewSet(viewsets.ModelViewSet):
     serializer_class = AvailabilitySerializer
+    pagination_class = AvailabilityCursorPagination
 
     def _apply_local_date_filter(self, queryset, date_filter: str | None):
         if not date_filter:
@@ -62,7 +110,7 @@ class AvailabilityViewSet(viewsets.ModelViewSet):
         return queryset.filter(start_time__gte=day_start, start_time__lt=next_day_start)
 
     def get_permissions(self):
-        if self.action in {"list", "retrieve"}:
+        if self.action in {"list", "retrieve", "next_available"}:
             return [AllowAny()]
         return [IsAdminRole()]
 
@@ -101,6 +149,79 @@ class AvailabilityViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(staff_id=staff_filter)
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        if is_admin_or_operator(request.user):
+            return super().list(request, *args, **kwargs)
+
+        cache_key = availability_cache.response_key(request)
+        cached = availability_cache.get_response(cache_key)
+        if cached is not None:
+            return Response(cached)
+        response = super().list(request, *args, **kwargs)
+        availability_cache.store_response(cache_key, response.data)
+        return response
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        availability_cache.invalidate_availability(service_ids=[serializer.instance.service_id])
+
+    def perform_update(self, serializer):
+        previous_service_id = serializer.instance.service_id
+        super().perform_update(serializer)
+        availability_cache.invalidate_availability(
+            service_ids=[previous_service_id, serializer.instance.service_id]
+        )
+
+    def perform_destroy(self, instance):
+        service_id = instance.service_id
+        super().perform_destroy(instance)
+        availability_cache.invalidate_availability(service_ids=[service_id])
+
+    @action(methods=["get"], detail=False, url_path="next")
+    def next_available(self, request):
+        query = NextAvailabilityQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        after = timezone.now()
+        if params.get("after") and params["after"] > after:
+            after = params["after"]
+        slots = (
+            Availability.objects.select_related("staff", "service")
+            .filter(
+                service=params["service"],
+                is_booked=False,
+                start_time__gt=after,
+                staff__is_active=True,
+            )
+            .order_by("start_time", "id")[: params["limit"]]
+        )
+        return Response({"results": AvailabilitySerializer(slots, many=True).data})
+
+    @action(methods=["post"], detail=False, url_path="bulk-generate")
+    def bulk_generate(self, request):
+        serializer = AvailabilityRecurrenceSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        payload = serializer.validated_data
+
+        created, conflicts = generate_recurring_availability(
+            staff_members=payload["staff"],
+            service=payload["service"],
+            start_date=payload["start_date"],
+            end_date=payload["end_date"],
+            weekdays=payload["weekdays"],
+            day_start=payload["day_start"],
+            day_end=payload["day_end"],
+        )
+        return Response(
+            {
+                "created_count": len(created),
+                "created": AvailabilitySerializer(created, many=True).data,
+                "conflicts": AvailabilityConflictSerializer(conflicts, many=True).data,
+            },
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
 
 class BookingViewSet(viewsets.ModelViewSet):
     queryset = Booking.objects.select_related("service", "staff", "availability", "payment_verified_by")
@@ -108,24 +229,51 @@ class BookingViewSet(viewsets.ModelViewSet):
     permission_classes = [BookingPermission]
     lookup_field = "public_id"
 
+    def initialize_request(self, request, *args, **kwargs):
+        drf_request = super().initialize_request(request, *args, **kwargs)
+        if self.action == "submit_payment_proof":
+            request.upload_handlers = [PaymentProofUploadHandler(request)]
+        return drf_request
+
     def get_queryset(self):
         queryset = super().get_queryset()
         if is_admin_or_operator(self.request.user):
             status_filter = self.request.query_params.get("status")
             if status_filter:
                 queryset = queryset.filter(status=status_filter)
+            if self.action in {"list", "retrieve"}:
+                # Same screenshot on another booking; served by the payment_proof_sha256 index.
+                queryset = queryset.annotate(
+                    payment_proof_reused=Exists(
+                        Booking.objects.filter(payment_proof_sha256=OuterRef("payment_proof_sha256"))
+                        .exclude(payment_proof_sha256="")
+                        .exclude(pk=OuterRef("pk"))
+                    )
+                )
             return queryset
-        if self.action in {"submit_payment_proof", "cancel", "track_status"}:
+        if self.action in {"submit_payment_proof", "start_proof_upload", "cancel", "track_status"}:
             return queryset
         return queryset.none()
 
     def get_serializer_class(self):
         if self.action == "create":
             return BookingCreateSerializer
+        if self.action == "cart":
+            return BookingCartSerializer
         if self.action == "submit_payment_proof":
             return SubmitPaymentProofSerializer
+        if self.action == "start_proof_upload":
+            return ProofUploadStartSerializer
+        if self.action == "finalize_proof_upload":
+            return ProofUploadFinalizeSerializer
         if self.action == "verify_payment":
             return VerifyPaymentSerializer
+        if self.action == "claim_payment_reviews":
+            return PaymentReviewClaimSerializer
+        if self.action == "bulk_verify_payments":
+            return BulkVerifyPaymentSerializer
+        if self.action == "reconcile_payments":
+            return PaymentReconciliationSerializer
         if self.action == "cancel":
             return CancelBookingSerializer
         if self.action == "complete":
@@ -134,6 +282,7 @@ class BookingViewSet(viewsets.ModelViewSet):
             return TrackBookingStatusRequestSerializer
         return BookingSerializer
 
+    @idempotent("booking-create")
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -149,6 +298,26 @@ class BookingViewSet(viewsets.ModelViewSet):
         output = BookingCreateResponseSerializer(response_payload)
         return Response(output.data, status=status.HTTP_201_CREATED)
 
+    @action(methods=["post"], detail=False, permission_classes=[AllowAny], url_path="cart")
+    @idempotent("booking-cart")
+    def cart(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        payload = serializer.validated_data
+        bookings = create_guest_cart_booking(customer=payload, availability_ids=payload["availability_ids"])
+
+        first = bookings[0]
+        response_payload = {
+            "cart_id": first.cart_id,
+            "guest_token": first.guest_token,
+            "status": first.status,
+            "payment_expires_at": first.payment_expires_at,
+            "payment_methods": [choice.value for choice in Booking.PaymentMethod],
+            "bookings": bookings,
+        }
+        output = BookingCartResponseSerializer(response_payload)
+        return Response(output.data, status=status.HTTP_201_CREATED)
+
     def update(self, request, *args, **kwargs):
         return Response(
             {"detail": "Direct booking updates are not allowed. Use workflow actions."},
@@ -164,7 +333,51 @@ class BookingViewSet(viewsets.ModelViewSet):
             status=status.HTTP_405_METHOD_NOT_ALLOWED,
         )
 
+    @action(methods=["get"], detail=False, permission_classes=[IsAdminOrOperatorRole], url_path="export")
+    def export(self, request):
+        query = BookingExportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        queryset = Booking.objects.all()
+        if params.get("status"):
+            queryset = queryset.filter(status=params["status"])
+        if params.get("payment_method"):
+            queryset = queryset.filter(payment_method=params["payment_method"])
+        local_tz = timezone.get_current_timezone()
+        if params.get("date_from"):
+            queryset = queryset.filter(
+                created_at__gte=timezone.make_aware(
+                    timezone.datetime.combine(params["date_from"], timezone.datetime.min.time()), local_tz
+                )
+            )
+        if params.get("date_to"):
+            queryset = queryset.filter(
+                created_at__lt=timezone.make_aware(
+                    timezone.datetime.combine(params["date_to"], timezone.datetime.min.time()), local_tz
+                )
+                + timezone.timedelta(days=1)
+            )
+
+        chunk_size = getattr(settings, "BOOKING_EXPORT_CHUNK_SIZE", 2000)
+        stamp = timezone.localtime().strftime("%Y%m%d-%H%M%S")
+        if params["output"] == "ndjson":
+            response = StreamingHttpResponse(
+                stream_bookings_ndjson(queryset, chunk_size=chunk_size),
+                content_type="application/x-ndjson",
+            )
+            extension = "ndjson"
+        else:
+            response = StreamingHttpResponse(
+                stream_bookings_csv(queryset, chunk_size=chunk_size),
+                content_type="text/csv; charset=utf-8",
+            )
+            extension = "csv"
+        response["Content-Disposition"] = f'attachment; filename="bookings-{stamp}.{extension}"'
+        return response
+
     @action(methods=["post"], detail=True, permission_classes=[AllowAny], url_path="submit-payment-proof")
+    @idempotent("submit-payment-proof")
     def submit_payment_proof(self, request, public_id=None):
         booking = self.get_object()
         serializer = self.get_serializer(data=request.data)
@@ -186,6 +399,131 @@ class BookingViewSet(viewsets.ModelViewSet):
             }
         )
 
+    def _get_proof_upload(self, upload_id: str) -> PaymentProofUpload:
+        try:
+            upload_uuid = uuid.UUID(upload_id)
+        except ValueError:
+            raise NotFound()
+        upload = (
+            PaymentProofUpload.objects.select_related("booking")
+            .filter(upload_id=upload_uuid, expires_at__gt=timezone.now())
+            .first()
+        )
+        if upload is None:
+            raise NotFound()
+        return upload
+
+    def _is_upload_guest(self, upload: PaymentProofUpload, customer_email: str, guest_token) -> bool:
+        booking = upload.booking
+        return customer_email.lower() == booking.customer_email.lower() and str(guest_token) == str(booking.guest_token)
+
+    def _proof_upload_response(self, upload: PaymentProofUpload, status_code: int = status.HTTP_200_OK) -> Response:
+        response = Response(
+            {
+                "upload_id": str(upload.upload_id),
+                "offset": upload.received_bytes,
+                "size": upload.size,
+                "expires_at": upload.expires_at,
+            },
+            status=status_code,
+        )
+        response["Upload-Offset"] = str(upload.received_bytes)
+        return response
+
+    @action(methods=["post"], detail=True, permission_classes=[AllowAny], url_path="proof-uploads")
+    def start_proof_upload(self, request, public_id=None):
+        booking = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        payload = serializer.validated_data
+        if payload["customer_email"].lower() != booking.customer_email.lower():
+            return Response({"detail": "Booking identity verification failed."}, status=403)
+        if payload["guest_token"] != booking.guest_token:
+            return Response({"detail": "Booking identity verification failed."}, status=403)
+
+        upload = start_proof_upload(
+            booking=booking,
+            file_name=payload["file_name"],
+            content_type=payload["content_type"],
+            size=payload["size"],
+        )
+        return self._proof_upload_response(upload, status.HTTP_201_CREATED)
+
+    @action(
+        methods=["get", "put"],
+        detail=False,
+        permission_classes=[AllowAny],
+        url_path=r"proof-uploads/(?P<upload_id>[0-9a-fA-F-]{32,36})",
+    )
+    def proof_upload(self, request, upload_id=None):
+        upload = self._get_proof_upload(upload_id)
+        # The raw chunk body leaves no room for form fields, so the guest identity travels in headers.
+        if not self._is_upload_guest(
+            upload, request.headers.get("Guest-Email", ""), request.headers.get("Guest-Token", "")
+        ):
+            return Response({"detail": "Booking identity verification failed."}, status=403)
+        if request.method == "GET":
+            return self._proof_upload_response(upload)
+
+        try:
+            offset = int(request.headers["Upload-Offset"])
+            length = int(request.headers["Content-Length"])
+        except (KeyError, ValueError):
+            return Response(
+                {"detail": "Upload-Offset and Content-Length headers are required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        # The offset check makes retries safe.
+        if offset != upload.received_bytes:
+            return self._proof_upload_response(upload, status.HTTP_409_CONFLICT)
+        if not append_proof_chunk(upload=upload, offset=offset, stream=request.stream, length=length):
+            upload.refresh_from_db(fields=["received_bytes"])
+            return self._proof_upload_response(upload, status.HTTP_409_CONFLICT)
+        return self._proof_upload_response(upload)
+
+    @action(
+        methods=["post"],
+        detail=False,
+        permission_classes=[AllowAny],
+        url_path=r"proof-uploads/(?P<upload_id>[0-9a-fA-F-]{32,36})/finalize",
+    )
+    @idempotent("proof-upload-finalize")
+    def finalize_proof_upload(self, request, upload_id=None):
+        upload = self._get_proof_upload(upload_id)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        payload = serializer.validated_data
+        if not self._is_upload_guest(upload, payload["customer_email"], payload["guest_token"]):
+            return Response({"detail": "Booking identity verification failed."}, status=403)
+
+        updated = finalize_proof_upload(upload=upload, payload=payload)
+        return Response(
+            {
+                "public_id": str(updated.public_id),
+                "status": updated.status,
+                "payment_submitted_at": updated.payment_submitted_at,
+                "message": "Payment proof submitted. Awaiting admin verification.",
+            }
+        )
+
+    @action(methods=["get"], detail=True, permission_classes=[IsAdminOrOperatorRole], url_path="payment-proof")
+    def payment_proof(self, request, public_id=None):
+        variant = request.query_params.get("variant", "original")
+        if variant not in PROOF_VARIANTS:
+            return Response(
+                {"detail": f"variant must be one of: {', '.join(sorted(PROOF_VARIANTS))}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        booking = self.get_object()
+        if not getattr(booking, proof_field_name(variant)):
+            raise NotFound("This booking has no payment proof for that variant.")
+        try:
+            return serve_payment_proof(request, booking, variant=variant)
+        except FileNotFoundError:
+            raise NotFound("Payment proof file is missing from storage.")
+
     @action(methods=["post"], detail=True, permission_classes=[IsAdminOrOperatorRole], url_path="verify-payment")
     def verify_payment(self, request, public_id=None):
         booking = self.get_object()
@@ -201,6 +539,54 @@ class BookingViewSet(viewsets.ModelViewSet):
         )
         return Response(BookingSerializer(updated).data)
 
+    @action(
+        methods=["post"],
+        detail=False,
+        permission_classes=[IsAdminOrOperatorRole],
+        url_path="review-queue/claim",
+    )
+    def claim_payment_reviews(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        claimed = claim_payment_reviews(operator=request.user, limit=serializer.validated_data["limit"])
+        return Response(
+            {
+                "lease_expires_at": claimed[0].review_claim_expires_at if claimed else None,
+                "results": BookingSerializer(claimed, many=True).data,
+            }
+        )
+
+    @action(
+        methods=["post"],
+        detail=False,
+        permission_classes=[IsAdminOrOperatorRole],
+        url_path="review-queue/verify",
+    )
+    def bulk_verify_payments(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        payload = serializer.validated_data
+        verified = verify_claimed_payments(
+            operator=request.user,
+            public_ids=payload["public_ids"],
+            approved=payload["approved"],
+            admin_note=payload["admin_note"],
+        )
+        return Response({"verified": len(verified), "results": BookingSerializer(verified, many=True).data})
+
+    @action(methods=["post"], detail=False, permission_classes=[IsAdminOrOperatorRole], url_path="reconcile")
+    def reconcile_payments(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        payload = serializer.validated_data
+        report = reconcile_statement(
+            decode_statement(payload["statement"]),
+            operator=request.user,
+            payment_method=payload.get("payment_method"),
+            dry_run=payload["dry_run"],
+        )
+        return Response(report)
+
     @action(methods=["post"], detail=True, permission_classes=[AllowAny], url_path="cancel")
     def cancel(self, request, public_id=None):
         booking = self.get_object()
@@ -215,6 +601,8 @@ class BookingViewSet(viewsets.ModelViewSet):
                 return Response({"detail": "Booking identity verification failed."}, status=403)
 
         updated = cancel_booking(booking=booking, reason=payload.get("reason", ""))
+        if not is_admin_or_operator(request.user):
+            return Response(BookingPublicStatusSerializer(updated).data)
         return Response(BookingSerializer(updated).data)
 
     @action(methods=["post"], detail=True, permission_classes=[IsAdminOrOperatorRole], url_path="complete")
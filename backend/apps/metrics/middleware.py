@@ -0,0 +1,67 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .registry import registry
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+http_requests_total = registry.counter("http_requests_total", "HTTP requests by route, method and status.")
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency in seconds by route and method."
+)
+http_request_db_queries = registry.histogram(
+    "http_request_db_queries", "Database queries issued per HTTP request.", buckets=QUERY_COUNT_BUCKETS
+)
+http_request_db_duration_seconds = registry.histogram(
+    "http_request_db_duration_seconds", "Time spent in database queries per HTTP request."
+)
+
+
+class _QueryTimer:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+def _route_label(request) -> str:
+    # Resolved URL names keep label cardinality bounded; raw paths contain ids.
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    return match.view_name or "unnamed"
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, "METRICS_ENABLED", False):
+            return self.get_response(request)
+
+        timer = _QueryTimer()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(timer))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        route = _route_label(request)
+        method = request.method
+        http_requests_total.inc(route=route, method=method, status=str(response.status_code))
+        http_request_duration_seconds.observe(elapsed, route=route, method=method)
+        http_request_db_queries.observe(timer.count, route=route, method=method)
+        http_request_db_duration_seconds.observe(timer.duration, route=route, method=method)
+        return response
@@ -0,0 +1,39 @@
+from django.test import TestCase, override_settings
+
+from apps.metrics.registry import registry
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_AUTH_TOKEN="")
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        registry.reset()
+
+    def test_requests_are_labeled_by_url_name_with_query_counts(self):
+        self.client.get("/api/health/")
+        self.client.get("/api/bookings/availability/")
+
+        body = self.client.get("/api/metrics/").content.decode()
+
+        self.assertIn('http_requests_total{method="GET",route="health-check",status="200"} 1', body)
+        self.assertIn('http_request_db_queries_count{method="GET",route="availability-list"} 1', body)
+        self.assertIn('http_request_db_queries_bucket{method="GET",route="health-check",le="0"} 1', body)
+        self.assertIn("# TYPE http_request_duration_seconds histogram", body)
+        self.assertNotIn("/api/", body.replace("/api/metrics/", ""))
+
+    def test_unknown_paths_share_one_label(self):
+        self.client.get("/api/does-not-exist/123/")
+        self.client.get("/api/does-not-exist/456/")
+
+        body = self.client.get("/api/metrics/").content.decode()
+
+        self.assertIn('http_requests_total{method="GET",route="unmatched",status="404"} 2', body)
+
+    @override_settings(METRICS_AUTH_TOKEN="secret")
+    def test_metrics_endpoint_requires_token_when_configured(self):
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 401)
+        response = self.client.get("/api/metrics/", HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_metrics_endpoint_is_hidden_when_disabled(self):
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 404)
@@ -0,0 +1,17 @@
+import secrets
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+from .registry import registry
+
+
+def metrics_view(request):
+    if not getattr(settings, "METRICS_ENABLED", False):
+        raise Http404
+    token = getattr(settings, "METRICS_AUTH_TOKEN", "")
+    if token:
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not secrets.compare_digest(supplied, token):
+            return HttpResponse("Unauthorized\n", status=401, content_type="text/plain")
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
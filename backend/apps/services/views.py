@@ -1,6 +1,7 @@
 from rest_framework import viewsets
 from rest_framework.permissions import AllowAny
 
+from apps.bookings.availability_cache import invalidate_availability_catalog
 from apps.bookings.permissions import IsAdminRole
 from apps.users.roles import is_admin
 
@@ -24,3 +25,15 @@ class ServiceViewSet(viewsets.ModelViewSet):
         if self.request.user and self.request.user.is_staff:
             return queryset
         return queryset.filter(is_active=True)
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        invalidate_availability_catalog()
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        invalidate_availability_catalog()
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        invalidate_availability_catalog()
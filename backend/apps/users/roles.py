@@ -3,12 +3,30 @@ from django.contrib.auth.models import Group
 ROLE_ADMIN = "admin"
 ROLE_OPERATOR = "operator"
 
+ROLE_CACHE_ATTR = "_role_names_cache"
+
 
 def ensure_default_roles() -> None:
     Group.objects.get_or_create(name=ROLE_ADMIN)
     Group.objects.get_or_create(name=ROLE_OPERATOR)
 
 
+def get_role_names(user) -> frozenset[str]:
+    # Memoized on the user object, which DRF/Django rebuild on every request,
+    # so permission classes and view code share one group query per request.
+    if not user or not user.is_authenticated:
+        return frozenset()
+    role_names = getattr(user, ROLE_CACHE_ATTR, None)
+    if role_names is None:
+        role_names = frozenset(user.groups.values_list("name", flat=True))
+        setattr(user, ROLE_CACHE_ATTR, role_names)
+    return role_names
+
+
+def clear_role_cache(user) -> None:
+    user.__dict__.pop(ROLE_CACHE_ATTR, None)
+
+
 def has_role(user, role: str) -> bool:
     if not user or not user.is_authenticated:
         return False
@@ -16,7 +34,7 @@ def has_role(user, role: str) -> bool:
         return True
     if not user.is_staff:
         return False
-    return user.groups.filter(name=role).exists()
+    return role in get_role_names(user)
 
 
 def is_admin(user) -> bool:
@@ -29,4 +47,3 @@ def is_operator(user) -> bool:
 
 def is_admin_or_operator(user) -> bool:
     return is_admin(user) or is_operator(user)
-
@@ -0,0 +1,15 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+
+from .roles import clear_role_cache
+
+User = get_user_model()
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def clear_role_cache_on_group_change(sender, instance, action, **kwargs):
+    # Only the in-memory user passed to user.groups.add/remove/clear can be reached
+    # here; other user objects hold at most one request's worth of stale roles.
+    if action in {"post_add", "post_remove", "post_clear"} and isinstance(instance, User):
+        clear_role_cache(instance)
@@ -1,3 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
 from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from apps.users.roles import ROLE_ADMIN, ROLE_OPERATOR, ensure_default_roles, is_admin, is_admin_or_operator
+
+
+class RoleResolutionTests(TestCase):
+    def setUp(self):
+        ensure_default_roles()
+        self.user = get_user_model().objects.create_user(
+            username="operator",
+            password="password123",
+            is_staff=True,
+        )
+        self.user.groups.add(Group.objects.get(name=ROLE_OPERATOR))
+        self.user = get_user_model().objects.get(pk=self.user.pk)
+
+    def test_role_checks_share_one_group_query(self):
+        with self.assertNumQueries(1):
+            self.assertTrue(is_admin_or_operator(self.user))
+            self.assertFalse(is_admin(self.user))
+            self.assertTrue(is_admin_or_operator(self.user))
+
+    def test_group_changes_clear_cached_roles(self):
+        self.assertFalse(is_admin(self.user))
+
+        self.user.groups.add(Group.objects.get(name=ROLE_ADMIN))
+        self.assertTrue(is_admin(self.user))
+
+        self.user.groups.clear()
+        self.assertFalse(is_admin_or_operator(self.user))
+
+
+class RoleQueryCountApiTests(APITestCase):
+    def test_operator_booking_list_resolves_roles_once(self):
+        ensure_default_roles()
+        user = get_user_model().objects.create_user(username="listop", password="password123", is_staff=True)
+        user.groups.add(Group.objects.get(name=ROLE_OPERATOR))
+        self.client.force_authenticate(get_user_model().objects.get(pk=user.pk))
+
+        # One group lookup plus the booking list query.
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/bookings/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -33,9 +34,11 @@ INSTALLED_APPS = [
     "apps.users",
     "apps.services",
     "apps.bookings",
+    "apps.metrics",
 ]
 
 MIDDLEWARE = [
+    "apps.metrics.middleware.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -85,6 +88,13 @@ else:
         }
     }
 
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("DJANGO_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("DJANGO_CACHE_LOCATION", ""),
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -119,9 +129,43 @@ CORS_ALLOWED_ORIGINS = env_list(
     "http://localhost:5173,http://localhost:8080",
 )
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key", "upload-offset", "guest-email", "guest-token")
+CORS_EXPOSE_HEADERS = ["Idempotent-Replayed", "Upload-Offset"]
 
 BOOKING_PAYMENT_TIMEOUT_MINUTES = int(os.getenv("BOOKING_PAYMENT_TIMEOUT_MINUTES", "5"))
 BOOKING_STATUS_EMAIL_ENABLED = env_bool("BOOKING_STATUS_EMAIL_ENABLED", True)
+BOOKING_EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("BOOKING_EMAIL_OUTBOX_MAX_ATTEMPTS", "5"))
+BOOKING_EMAIL_OUTBOX_RETRY_SECONDS = int(os.getenv("BOOKING_EMAIL_OUTBOX_RETRY_SECONDS", "60"))
+BOOKING_EMAIL_OUTBOX_LEASE_SECONDS = int(os.getenv("BOOKING_EMAIL_OUTBOX_LEASE_SECONDS", "300"))
+BOOKING_EMAIL_OUTBOX_POLL_SECONDS = float(os.getenv("BOOKING_EMAIL_OUTBOX_POLL_SECONDS", "2"))
+BOOKING_EXPORT_CHUNK_SIZE = int(os.getenv("BOOKING_EXPORT_CHUNK_SIZE", "2000"))
+BOOKING_EXPIRY_BATCH_SIZE = int(os.getenv("BOOKING_EXPIRY_BATCH_SIZE", "500"))
+BOOKING_EXPIRY_POLL_SECONDS = float(os.getenv("BOOKING_EXPIRY_POLL_SECONDS", "5"))
+BOOKING_EXPIRY_REFRESH_OVERLAP_SECONDS = int(os.getenv("BOOKING_EXPIRY_REFRESH_OVERLAP_SECONDS", "60"))
+BOOKING_EXPIRY_RESCAN_SECONDS = int(os.getenv("BOOKING_EXPIRY_RESCAN_SECONDS", "300"))
+BOOKING_REVIEW_LEASE_SECONDS = int(os.getenv("BOOKING_REVIEW_LEASE_SECONDS", "600"))
+BOOKING_REVIEW_CLAIM_MAX = int(os.getenv("BOOKING_REVIEW_CLAIM_MAX", "50"))
+BOOKING_RECONCILE_BATCH_SIZE = int(os.getenv("BOOKING_RECONCILE_BATCH_SIZE", "500"))
+BOOKING_PAYMENT_PROOF_MAX_BYTES = int(os.getenv("BOOKING_PAYMENT_PROOF_MAX_BYTES", str(5 * 1024 * 1024)))
+BOOKING_PROOF_UPLOAD_DIR = os.getenv("BOOKING_PROOF_UPLOAD_DIR", "")
+BOOKING_PROOF_UPLOAD_TTL_SECONDS = int(os.getenv("BOOKING_PROOF_UPLOAD_TTL_SECONDS", "3600"))
+# "X-Accel-Redirect" (nginx) or "X-Sendfile" (Apache/lighttpd) hands proof downloads to the web server.
+BOOKING_PROOF_SENDFILE_HEADER = os.getenv("BOOKING_PROOF_SENDFILE_HEADER", "")
+BOOKING_PROOF_SENDFILE_PREFIX = os.getenv("BOOKING_PROOF_SENDFILE_PREFIX", "/protected-media/")
+BOOKING_PROOF_RETENTION_DAYS = int(os.getenv("BOOKING_PROOF_RETENTION_DAYS", "180"))
+BOOKING_PROOF_JPEG_QUALITY = int(os.getenv("BOOKING_PROOF_JPEG_QUALITY", "75"))
+BOOKING_PROOF_MAX_DIMENSION = int(os.getenv("BOOKING_PROOF_MAX_DIMENSION", "2048"))
+BOOKING_PROOF_THUMBNAIL_SIZE = int(os.getenv("BOOKING_PROOF_THUMBNAIL_SIZE", "320"))
+BOOKING_PROOF_JOB_MAX_ATTEMPTS = int(os.getenv("BOOKING_PROOF_JOB_MAX_ATTEMPTS", "3"))
+BOOKING_PROOF_POLL_SECONDS = float(os.getenv("BOOKING_PROOF_POLL_SECONDS", "2"))
+BOOKING_CART_MAX_ITEMS = int(os.getenv("BOOKING_CART_MAX_ITEMS", "10"))
+BOOKING_IDEMPOTENCY_TTL_SECONDS = int(os.getenv("BOOKING_IDEMPOTENCY_TTL_SECONDS", "86400"))
+BOOKING_IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("BOOKING_IDEMPOTENCY_LOCK_SECONDS", "60"))
+AVAILABILITY_PAGE_SIZE = int(os.getenv("AVAILABILITY_PAGE_SIZE", "100"))
+AVAILABILITY_MAX_PAGE_SIZE = int(os.getenv("AVAILABILITY_MAX_PAGE_SIZE", "500"))
+AVAILABILITY_BULK_MAX_DAYS = int(os.getenv("AVAILABILITY_BULK_MAX_DAYS", "93"))
+AVAILABILITY_CACHE_MAX_SECONDS = int(os.getenv("AVAILABILITY_CACHE_MAX_SECONDS", "3600"))
+AVAILABILITY_CACHE_LOCAL_MAX_SECONDS = int(os.getenv("AVAILABILITY_CACHE_LOCAL_MAX_SECONDS", "5"))
 
 EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "django.core.mail.backends.console.EmailBackend")
 EMAIL_HOST = os.getenv("EMAIL_HOST", "localhost")
@@ -132,5 +176,10 @@ EMAIL_USE_TLS = env_bool("EMAIL_USE_TLS", False)
 EMAIL_USE_SSL = env_bool("EMAIL_USE_SSL", False)
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "Doce Amor <no-reply@doceamor.local>")
 
+METRICS_ENABLED = env_bool("METRICS_ENABLED", False)
+METRICS_AUTH_TOKEN = os.getenv("METRICS_AUTH_TOKEN", "")
+BOOKING_WORKFLOW_SLOW_LOCK_WAIT_MS = int(os.getenv("BOOKING_WORKFLOW_SLOW_LOCK_WAIT_MS", "200"))
+BOOKING_WORKFLOW_SLOW_TRANSACTION_MS = int(os.getenv("BOOKING_WORKFLOW_SLOW_TRANSACTION_MS", "1000"))
+
 SECURE_CONTENT_TYPE_NOSNIFF = True
 X_FRAME_OPTIONS = "DENY"
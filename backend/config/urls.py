@@ -20,6 +20,8 @@ from django.conf.urls.static import static
 from django.http import JsonResponse
 from django.urls import include, path
 
+from apps.metrics.views import metrics_view
+
 
 def health_check(_request):
     return JsonResponse({"status": "ok"})
@@ -27,6 +29,7 @@ def health_check(_request):
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/health/", health_check, name="health-check"),
+    path("api/metrics/", metrics_view, name="metrics"),
     path("api/users/", include("apps.users.urls")),
     path("api/services/", include("apps.services.urls")),
     path("api/bookings/", include("apps.bookings.urls")),
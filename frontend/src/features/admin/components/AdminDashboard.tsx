@@ -21,6 +21,7 @@ import {
   createService,
   createStaff,
   fetchAdminBookings,
+  fetchPaymentProof,
   fetchAvailabilityAdmin,
   fetchServicesAdmin,
   fetchStaff,
@@ -35,7 +36,6 @@ interface AdminDashboardProps {
 const AdminDashboard = ({ initialSection = 'slots' }: AdminDashboardProps) => {
   const { toast } = useToast();
   const navigate = useNavigate();
-  const apiBaseUrl = ((import.meta.env.VITE_API_BASE_URL as string | undefined)?.replace(/\/+$/, '') ?? 'http://localhost:8000');
   const existingToken = typeof window !== 'undefined' ? localStorage.getItem('adminBasicAuthToken') : null;
   const [bookings, setBookings] = useState<AdminBooking[]>([]);
   const [filter, setFilter] = useState<'all' | AdminBooking['status']>('all');
@@ -315,10 +315,24 @@ const AdminDashboard = ({ initialSection = 'slots' }: AdminDashboardProps) => {
     return getStatusIcon(displayStatus);
   };
 
-  const resolveMediaUrl = (fileUrl: string | null) => {
-    if (!fileUrl) return '';
-    if (fileUrl.startsWith('http://') || fileUrl.startsWith('https://')) return fileUrl;
-    return `${apiBaseUrl}${fileUrl.startsWith('/') ? '' : '/'}${fileUrl}`;
+  const openPaymentProof = async (booking: AdminBooking) => {
+    // Proofs need the admin credentials, so they are fetched as a blob instead of linked directly.
+    const proofWindow = window.open('', '_blank');
+    try {
+      const proof = await fetchPaymentProof(booking.public_id);
+      const objectUrl = URL.createObjectURL(proof);
+      if (proofWindow) {
+        proofWindow.location.href = objectUrl;
+      }
+      window.setTimeout(() => URL.revokeObjectURL(objectUrl), 60_000);
+    } catch (error) {
+      proofWindow?.close();
+      toast({
+        title: 'Could not load payment proof',
+        description: (error as Error).message,
+        variant: 'destructive',
+      });
+    }
   };
 
   const serviceNameById = useMemo(() => {
@@ -1178,8 +1192,6 @@ const AdminDashboard = ({ initialSection = 'slots' }: AdminDashboardProps) => {
             filteredBookings.map((booking) => {
               const slot = availabilityById.get(booking.availability);
               const serviceName = serviceNameById.get(booking.service) ?? `Service #${booking.service}`;
-              const proofUrl = resolveMediaUrl(booking.payment_proof_file);
-
               return (
                 <Card key={booking.id} className="spa-card">
                   <CardHeader>
@@ -1246,17 +1258,16 @@ const AdminDashboard = ({ initialSection = 'slots' }: AdminDashboardProps) => {
                             <p className="text-sm text-gray-600">{booking.payment_reference}</p>
                           </div>
                         ) : null}
-                        {proofUrl ? (
+                        {booking.payment_proof_file ? (
                           <div>
                             <h4 className="text-sm font-medium text-gray-700 mb-1">Payment Proof</h4>
-                            <a
-                              href={proofUrl}
-                              target="_blank"
-                              rel="noreferrer"
+                            <button
+                              type="button"
+                              onClick={() => void openPaymentProof(booking)}
                               className="text-sm text-[#7a5967] underline underline-offset-2"
                             >
                               View uploaded proof
-                            </a>
+                            </button>
                           </div>
                         ) : null}
                         {booking.payment_notes ? (
@@ -19,6 +19,12 @@ export interface Availability {
   created_at?: string;
 }
 
+export interface CursorPage<T> {
+  next: string | null;
+  previous: string | null;
+  results: T[];
+}
+
 export interface Staff {
   id: number;
   full_name: string;
@@ -45,6 +51,23 @@ export interface CreateBookingResponse {
   payment_methods: string[];
 }
 
+export interface CreateCartBookingPayload {
+  customer_name: string;
+  customer_email: string;
+  customer_phone: string;
+  notes: string;
+  availability_ids: number[];
+}
+
+export interface CreateCartBookingResponse {
+  cart_id: string;
+  guest_token: string;
+  status: string;
+  payment_expires_at: string;
+  payment_methods: string[];
+  bookings: { public_id: string; availability: number; service: number; staff: number }[];
+}
+
 export interface SubmitPaymentProofPayload {
   customer_email: string;
   guest_token: string;
@@ -89,10 +112,16 @@ export interface AdminBooking {
   payment_method: "gcash" | "bdo" | null;
   payment_reference: string;
   payment_proof_file: string | null;
+  payment_proof_thumbnail: string | null;
+  payment_proof_sha256: string;
+  payment_proof_reused: boolean;
   payment_notes: string;
   payment_verified_at: string | null;
   payment_rejection_reason: string;
+  review_claimed_by: number | null;
+  review_claim_expires_at: string | null;
   cancel_reason: string;
+  cart_id: string | null;
   created_at: string;
   updated_at: string;
 }
@@ -136,13 +165,43 @@ export async function updateService(
   });
 }
 
+async function fetchAllCursorPages<T>(path: string, withAuth = true): Promise<T[]> {
+  const rows: T[] = [];
+  let nextPath: string | null = path;
+  while (nextPath) {
+    const page: CursorPage<T> = await apiRequest<CursorPage<T>>(nextPath, { withAuth });
+    rows.push(...page.results);
+    if (page.next) {
+      const nextUrl = new URL(page.next);
+      nextPath = `${nextUrl.pathname}${nextUrl.search}`;
+    } else {
+      nextPath = null;
+    }
+  }
+  return rows;
+}
+
 export async function fetchAvailabilityByServiceAndDate(serviceId: number, date: string): Promise<Availability[]> {
   const query = new URLSearchParams({ service: String(serviceId), date }).toString();
-  return apiRequest<Availability[]>(`/api/bookings/availability/?${query}`, { withAuth: false });
+  return fetchAllCursorPages<Availability>(`/api/bookings/availability/?${query}`, false);
+}
+
+export async function fetchNextAvailability(serviceId: number, options: { after?: string; limit?: number } = {}) {
+  const params = new URLSearchParams({ service: String(serviceId) });
+  if (options.after) {
+    params.set("after", options.after);
+  }
+  if (options.limit) {
+    params.set("limit", String(options.limit));
+  }
+  const page = await apiRequest<{ results: Availability[] }>(`/api/bookings/availability/next/?${params.toString()}`, {
+    withAuth: false,
+  });
+  return page.results;
 }
 
 export async function fetchAvailabilityAdmin(): Promise<Availability[]> {
-  return apiRequest<Availability[]>("/api/bookings/availability/");
+  return fetchAllCursorPages<Availability>("/api/bookings/availability/");
 }
 
 export async function fetchStaff(): Promise<Staff[]> {
@@ -175,10 +234,38 @@ export async function createAvailability(payload: {
   });
 }
 
+const idempotencyKeys = new Map<string, string>();
+
+// Resubmitting the same payload (double click, retry after a dropped response)
+// reuses its key, so the backend replays the first result instead of re-running it.
+function idempotencyKeyFor(fingerprint: string): string {
+  let key = idempotencyKeys.get(fingerprint);
+  if (!key) {
+    key = crypto.randomUUID();
+    idempotencyKeys.set(fingerprint, key);
+  }
+  return key;
+}
+
 export async function createBooking(payload: CreateBookingPayload): Promise<CreateBookingResponse> {
   return apiRequest<CreateBookingResponse>("/api/bookings/", {
     method: "POST",
-    headers: { "Content-Type": "application/json" },
+    headers: {
+      "Content-Type": "application/json",
+      "Idempotency-Key": idempotencyKeyFor(`create:${JSON.stringify(payload)}`),
+    },
+    body: JSON.stringify(payload),
+    withAuth: false,
+  });
+}
+
+export async function createCartBooking(payload: CreateCartBookingPayload): Promise<CreateCartBookingResponse> {
+  return apiRequest<CreateCartBookingResponse>("/api/bookings/cart/", {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      "Idempotency-Key": idempotencyKeyFor(`cart:${JSON.stringify(payload)}`),
+    },
     body: JSON.stringify(payload),
     withAuth: false,
   });
@@ -195,13 +282,97 @@ export async function submitPaymentProof(publicId: string, payload: SubmitPaymen
     formData.append("payment_notes", payload.payment_notes);
   }
 
+  const { payment_proof_file: file, ...fields } = payload;
+  const fingerprint = `proof:${publicId}:${JSON.stringify(fields)}:${file.name}:${file.size}:${file.lastModified}`;
+
   return apiRequest<{ status: string; message: string }>(`/api/bookings/${publicId}/submit-payment-proof/`, {
     method: "POST",
+    headers: { "Idempotency-Key": idempotencyKeyFor(fingerprint) },
     body: formData,
     withAuth: false,
   });
 }
 
+const PROOF_CHUNK_BYTES = 256 * 1024;
+const PROOF_CHUNK_ATTEMPTS = 5;
+const resumableUploadIds = new Map<string, string>();
+
+interface ProofUploadState {
+  upload_id: string;
+  offset: number;
+  size: number;
+  expires_at: string;
+}
+
+// Sends the proof in offset-addressed chunks; a dropped chunk is retried from the server's offset,
+// and submitting the same file again after a failure resumes the upload instead of restarting it.
+export async function uploadPaymentProofResumable(publicId: string, payload: SubmitPaymentProofPayload) {
+  const { payment_proof_file: file, customer_email, guest_token, ...fields } = payload;
+  const fileKey = `${publicId}:${file.name}:${file.size}:${file.lastModified}`;
+
+  const guestHeaders = { "Guest-Email": customer_email, "Guest-Token": guest_token };
+
+  let state: ProofUploadState | null = null;
+  const knownUploadId = resumableUploadIds.get(fileKey);
+  if (knownUploadId) {
+    state = await apiRequest<ProofUploadState>(`/api/bookings/proof-uploads/${knownUploadId}/`, {
+      headers: guestHeaders,
+      withAuth: false,
+    }).catch(() => null);
+  }
+  if (!state) {
+    state = await apiRequest<ProofUploadState>(`/api/bookings/${publicId}/proof-uploads/`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({
+        customer_email,
+        guest_token,
+        file_name: file.name,
+        content_type: file.type,
+        size: file.size,
+      }),
+      withAuth: false,
+    });
+    resumableUploadIds.set(fileKey, state.upload_id);
+  }
+
+  const uploadPath = `/api/bookings/proof-uploads/${state.upload_id}/`;
+  let offset = state.offset;
+  let failures = 0;
+  while (offset < file.size) {
+    try {
+      const next = await apiRequest<ProofUploadState>(uploadPath, {
+        method: "PUT",
+        headers: {
+          ...guestHeaders,
+          "Content-Type": "application/offset+octet-stream",
+          "Upload-Offset": String(offset),
+        },
+        body: file.slice(offset, offset + PROOF_CHUNK_BYTES),
+        withAuth: false,
+      });
+      offset = next.offset;
+      failures = 0;
+    } catch (error) {
+      failures += 1;
+      if (failures >= PROOF_CHUNK_ATTEMPTS) {
+        throw error;
+      }
+      offset = (await apiRequest<ProofUploadState>(uploadPath, { headers: guestHeaders, withAuth: false })).offset;
+    }
+  }
+
+  const fingerprint = `proof-upload:${state.upload_id}:${JSON.stringify(fields)}`;
+  const result = await apiRequest<{ status: string; message: string }>(`${uploadPath}finalize/`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json", "Idempotency-Key": idempotencyKeyFor(fingerprint) },
+    body: JSON.stringify({ ...fields, customer_email, guest_token }),
+    withAuth: false,
+  });
+  resumableUploadIds.delete(fileKey);
+  return result;
+}
+
 export async function trackBookingStatus(publicId: string, payload: TrackStatusPayload): Promise<TrackStatusResponse> {
   return apiRequest<TrackStatusResponse>(`/api/bookings/${publicId}/track-status/`, {
     method: "POST",
@@ -216,6 +387,10 @@ export async function fetchAdminBookings(status?: AdminBooking["status"]): Promi
   return apiRequest<AdminBooking[]>(`/api/bookings/${query}`);
 }
 
+export async function fetchPaymentProof(publicId: string, variant: "original" | "thumbnail" = "original"): Promise<Blob> {
+  return apiRequest<Blob>(`/api/bookings/${publicId}/payment-proof/?variant=${variant}`, { responseType: "blob" });
+}
+
 export async function verifyAdminBookingPayment(
   publicId: string,
   payload: { approved: boolean; admin_note?: string },
@@ -226,3 +401,64 @@ export async function verifyAdminBookingPayment(
     body: JSON.stringify(payload),
   });
 }
+
+export async function claimPaymentReviews(
+  limit?: number,
+): Promise<{ lease_expires_at: string | null; results: AdminBooking[] }> {
+  return apiRequest<{ lease_expires_at: string | null; results: AdminBooking[] }>(
+    "/api/bookings/review-queue/claim/",
+    {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(limit ? { limit } : {}),
+    },
+  );
+}
+
+export async function bulkVerifyPayments(payload: {
+  public_ids: string[];
+  approved: boolean;
+  admin_note?: string;
+}): Promise<{ verified: number; results: AdminBooking[] }> {
+  return apiRequest<{ verified: number; results: AdminBooking[] }>("/api/bookings/review-queue/verify/", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(payload),
+  });
+}
+
+export interface ReconciliationRow {
+  line: number;
+  payment_method: string;
+  reference: string;
+  amount: string;
+  reason: string;
+}
+
+export interface ReconciliationReport {
+  rows: number;
+  matched: number;
+  approved: number;
+  dry_run: boolean;
+  unmatched: ReconciliationRow[];
+  ambiguous: ReconciliationRow[];
+}
+
+export async function reconcilePayments(payload: {
+  statement: File;
+  payment_method?: "gcash" | "bdo";
+  dry_run?: boolean;
+}): Promise<ReconciliationReport> {
+  const formData = new FormData();
+  formData.append("statement", payload.statement);
+  if (payload.payment_method) {
+    formData.append("payment_method", payload.payment_method);
+  }
+  if (payload.dry_run) {
+    formData.append("dry_run", "true");
+  }
+  return apiRequest<ReconciliationReport>("/api/bookings/reconcile/", {
+    method: "POST",
+    body: formData,
+  });
+}
@@ -15,7 +15,7 @@ import {
   createBooking,
   fetchAvailabilityByServiceAndDate,
   fetchServices,
-  submitPaymentProof,
+  uploadPaymentProofResumable,
 } from "@/features/booking/api";
 
 interface ServiceOption {
@@ -326,7 +326,7 @@ const BookingForm = () => {
     if (!bookingSession || !paymentData.paymentProofFile) return;
     setProofSubmitting(true);
     try {
-      await submitPaymentProof(bookingSession.publicId, {
+      await uploadPaymentProofResumable(bookingSession.publicId, {
         customer_email: formData.email,
         guest_token: bookingSession.guestToken,
         payment_method: paymentData.paymentMethod,
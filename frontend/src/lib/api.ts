@@ -7,6 +7,7 @@ interface RequestOptions {
   body?: BodyInit | null;
   headers?: Record<string, string>;
   withAuth?: boolean;
+  responseType?: "json" | "blob";
 }
 
 function extractApiErrorMessage(data: unknown): string | null {
@@ -83,5 +84,9 @@ export async function apiRequest<T>(path: string, options: RequestOptions = {}):
     return {} as T;
   }
 
+  if (options.responseType === "blob") {
+    return (await response.blob()) as T;
+  }
+
   return (await response.json()) as T;
 }